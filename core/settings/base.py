@@ -141,6 +141,52 @@ CACHES = {
     }
 }
 
+# อายุสูงสุด (วินาที) ของผลลัพธ์ validate ใน cache
+LICENSE_VALIDATE_CACHE_TIMEOUT = config('LICENSE_VALIDATE_CACHE_TIMEOUT', default=300, cast=int)
+
+# อายุสูงสุด (วินาที) ของผลลัพธ์ GET /api/licenses/stats/ ใน cache (ถูกล้างเมื่อ License เปลี่ยน)
+LICENSE_STATS_CACHE_TIMEOUT = config('LICENSE_STATS_CACHE_TIMEOUT', default=60, cast=int)
+
+# จำนวนรายการสูงสุดต่อ request ของ POST /api/licenses/validate_batch/
+LICENSE_VALIDATE_BATCH_MAX_ITEMS = config('LICENSE_VALIDATE_BATCH_MAX_ITEMS', default=50, cast=int)
+
+# ระยะเวลา (วินาที) ที่ client ควรใช้ offline license token ก่อนเรียก validate ใหม่
+LICENSE_TOKEN_REFRESH_INTERVAL = config('LICENSE_TOKEN_REFRESH_INTERVAL', default=86400, cast=int)
+
+# ระยะเวลา (วินาที) ที่เก็บผลลัพธ์ของ request ที่มี header Idempotency-Key (activate/renew)
+LICENSE_IDEMPOTENCY_TIMEOUT = config('LICENSE_IDEMPOTENCY_TIMEOUT', default=86400, cast=int)
+
+# จำนวน License ต่อ transaction ของ bulk action ใน admin (มากกว่านี้ทำเบื้องหลัง)
+LICENSE_BULK_ACTION_CHUNK_SIZE = config('LICENSE_BULK_ACTION_CHUNK_SIZE', default=1000, cast=int)
+
+# ระยะเวลา (วินาที) ที่แต่ละ worker ตรวจสอบ version ของ SoftwareName catalog ใน cache
+SOFTWARE_CATALOG_CHECK_INTERVAL = config('SOFTWARE_CATALOG_CHECK_INTERVAL', default=1.0, cast=float)
+
+# ใช้ async views สำหรับ activate/validate/renew/health (ต้องรันผ่าน ASGI ดู gunicorn.conf.py)
+LICENSE_ASYNC_API = config('LICENSE_ASYNC_API', default=False, cast=bool)
+
+# Buffer สำหรับบันทึก ActivationLog แบบ bulk (ต่อ worker)
+# log ที่อาจสูญหายเมื่อ worker crash หรือ DB ใช้งานไม่ได้นาน ๆ ไม่เกิน LOG_BUFFER_MAX_PENDING รายการ
+# (ระหว่างที่ DB ใช้งานไม่ได้ log จะถูกเก็บไว้ลองใหม่ทุก LOG_BUFFER_FLUSH_INTERVAL วินาที)
+LOG_BUFFER_ENABLED = config('LOG_BUFFER_ENABLED', default=True, cast=bool)
+LOG_BUFFER_BATCH_SIZE = config('LOG_BUFFER_BATCH_SIZE', default=200, cast=int)
+LOG_BUFFER_FLUSH_INTERVAL = config('LOG_BUFFER_FLUSH_INTERVAL', default=2.0, cast=float)
+LOG_BUFFER_MAX_PENDING = config('LOG_BUFFER_MAX_PENDING', default=10000, cast=int)
+
+# รวม validate ที่สำเร็จเป็น ValidateRollup รายชั่วโมงต่อ License แทน ActivationLog ทีละแถว
+LOG_VALIDATE_ROLLUP = config('LOG_VALIDATE_ROLLUP', default=False, cast=bool)
+
+# จำนวนข้อความ User Agent ↔ id ที่แต่ละ worker จำไว้ (ActivationLog เก็บแค่ id ดู license/useragents.py)
+USER_AGENT_CACHE_SIZE = config('USER_AGENT_CACHE_SIZE', default=1000, cast=int)
+
+# Partition รายเดือนของ ActivationLog (PostgreSQL) ดู python manage.py partition_activation_logs
+# LOG_RETENTION_DAYS = 0 คือเก็บ log ไว้ทั้งหมด
+LOG_PARTITION_MONTHS_AHEAD = config('LOG_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+LOG_RETENTION_DAYS = config('LOG_RETENTION_DAYS', default=0, cast=int)
+
+# ที่เก็บไฟล์ archive ของ ActivationLog (ดู python manage.py archive_logs)
+LOG_ARCHIVE_DIR = config('LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'archives'))
+
 
 # Logging configuration
 LOGGING = {
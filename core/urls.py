@@ -42,6 +42,10 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     login_url = '/login/'
 
 
+if settings.LICENSE_ASYNC_API:
+    from license.async_views import health_check  # noqa: F811
+
+
 urlpatterns = [
     path("", index_view, name="index"),
     path("health/", health_check, name="health_check"),
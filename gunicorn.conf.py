@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration
+gunicorn โหลดไฟล์นี้อัตโนมัติเมื่อรันจาก root ของโปรเจกต์
+(ค่า workers/threads/timeout ยังกำหนดผ่าน command line ใน Dockerfile และ docker-compose.yml)
+
+LICENSE_ASYNC_API=True จะรัน core.asgi:application ด้วย UvicornWorker (แพ็กเกจ uvicorn-worker)
+ถ้าไม่ได้ระบุ application ใน command line
+"""
+
+from decouple import config
+
+if config('LICENSE_ASYNC_API', default=False, cast=bool):
+    wsgi_app = "core.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "core.wsgi:application"
+
+
+def worker_exit(server, worker):
+    """บันทึก ActivationLog ที่ค้างอยู่ใน buffer ก่อน worker ปิดตัว"""
+    from license.logbuffer import flush_activation_logs
+
+    flush_activation_logs()
@@ -1,7 +1,15 @@
-from django.contrib import admin
-from django.utils.html import format_html
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 from django.utils import timezone
-from .models import SoftwareName, License, ActivationLog
+from django.utils.formats import date_format
+from django.utils.html import format_html
+from .models import SoftwareName, License, ActivationLog, BulkAction, ValidateRollup
+from .bulk import start_bulk_action
+from .changelist import ScalableAdminMixin
+from .search import search_licenses, search_activation_logs
 
 
 @admin.register(SoftwareName)
@@ -12,22 +20,37 @@ class SoftwareNameAdmin(admin.ModelAdmin):
     list_filter = ["is_active", "created_at"]
     search_fields = ["name", "description"]
     ordering = ["name"]
+    list_select_related = ["license_counter"]
 
     def license_count(self, obj):
-        """แสดงจำนวน License ของแต่ละซอฟต์แวร์"""
-        count = obj.licenses.count()
-        active_count = obj.licenses.filter(
-            is_active=True, expires_at__gt=timezone.now()
-        ).count()
+        """
+        แสดงจำนวน License ของแต่ละซอฟต์แวร์ (จาก LicenseCounter ไม่ต้อง COUNT ทีละแถว)
+        valid ไม่ลดลงเองเมื่อ License หมดอายุ จึงแสดงเวลาที่ reconcile ล่าสุดกำกับไว้
+        """
+        counter = getattr(obj, "license_counter", None)
+        valid = counter.valid if counter else 0
+        total = counter.total if counter else 0
+        if counter and counter.reconciled_at:
+            as_of = f"ณ {date_format(timezone.localtime(counter.reconciled_at), 'SHORT_DATETIME_FORMAT')}"
+        else:
+            as_of = "ยังไม่เคย reconcile"
         return format_html(
-            '<span style="color: green;">{}</span> / {}', active_count, count
+            '<span style="color: green;">{}</span> / {}<br><small>{}</small>', valid, total, as_of
         )
 
-    license_count.short_description = "Active / Total Licenses"
+    license_count.short_description = "Valid (ณ reconcile ล่าสุด) / Total Licenses"
+
+
+class LicenseActionForm(ActionForm):
+    """ฟอร์ม action ของ License (จำนวนวันใช้กับ "ต่ออายุ")"""
+
+    days = forms.IntegerField(
+        required=False, min_value=1, max_value=3650, label="จำนวนวัน"
+    )
 
 
 @admin.register(License)
-class LicenseAdmin(admin.ModelAdmin):
+class LicenseAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin interface สำหรับ License"""
 
     list_display = [
@@ -40,6 +63,8 @@ class LicenseAdmin(admin.ModelAdmin):
         "days_remaining_display",
     ]
     list_filter = ["software", "is_active", "activated_at", "expires_at"]
+    list_select_related = ["software"]
+    date_hierarchy = "created_at"
     search_fields = ["license_key", "customer_email", "machine_id", "mac_address"]
     readonly_fields = [
         "license_key",
@@ -70,6 +95,10 @@ class LicenseAdmin(admin.ModelAdmin):
     )
     ordering = ["-created_at"]
 
+    def get_search_results(self, request, queryset, search_term):
+        """ค้นหาแบบตรงตัวสำหรับ UUID/MAC และใช้ trigram index สำหรับคำค้นอื่น"""
+        return search_licenses(queryset, search_term), False
+
     def license_key_short(self, obj):
         """แสดง License Key แบบสั้น"""
         return f"{obj.license_key[:8]}...{obj.license_key[-4:]}"
@@ -123,25 +152,65 @@ class LicenseAdmin(admin.ModelAdmin):
 
     days_remaining_display.short_description = "เหลืออีก"
 
-    actions = ["activate_licenses", "deactivate_licenses"]
+    actions = ["activate_licenses", "deactivate_licenses", "extend_licenses"]
+    action_form = LicenseActionForm
+
+    def run_bulk_action(self, request, queryset, action, days=None):
+        """เริ่ม BulkAction (ทีละ chunk) แล้วแจ้งผลหรือลิงก์ดูความคืบหน้า"""
+        from .views import get_client_ip
+
+        job = start_bulk_action(
+            queryset,
+            action,
+            user=request.user,
+            ip_address=get_client_ip(request),
+            days=days,
+        )
+        url = reverse("admin:license_bulkaction_change", args=[job.pk])
+        if job.status == "done":
+            self.message_user(
+                request, f"{job.get_action_display()} {job.changed} License สำเร็จ"
+            )
+        elif job.status == "failed":
+            self.message_user(
+                request,
+                format_html('<a href="{}">{}</a> ล้มเหลว: {}', url, job, job.error),
+                messages.ERROR,
+            )
+        else:
+            self.message_user(
+                request,
+                format_html('เริ่ม <a href="{}">{}</a> แล้ว ดูความคืบหน้าได้ที่ลิงก์', url, job),
+            )
 
     def activate_licenses(self, request, queryset):
         """Action สำหรับเปิดใช้งาน License"""
-        updated = queryset.update(is_active=True)
-        self.message_user(request, f"เปิดใช้งาน {updated} License สำเร็จ")
+        self.run_bulk_action(request, queryset, "activate")
 
     activate_licenses.short_description = "เปิดใช้งาน License ที่เลือก"
 
     def deactivate_licenses(self, request, queryset):
-        """Action สำหรับปิดใช้งาน License"""
-        updated = queryset.update(is_active=False)
-        self.message_user(request, f"ปิดใช้งาน {updated} License สำเร็จ")
+        """Action สำหรับปิดใช้งาน License (บันทึก log revoke)"""
+        self.run_bulk_action(request, queryset, "deactivate")
 
     deactivate_licenses.short_description = "ปิดใช้งาน License ที่เลือก"
 
+    def extend_licenses(self, request, queryset):
+        """Action สำหรับต่ออายุ License ตามจำนวนวันที่ระบุ (บันทึก log renew)"""
+        try:
+            days = self.action_form.base_fields["days"].clean(request.POST.get("days"))
+        except ValidationError:
+            days = None
+        if not days:
+            self.message_user(request, "กรุณาระบุจำนวนวันที่ต้องการต่ออายุ (1-3650)", messages.ERROR)
+            return
+        self.run_bulk_action(request, queryset, "extend", days=days)
+
+    extend_licenses.short_description = "ต่ออายุ License ที่เลือก (ตามจำนวนวัน)"
+
 
 @admin.register(ActivationLog)
-class ActivationLogAdmin(admin.ModelAdmin):
+class ActivationLogAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin interface สำหรับ ActivationLog"""
 
     list_display = [
@@ -152,6 +221,8 @@ class ActivationLogAdmin(admin.ModelAdmin):
         "ip_address",
     ]
     list_filter = ["action", "success", "created_at"]
+    list_select_related = ["license__software"]
+    date_hierarchy = "created_at"
     search_fields = ["license__license_key", "license__customer_email", "ip_address"]
     readonly_fields = [
         "license",
@@ -164,6 +235,10 @@ class ActivationLogAdmin(admin.ModelAdmin):
     ]
     ordering = ["-created_at"]
 
+    def get_search_results(self, request, queryset, search_term):
+        """ค้นหาผ่าน License (license_id IN ...) หรือ IP Address แบบตรงตัว"""
+        return search_activation_logs(queryset, search_term), False
+
     def has_add_permission(self, request):
         """ไม่อนุญาตให้เพิ่ม Log ด้วยตนเอง"""
         return False
@@ -178,6 +253,12 @@ class ActivationLogAdmin(admin.ModelAdmin):
 
     license_info.short_description = "License"
 
+    def user_agent(self, obj):
+        """แสดงข้อความ User Agent (อ่านจาก cache ของ UserAgent)"""
+        return obj.user_agent
+
+    user_agent.short_description = "User Agent"
+
     def success_badge(self, obj):
         """แสดงสถานะความสำเร็จ"""
         if obj.success:
@@ -197,3 +278,93 @@ class ActivationLogAdmin(admin.ModelAdmin):
 admin.site.site_header = "License Management System"
 admin.site.site_title = "License Admin"
 admin.site.index_title = "จัดการระบบ License"
+
+
+@admin.register(ValidateRollup)
+class ValidateRollupAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """Admin interface สำหรับ ValidateRollup (validate ที่สำเร็จรายชั่วโมง)"""
+
+    list_display = [
+        "hour",
+        "license_info",
+        "count",
+        "distinct_ips",
+        "first_seen",
+        "last_seen",
+    ]
+    list_select_related = ["license__software"]
+    date_hierarchy = "hour"
+    readonly_fields = [
+        "license",
+        "hour",
+        "count",
+        "distinct_ips",
+        "ip_addresses",
+        "first_seen",
+        "last_seen",
+    ]
+    ordering = ["-hour"]
+
+    def has_add_permission(self, request):
+        """ไม่อนุญาตให้เพิ่มด้วยตนเอง"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """ไม่อนุญาตให้แก้ไข"""
+        return False
+
+    def license_info(self, obj):
+        """แสดงข้อมูล License"""
+        return f"{obj.license.software.name} - {obj.license.customer_email}"
+
+    license_info.short_description = "License"
+
+
+@admin.register(BulkAction)
+class BulkActionAdmin(admin.ModelAdmin):
+    """Admin interface สำหรับ BulkAction (ดูความคืบหน้าอย่างเดียว)"""
+
+    list_display = [
+        "id",
+        "action",
+        "days",
+        "status",
+        "progress",
+        "changed",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["action", "status"]
+    list_select_related = ["created_by"]
+    readonly_fields = [
+        "action",
+        "days",
+        "status",
+        "progress",
+        "changed",
+        "last_pk",
+        "error",
+        "created_by",
+        "ip_address",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    ]
+
+    def has_add_permission(self, request):
+        """ไม่อนุญาตให้สร้างงานด้วยตนเอง (สร้างจาก action ของ License)"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """ไม่อนุญาตให้แก้ไขงาน"""
+        return False
+
+    def progress(self, obj):
+        """แสดงความคืบหน้า"""
+        if not obj.total:
+            return f"{obj.processed}"
+        percent = obj.processed * 100 // obj.total
+        return format_html("{} / {} ({}%)", obj.processed, obj.total, percent)
+
+    progress.short_description = "ความคืบหน้า"
@@ -0,0 +1,317 @@
+"""
+Archive ActivationLog เก่าออกจาก database เป็นไฟล์บีบอัด แบ่งตามเดือน
+
+โครงสร้างไฟล์ (อ่านได้ด้วย DuckDB, Spark, pandas ฯลฯ แบบ hive partition)::
+
+    <root>/activation_logs/year=2025/month=01/part-<id แรก>-<id สุดท้าย>.jsonl.gz
+    <root>/activation_logs/year=2025/month=01/part-<id แรก>-<id สุดท้าย>.parquet
+
+- อ่าน log ทีละ chunk ตาม primary key แล้วเขียนลงไฟล์ของเดือนนั้น (เดือนตาม TIME_ZONE)
+- ตรวจจำนวนแถวในทุกไฟล์ที่เขียนแล้ว และเทียบกับจำนวนใน database
+- ลบ log ทีละชุดตาม id ที่อ่านกลับจากไฟล์ (ลบเฉพาะแถวที่อยู่ในไฟล์แล้วเท่านั้น)
+
+Parquet ต้องติดตั้ง pyarrow เพิ่ม (ไม่อยู่ใน requirements.txt)
+"""
+
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .exporter import ACTIVATION_LOG_COLUMNS, ACTIVATION_LOG_FIELDS, activation_log_rows
+from .models import ActivationLog
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = parquet = None
+
+FORMATS = ("jsonl", "parquet")
+
+EXTENSIONS = {
+    "jsonl": ".jsonl.gz",
+    "parquet": ".parquet",
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+ARCHIVE_DIR = "activation_logs"
+
+
+class ArchiveError(Exception):
+    """archive ไม่สมบูรณ์ (จำนวนแถวไม่ตรง ฯลฯ) จะไม่ลบข้อมูลใน database"""
+
+
+def parquet_available():
+    return parquet is not None
+
+
+def _month(created_at):
+    value = timezone.localtime(created_at)
+    return value.year, value.month
+
+
+def month_path(root, year, month):
+    return Path(root) / ARCHIVE_DIR / f"year={year}" / f"month={month:02d}"
+
+
+def _record(row):
+    record = dict(zip(ACTIVATION_LOG_FIELDS, row))
+    if record["ip_address"] is not None:
+        record["ip_address"] = str(record["ip_address"])
+    return record
+
+
+class JsonlWriter:
+    """เขียน log เป็น JSON ทีละบรรทัดในไฟล์ gzip"""
+
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.encoder = json.JSONEncoder(ensure_ascii=False)
+
+    def write(self, records):
+        for record in records:
+            record["created_at"] = record["created_at"].isoformat()
+            self.file.write(self.encoder.encode(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """เขียน log เป็น Parquet (zstd) ทีละ row group"""
+
+    def __init__(self, path):
+        self.schema = pyarrow.schema(
+            [
+                ("id", pyarrow.int64()),
+                ("license_id", pyarrow.int64()),
+                ("action", pyarrow.string()),
+                ("ip_address", pyarrow.string()),
+                ("user_agent", pyarrow.string()),
+                ("success", pyarrow.bool_()),
+                ("error_message", pyarrow.string()),
+                ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ]
+        )
+        self.writer = parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, records):
+        self.writer.write_table(pyarrow.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    "jsonl": JsonlWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def read_records(path):
+    """อ่าน log ทุกแถวจากไฟล์ archive (created_at เป็น datetime)"""
+    path = Path(path)
+    if path.name.endswith(EXTENSIONS["parquet"]):
+        if parquet is None:
+            raise ArchiveError(f"ต้องติดตั้ง pyarrow เพื่ออ่าน {path}")
+        for batch in parquet.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            record["created_at"] = parse_datetime(record["created_at"])
+            yield record
+
+
+def read_ids(path):
+    """อ่านเฉพาะ id จากไฟล์ archive"""
+    path = Path(path)
+    if path.name.endswith(EXTENSIONS["parquet"]):
+        for batch in parquet.ParquetFile(path).iter_batches(columns=["id"]):
+            yield from batch.column("id").to_pylist()
+        return
+    for record in read_records(path):
+        yield record["id"]
+
+
+def count_rows(path):
+    path = Path(path)
+    if path.name.endswith(EXTENSIONS["parquet"]):
+        return parquet.ParquetFile(path).metadata.num_rows
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return sum(1 for _ in file)
+
+
+@dataclass
+class ArchiveFile:
+    """ไฟล์ archive ของเดือนหนึ่งที่กำลังเขียน"""
+
+    directory: Path
+    fmt: str
+    writer: object = None
+    first_id: int = None
+    last_id: int = None
+    rows: int = 0
+    path: Path = None
+
+    @property
+    def tmp_path(self):
+        return self.directory / f".part-{self.first_id}.tmp"
+
+    def write(self, records):
+        if self.writer is None:
+            self.first_id = records[0]["id"]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.writer = WRITERS[self.fmt](self.tmp_path)
+        self.writer.write(records)
+        self.rows += len(records)
+        self.last_id = records[-1]["id"]
+
+    def finish(self):
+        self.writer.close()
+        self.path = self.directory / f"part-{self.first_id}-{self.last_id}{EXTENSIONS[self.fmt]}"
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def discard(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            finally:
+                self.tmp_path.unlink(missing_ok=True)
+
+
+@dataclass
+class ArchiveResult:
+    """ผลลัพธ์ของ archive_logs"""
+
+    files: list = field(default_factory=list)
+    rows: int = 0
+    deleted: int = 0
+
+
+def archive_logs(root, before, fmt="jsonl", chunk_size=DEFAULT_CHUNK_SIZE, delete=True):
+    """
+    Archive ActivationLog ที่ created_at < before ลงไฟล์ใต้ root
+    แล้วลบออกจาก database (ถ้า delete=True และตรวจจำนวนแถวผ่าน)
+    """
+    if fmt == "parquet" and parquet is None:
+        raise ArchiveError("ต้องติดตั้ง pyarrow เพื่อใช้ format parquet")
+
+    queryset = ActivationLog.objects.filter(created_at__lt=before)
+    result = ArchiveResult()
+    files = {}
+    last_pk = 0
+
+    try:
+        while True:
+            rows = list(
+                activation_log_rows(
+                    queryset.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list(*ACTIVATION_LOG_COLUMNS)[:chunk_size]
+                )
+            )
+            if not rows:
+                break
+
+            by_month = {}
+            for row in rows:
+                record = _record(row)
+                by_month.setdefault(_month(record["created_at"]), []).append(record)
+            for (year, month), records in by_month.items():
+                if (year, month) not in files:
+                    files[year, month] = ArchiveFile(month_path(root, year, month), fmt)
+                files[year, month].write(records)
+
+            last_pk = rows[-1][0]
+            result.rows += len(rows)
+
+        result.files = [archive.finish() for archive in files.values()]
+    except BaseException:
+        for archive in files.values():
+            if archive.path is None:
+                archive.discard()
+        raise
+
+    # ตรวจทุกไฟล์ก่อนลบข้อมูลใด ๆ
+    for archive in files.values():
+        written = count_rows(archive.path)
+        if written != archive.rows:
+            raise ArchiveError(f"{archive.path}: เขียน {archive.rows} แถว แต่อ่านได้ {written} แถว")
+    expected = queryset.filter(pk__lte=last_pk).count() if last_pk else 0
+    if expected != result.rows:
+        raise ArchiveError(f"database มี {expected} แถว แต่ archive ได้ {result.rows} แถว")
+
+    if delete:
+        for path in result.files:
+            result.deleted += _delete_archived(queryset, read_ids(path), chunk_size)
+    return result
+
+
+def _delete_archived(queryset, ids, chunk_size):
+    deleted = 0
+    batch = []
+    for pk in ids:
+        batch.append(pk)
+        if len(batch) >= chunk_size:
+            deleted += queryset.filter(pk__in=batch).delete()[0]
+            batch = []
+    if batch:
+        deleted += queryset.filter(pk__in=batch).delete()[0]
+    return deleted
+
+
+def archive_files(root, since=None, until=None):
+    """ไฟล์ archive ทั้งหมด (ข้ามเดือนที่อยู่นอกช่วง since/until) เรียงตามเดือนและ id"""
+    base = Path(root) / ARCHIVE_DIR
+    first = _month(since) if since else None
+    last = _month(until) if until else None
+
+    for year_dir in sorted(base.glob("year=*")):
+        for month_dir in sorted(year_dir.glob("month=*")):
+            month = (int(year_dir.name[5:]), int(month_dir.name[6:]))
+            if (first and month < first) or (last and month > last):
+                continue
+            paths = [
+                path
+                for path in month_dir.iterdir()
+                if path.name.startswith("part-") and path.name.endswith(tuple(EXTENSIONS.values()))
+            ]
+            yield from sorted(paths, key=lambda path: int(path.name.split("-")[1]))
+
+
+def scan_archive(root, license_id=None, action=None, since=None, until=None):
+    """
+    อ่าน log จากไฟล์ archive ตามเงื่อนไข โดยไม่ต้องนำกลับเข้า database
+    since/until เป็น datetime (since <= created_at < until)
+    """
+    for path in archive_files(root, since, until):
+        for record in read_records(path):
+            if license_id is not None and record["license_id"] != license_id:
+                continue
+            if action and record["action"] != action:
+                continue
+            created_at = record["created_at"]
+            if (since and created_at < since) or (until and created_at >= until):
+                continue
+            yield record
+
+
+def parse_date(value):
+    """แปลง YYYY-MM-DD หรือ ISO datetime เป็น datetime (เวลาเที่ยงคืนตาม TIME_ZONE)"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
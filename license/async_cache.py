@@ -0,0 +1,64 @@
+"""
+Async client สำหรับ cache ``default``
+
+ใน production (django_redis) จะคุยกับ Redis ผ่าน ``redis.asyncio`` โดยตรง
+และใช้ key/serializer ของ django_redis เพื่อให้ข้อมูลใช้ร่วมกับฝั่ง sync ได้
+backend อื่น (เช่น LocMemCache ตอน development) จะใช้ async API ของ Django แทน
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class AsyncCache:
+    """get/add/set/delete แบบ async บน cache ``default``"""
+
+    def __init__(self):
+        self._redis = None
+
+    def _native_client(self):
+        client = getattr(cache, "client", None)
+        if client is None or not hasattr(client, "encode"):
+            return None, None
+        if self._redis is None:
+            import redis.asyncio as aioredis
+
+            options = settings.CACHES["default"].get("OPTIONS", {})
+            pool_kwargs = options.get("CONNECTION_POOL_KWARGS", {})
+            self._redis = aioredis.from_url(
+                settings.CACHES["default"]["LOCATION"],
+                max_connections=pool_kwargs.get("max_connections"),
+                socket_connect_timeout=options.get("SOCKET_CONNECT_TIMEOUT"),
+                socket_timeout=options.get("SOCKET_TIMEOUT"),
+            )
+        return client, self._redis
+
+    async def get(self, key):
+        client, redis = self._native_client()
+        if redis is None:
+            return await cache.aget(key)
+        value = await redis.get(client.make_key(key))
+        return None if value is None else client.decode(value)
+
+    async def add(self, key, value, timeout):
+        client, redis = self._native_client()
+        if redis is None:
+            return await cache.aadd(key, value, timeout)
+        return bool(
+            await redis.set(client.make_key(key), client.encode(value), nx=True, ex=timeout)
+        )
+
+    async def set(self, key, value, timeout):
+        client, redis = self._native_client()
+        if redis is None:
+            return await cache.aset(key, value, timeout)
+        return bool(await redis.set(client.make_key(key), client.encode(value), ex=timeout))
+
+    async def delete(self, key):
+        client, redis = self._native_client()
+        if redis is None:
+            return await cache.adelete(key)
+        return bool(await redis.delete(client.make_key(key)))
+
+
+async_cache = AsyncCache()
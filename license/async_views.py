@@ -0,0 +1,217 @@
+"""
+Async views สำหรับ license API (ใช้เมื่อ LICENSE_ASYNC_API=True และรันผ่าน ASGI)
+
+ให้ผลลัพธ์เหมือน action ใน LicenseViewSet ทุกประการ แต่ไม่ผูก thread ไว้ระหว่างรอ
+Postgres หรือ Redis ทำให้ process เดียวรองรับการ validate พร้อมกันได้หลายร้อย request
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import serializers
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import aget_license_for_validate
+from .catalog import catalog
+from .idempotency import aidempotent
+from .logbuffer import alog_activation
+from .models import License
+from .permissions import is_valid_static_api_key
+from .serializers import (
+    ActivateLicenseSerializer,
+    ValidateLicenseSerializer,
+    RenewLicenseSerializer,
+)
+from .signing import aget_active_signing_key
+from .views import get_client_ip, activate_result, validate_result, renew_result
+
+
+def api_response(data, status=200):
+    """JsonResponse ที่ encode ข้อมูลแบบเดียวกับ DRF JSONRenderer"""
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=JSONEncoder,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def api_view(view):
+    """ตรวจสอบ API key และแปลง body เป็น dict ก่อนเรียก async view"""
+
+    @csrf_exempt
+    async def wrapper(request):
+        api_key = request.headers.get("X-API-TOKEN") or request.GET.get("token")
+        if not is_valid_static_api_key(api_key):
+            return api_response({"detail": str(NotAuthenticated.default_detail)}, 403)
+
+        data = {}
+        if request.method == "POST":
+            try:
+                data = json.loads(request.body or b"{}")
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return api_response(
+                    {"success": False, "message": "ข้อมูลไม่ถูกต้อง"}, 400
+                )
+
+        # โหลด catalog และ signing key ล่วงหน้า เพื่อให้โค้ด sync ที่ใช้ร่วมกับ
+        # LicenseViewSet (serializer, validate_result ฯลฯ) ไม่ต้องแตะ DB
+        await catalog.arefresh()
+        await aget_active_signing_key()
+        return await view(request, data)
+
+    return wrapper
+
+
+@require_POST
+@api_view
+@aidempotent("activate", api_response)
+async def activate(request, data):
+    """POST /api/licenses/activate/ (async)"""
+    serializer = ActivateLicenseSerializer(data=data)
+
+    if not serializer.is_valid():
+        return api_response(
+            {
+                "success": False,
+                "message": "ข้อมูลไม่ถูกต้อง",
+                "errors": serializer.errors,
+            },
+            400,
+        )
+
+    validated_data = serializer.validated_data
+    license = None
+    try:
+        license, created = await sync_to_async(License.objects.upsert_activation)(
+            **validated_data
+        )
+        action_type = "activate" if created else "renew"
+
+        await alog_activation(
+            license=license,
+            action=action_type,
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            success=True,
+        )
+
+        return api_response(activate_result(license), 201)
+
+    except Exception as e:
+        if license is not None and license.pk:
+            await alog_activation(
+                license=license,
+                action="activate",
+                ip_address=get_client_ip(request),
+                success=False,
+                error_message=str(e),
+            )
+
+        return api_response({"success": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"}, 500)
+
+
+@require_POST
+@api_view
+async def validate(request, data):
+    """POST /api/licenses/validate/ (async)"""
+    serializer = ValidateLicenseSerializer(data=data)
+
+    if not serializer.is_valid():
+        return api_response(
+            {
+                "success": False,
+                "valid": False,
+                "message": "ข้อมูลไม่ถูกต้อง",
+                "errors": serializer.errors,
+            },
+            400,
+        )
+
+    try:
+        license = await aget_license_for_validate(
+            serializer.validated_data["machine_id"],
+            serializer.validated_data["mac_address"],
+            serializer.validated_data["software_name"],
+        )
+
+        await alog_activation(
+            license=license,
+            action="validate",
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            success=not license.is_expired(),
+        )
+
+        return api_response(validate_result(license))
+
+    except License.DoesNotExist:
+        return api_response(validate_result(None))
+    except Exception as e:
+        return api_response(
+            {"success": False, "valid": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
+            500,
+        )
+
+
+@require_POST
+@api_view
+@aidempotent("renew", api_response)
+async def renew(request, data):
+    """
+    POST /api/licenses/renew/ (async)
+    UPDATE ... RETURNING ของ License.objects.renew ทำงานใน thread แยก
+    """
+    serializer = RenewLicenseSerializer(data=data)
+
+    if not serializer.is_valid():
+        return api_response(
+            {
+                "success": False,
+                "message": "ข้อมูลไม่ถูกต้อง",
+                "errors": serializer.errors,
+            },
+            400,
+        )
+
+    try:
+        license = await sync_to_async(serializer.save)()
+
+        await alog_activation(
+            license=license,
+            action="renew",
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            success=True,
+        )
+
+        return api_response(renew_result(license))
+
+    except serializers.ValidationError as e:
+        return api_response(
+            {
+                "success": False,
+                "message": "ข้อมูลไม่ถูกต้อง",
+                "errors": e.detail,
+            },
+            400,
+        )
+    except Exception as e:
+        return api_response({"success": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"}, 500)
+
+
+@csrf_exempt
+async def health_check(request):
+    """Health check endpoint for monitoring (async)"""
+    _ = request  # Acknowledge request parameter
+    return JsonResponse({
+        'status': 'healthy',
+        'environment': 'development' if settings.DEBUG else 'production'
+    })
@@ -0,0 +1,271 @@
+"""
+Bulk action ของ admin สำหรับ License จำนวนมาก (เปิด/ปิดใช้งาน, ต่ออายุ N วัน)
+
+แต่ละงานถูกบันทึกเป็น BulkAction แล้วทำทีละ chunk ตาม primary key
+(LICENSE_BULK_ACTION_CHUNK_SIZE แถวต่อ transaction) ทำให้ lock แถวไว้ไม่นาน
+ทุก chunk จะ:
+
+- ล้าง cache ของ validate และสถิติของ License ใน chunk
+- UPDATE เฉพาะแถวที่ต้องเปลี่ยน และบันทึก ActivationLog (revoke/renew) ด้วย bulk insert
+- บันทึกความคืบหน้าลง BulkAction (ดูได้ใน admin)
+
+งานที่เลือกไม่เกิน 1 chunk ทำทันทีใน request งานที่ใหญ่กว่านั้นทำใน thread เบื้องหลัง
+ของ worker (ไม่ติด timeout ของ nginx) ถ้า worker ถูก restart ระหว่างทำ งานจะค้างสถานะ
+"กำลังดำเนินการ" ไว้ที่ last_pk ล่าสุด แถวก่อนหน้านั้นถูก commit ครบแล้ว
+``manage.py resume_bulk_actions`` ทำงานที่ค้างต่อจาก last_pk (หรือปิดเป็นล้มเหลวด้วย --fail)
+"""
+
+import logging
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .cache import invalidate_queryset
+from .models import ActivationLog, BulkAction, License
+
+logger = logging.getLogger(__name__)
+
+# User Agent ของ ActivationLog ที่ bulk action สร้าง (ค่าเดียวกันทุกงาน ไม่สร้าง UserAgent ใหม่ต่องาน)
+USER_AGENT = "admin bulk action"
+
+
+def _activate(licenses, job, now):
+    return licenses.filter(is_active=False), {"is_active": True}, None
+
+
+def _deactivate(licenses, job, now):
+    return licenses.filter(is_active=True), {"is_active": False}, "revoke"
+
+
+def _extend(licenses, job, now):
+    # เหมือน LicenseManager.renew: License ที่หมดอายุแล้วเริ่มนับใหม่จากวันนี้
+    values = {
+        "activated_at": Case(
+            When(expires_at__lt=now, then=Value(now)),
+            default=F("activated_at"),
+        ),
+        "expires_at": Greatest(Coalesce(F("expires_at"), Value(now)), Value(now))
+        + Value(timedelta(days=job.days)),
+    }
+    return licenses, values, "renew"
+
+
+# การกระทำ -> ฟังก์ชัน(License ใน chunk, job, now) คืนค่า (แถวที่ต้องเปลี่ยน, ค่าใหม่, action ของ log)
+OPERATIONS = {
+    "activate": _activate,
+    "deactivate": _deactivate,
+    "extend": _extend,
+}
+
+
+def _process_chunk(job, ids):
+    """ทำ chunk เดียวใน transaction เดียว คืนค่าจำนวนแถวที่เปลี่ยน"""
+    now = timezone.now()
+    with transaction.atomic():
+        licenses, values, log_action = OPERATIONS[job.action](
+            License.objects.filter(pk__in=ids), job, now
+        )
+        changed = list(
+            licenses.select_for_update().order_by("pk").values_list("pk", flat=True)
+        )
+        if not changed:
+            return 0
+
+        licenses = License.objects.filter(pk__in=changed)
+        invalidate_queryset(licenses)
+        licenses.update(updated_at=now, **values)
+
+        if log_action:
+            ActivationLog.objects.bulk_create(
+                [
+                    ActivationLog(
+                        license_id=pk,
+                        action=log_action,
+                        ip_address=job.ip_address,
+                        user_agent=USER_AGENT,
+                        success=True,
+                        created_at=now,
+                    )
+                    for pk in changed
+                ]
+            )
+    return len(changed)
+
+
+class JobTaken(Exception):
+    """งานถูก worker อื่นรับไปทำแล้ว (updated_at ไม่ตรงกับที่ worker นี้บันทึกไว้)"""
+
+
+def _save(job, fields):
+    """
+    บันทึก fields ของ job เฉพาะเมื่อ worker นี้ยังเป็นเจ้าของงาน
+    updated_at ใช้เป็น token: ทุกครั้งที่บันทึกจะเปลี่ยนค่า worker อื่นที่ถือค่าเดิมจึงบันทึกไม่ได้
+    """
+    now = timezone.now()
+    saved = BulkAction.objects.filter(pk=job.pk, updated_at=job.updated_at).update(
+        updated_at=now, **{name: getattr(job, name) for name in fields}
+    )
+    if not saved:
+        raise JobTaken
+    job.updated_at = now
+
+
+def _claim(job):
+    """รับงานมาทำ (compare-and-set บน updated_at) คืนค่า False ถ้า worker อื่นรับไปแล้ว"""
+    try:
+        _save(job, [])
+    except JobTaken:
+        return False
+    return True
+
+
+def run_bulk_action(job, queryset):
+    """ทำ BulkAction กับ License ใน queryset ทีละ chunk จนจบ (หยุดถ้างานถูก worker อื่นรับไป)"""
+    chunk_size = settings.LICENSE_BULK_ACTION_CHUNK_SIZE
+    selection = queryset.order_by().values_list("pk", flat=True)
+
+    try:
+        if job.total is None:
+            job.total = selection.count()
+        job.status = "running"
+        _save(job, ["total", "status"])
+
+        while True:
+            with transaction.atomic():
+                # lock งานระหว่างทำ chunk และเริ่มจาก last_pk ใน database เสมอ
+                last_pk = (
+                    BulkAction.objects.select_for_update()
+                    .filter(pk=job.pk, updated_at=job.updated_at)
+                    .values_list("last_pk", flat=True)
+                    .first()
+                )
+                if last_pk is None:
+                    raise JobTaken
+                ids = list(selection.filter(pk__gt=last_pk).order_by("pk")[:chunk_size])
+                if not ids:
+                    break
+                job.changed += _process_chunk(job, ids)
+                job.processed += len(ids)
+                job.last_pk = ids[-1]
+                _save(job, ["processed", "changed", "last_pk"])
+
+        job.status = "done"
+    except JobTaken:
+        logger.info("Bulk action #%s was taken over by another worker", job.pk)
+        return job
+    except Exception as exc:
+        logger.exception("Bulk action #%s failed", job.pk)
+        job.status = "failed"
+        job.error = str(exc)
+
+    job.finished_at = timezone.now()
+    try:
+        _save(job, ["status", "error", "finished_at"])
+    except JobTaken:
+        logger.info("Bulk action #%s was taken over by another worker", job.pk)
+    return job
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # สร้าง executor ใหม่หลัง fork (gunicorn สร้าง worker ด้วย fork)
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="license-bulk-action")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run_in_background(job, queryset):
+    close_old_connections()
+    try:
+        # งานที่รอคิวนานอาจถูก resume_bulk_actions รับไปทำแล้ว
+        if _claim(job):
+            run_bulk_action(job, queryset)
+    finally:
+        connection.close()
+
+
+def start_bulk_action(queryset, action, user=None, ip_address=None, days=None):
+    """
+    สร้าง BulkAction สำหรับ License ใน queryset แล้วเริ่มทำงาน
+    คืนค่า BulkAction (status เป็น done/failed ถ้าทำเสร็จใน request)
+    """
+    job = BulkAction.objects.create(
+        action=action,
+        days=days,
+        selection=pickle.dumps(queryset.query),
+        created_by=user if user and user.is_authenticated else None,
+        ip_address=ip_address,
+    )
+
+    chunk_size = settings.LICENSE_BULK_ACTION_CHUNK_SIZE
+    if queryset.order_by()[: chunk_size + 1].count() <= chunk_size:
+        return run_bulk_action(job, queryset)
+
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_background, job, queryset))
+    return job
+
+
+def stale_bulk_actions(stale_after):
+    """งานที่ยังไม่จบและไม่มีความคืบหน้าเกิน stale_after (timedelta) เช่น worker ถูก restart"""
+    return BulkAction.objects.filter(
+        status__in=["pending", "running"],
+        updated_at__lt=timezone.now() - stale_after,
+    ).order_by("pk")
+
+
+def _fail(job, error):
+    job.status = "failed"
+    job.error = error
+    job.finished_at = timezone.now()
+    _save(job, ["status", "error", "finished_at"])
+    return job
+
+
+def resume_bulk_action(job):
+    """ทำงานที่ค้างต่อจาก last_pk คืนค่า BulkAction (ล้มเหลวถ้าอ่าน selection ไม่ได้)"""
+    if job.selection is None:
+        return _fail(job, f"ทำต่อไม่ได้ (ไม่มีรายการ License ที่เลือก) ค้างที่ PK {job.last_pk}")
+    try:
+        query = pickle.loads(job.selection)
+    except Exception as exc:
+        # pickle ของ Query อาจอ่านไม่ได้หลังอัพเกรด Django
+        return _fail(
+            job, f"ทำต่อไม่ได้ (อ่านรายการ License ที่เลือกไม่ได้: {exc}) ค้างที่ PK {job.last_pk}"
+        )
+    queryset = License.objects.all()
+    queryset.query = query
+    return run_bulk_action(job, queryset)
+
+
+def recover_bulk_actions(stale_after, fail=False):
+    """
+    ทำงานที่ค้าง (ดู stale_bulk_actions) ต่อจนจบ หรือปิดเป็นล้มเหลวถ้า fail=True
+    คืนค่ารายการ BulkAction ที่จัดการ
+    """
+    jobs = []
+    for job in stale_bulk_actions(stale_after):
+        if not _claim(job):
+            continue
+        try:
+            if fail:
+                jobs.append(_fail(job, f"worker หยุดระหว่างทำงาน ค้างที่ PK {job.last_pk}"))
+            else:
+                jobs.append(resume_bulk_action(job))
+        except JobTaken:
+            continue
+    return jobs
@@ -0,0 +1,222 @@
+"""
+Read-through cache สำหรับ POST /api/licenses/validate/
+
+เก็บ snapshot ของ License ตาม (machine_id, mac_address, software_name)
+ไว้ใน cache ``default`` (django_redis ใน production) และล้าง cache ทุกครั้ง
+ที่ License ถูกแก้ไข
+"""
+
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import SoftwareName, License
+from .utils import license_fingerprint
+from .catalog import get_software_by_name, aget_software_by_name, get_software_name
+from .async_cache import async_cache
+from .stats import invalidate_license_stats
+
+KEY_PREFIX = "validate:v2"
+
+# ค่าพิเศษที่เก็บใน cache
+MISSING = "__missing__"
+TOMBSTONE = "__tombstone__"
+
+# เวลาที่ tombstone อยู่ใน cache หลังการแก้ไข License
+# ต้องนานกว่าเวลาที่ใช้โหลดข้อมูลจาก DB หนึ่งครั้ง เพื่อกันไม่ให้ข้อมูลเก่าถูกเขียนทับกลับ
+TOMBSTONE_TIMEOUT = 10
+
+# เวลาสูงสุดที่ request อื่นจะรอ request ที่กำลังโหลด key เดียวกัน
+LOCK_TIMEOUT = 5
+LOCK_POLL_INTERVAL = 0.05
+LOCK_WAIT = 1.0
+
+
+def validate_cache_key(machine_id, mac_address, software_name):
+    """สร้าง cache key จาก (machine_id, mac_address, software_name)"""
+    raw = "\x1f".join([machine_id, mac_address, software_name])
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{digest}"
+
+
+def _snapshot(license, software):
+    """แปลง License เป็น dict ที่เก็บใน cache ได้"""
+    return {
+        "id": license.id,
+        "license_key": str(license.license_key),
+        "machine_id": license.machine_id,
+        "mac_address": license.mac_address,
+        "software_id": license.software_id,
+        "software_name": software.name,
+        "customer_email": license.customer_email,
+        "expires_at": license.expires_at.isoformat() if license.expires_at else None,
+        "is_active": license.is_active,
+    }
+
+
+def _from_snapshot(data):
+    """สร้าง License (ไม่บันทึกลง DB) จาก snapshot ใน cache"""
+    return License(
+        id=data["id"],
+        license_key=data["license_key"],
+        machine_id=data["machine_id"],
+        mac_address=data["mac_address"],
+        software=SoftwareName(id=data["software_id"], name=data["software_name"]),
+        customer_email=data["customer_email"],
+        expires_at=parse_datetime(data["expires_at"]) if data["expires_at"] else None,
+        is_active=data["is_active"],
+    )
+
+
+def _timeout_for(data):
+    """TTL ของ entry ต้องไม่เกินเวลาหมดอายุของ License"""
+    timeout = settings.LICENSE_VALIDATE_CACHE_TIMEOUT
+    if data == MISSING or not data["expires_at"]:
+        return timeout
+
+    remaining = (parse_datetime(data["expires_at"]) - timezone.now()).total_seconds()
+    if remaining > 0:
+        return max(1, min(timeout, int(remaining)))
+    # License หมดอายุแล้ว จะเปลี่ยนสถานะได้ก็ต่อเมื่อถูกแก้ไข ซึ่งจะล้าง cache อยู่แล้ว
+    return timeout
+
+
+def _load(machine_id, mac_address, software_name):
+    """ค้นหา License จาก DB แล้วแปลงเป็น snapshot"""
+    software = get_software_by_name(software_name)
+    if software is None:
+        return MISSING
+
+    try:
+        license = License.objects.get(
+            fingerprint=license_fingerprint(machine_id, mac_address, software.id),
+            is_active=True,
+        )
+    except License.DoesNotExist:
+        return MISSING
+    return _snapshot(license, software)
+
+
+def get_license_for_validate(machine_id, mac_address, software_name):
+    """
+    ดึง License สำหรับ validate ผ่าน cache
+    คืนค่า License (ไม่ผูกกับ DB) หรือ raise License.DoesNotExist
+
+    ถ้ามีหลาย request พลาด cache ของ key เดียวกันพร้อมกัน
+    จะมีเพียง request เดียวที่ query DB ส่วนที่เหลือรอผลจาก cache
+    """
+    key = validate_cache_key(machine_id, mac_address, software_name)
+    data = cache.get(key)
+
+    if data is None:
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, LOCK_TIMEOUT):
+            try:
+                data = _load(machine_id, mac_address, software_name)
+                # ใช้ add เพื่อไม่ให้เขียนทับ tombstone ที่ถูกตั้งระหว่างโหลด
+                cache.add(key, data, _timeout_for(data))
+            finally:
+                cache.delete(lock_key)
+        else:
+            deadline = time.monotonic() + LOCK_WAIT
+            while data is None and time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                data = cache.get(key)
+
+    if data is None or data == TOMBSTONE:
+        # ข้อมูลเพิ่งถูกแก้ไขหรือรอนานเกินไป ให้อ่านจาก DB โดยตรง
+        data = _load(machine_id, mac_address, software_name)
+
+    if data == MISSING:
+        raise License.DoesNotExist
+    return _from_snapshot(data)
+
+
+async def _aload(machine_id, mac_address, software_name):
+    """เหมือน _load แต่ใช้ async ORM"""
+    software = await aget_software_by_name(software_name)
+    if software is None:
+        return MISSING
+
+    try:
+        license = await License.objects.aget(
+            fingerprint=license_fingerprint(machine_id, mac_address, software.id),
+            is_active=True,
+        )
+    except License.DoesNotExist:
+        return MISSING
+    return _snapshot(license, software)
+
+
+async def aget_license_for_validate(machine_id, mac_address, software_name):
+    """get_license_for_validate แบบ async (ใช้กับ ASGI worker)"""
+    key = validate_cache_key(machine_id, mac_address, software_name)
+    data = await async_cache.get(key)
+
+    if data is None:
+        lock_key = f"{key}:lock"
+        if await async_cache.add(lock_key, 1, LOCK_TIMEOUT):
+            try:
+                data = await _aload(machine_id, mac_address, software_name)
+                await async_cache.add(key, data, _timeout_for(data))
+            finally:
+                await async_cache.delete(lock_key)
+        else:
+            deadline = time.monotonic() + LOCK_WAIT
+            while data is None and time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                data = await async_cache.get(key)
+
+    if data is None or data == TOMBSTONE:
+        data = await _aload(machine_id, mac_address, software_name)
+
+    if data == MISSING:
+        raise License.DoesNotExist
+    return _from_snapshot(data)
+
+
+def _tombstone(keys):
+    if keys:
+        cache.set_many({key: TOMBSTONE for key in keys}, TOMBSTONE_TIMEOUT)
+
+
+def invalidate_keys(keys):
+    """ล้าง cache ทันที และอีกครั้งหลัง transaction commit"""
+    keys = list(keys)
+    if not keys:
+        return
+    _tombstone(keys)
+    transaction.on_commit(lambda: _tombstone(keys))
+    # การแก้ไข License ทุกรูปแบบผ่านฟังก์ชันนี้ จึงล้างสถิติไปพร้อมกัน
+    invalidate_license_stats()
+
+
+def invalidate_license(license):
+    """ล้าง cache ของ License หนึ่งรายการ"""
+    invalidate_keys(
+        [
+            validate_cache_key(
+                license.machine_id,
+                license.mac_address,
+                get_software_name(license.software_id),
+            )
+        ]
+    )
+
+
+def invalidate_queryset(queryset, chunk_size=1000):
+    """ล้าง cache ของ License ทั้งหมดใน queryset (ใช้ก่อน queryset.update)"""
+    rows = queryset.values_list("machine_id", "mac_address", "software__name")
+    keys = []
+    for machine_id, mac_address, software_name in rows.iterator(chunk_size=chunk_size):
+        keys.append(validate_cache_key(machine_id, mac_address, software_name))
+        if len(keys) >= chunk_size:
+            invalidate_keys(keys)
+            keys = []
+    invalidate_keys(keys)
@@ -0,0 +1,120 @@
+"""
+Catalog ของ SoftwareName ในหน่วยความจำของแต่ละ worker
+
+SoftwareName มีจำนวนน้อยและแทบไม่เปลี่ยนแปลง จึงโหลดทั้งตารางมาเก็บไว้
+แล้วตรวจสอบ version key ใน cache ``default`` (Redis ใช้ร่วมกันทุก worker/host)
+ไม่เกินทุก SOFTWARE_CATALOG_CHECK_INTERVAL วินาที
+เมื่อ SoftwareName ถูกบันทึกหรือลบ version จะถูกเปลี่ยนและทุก worker จะโหลดใหม่
+
+instance ที่ได้จาก catalog ถูกใช้ร่วมกันทุก request ห้ามแก้ไข
+"""
+
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .utils import in_event_loop
+
+VERSION_KEY = "software_catalog:version"
+
+
+class SoftwareCatalog:
+    """name ↔ id ของ SoftwareName ทั้งหมด"""
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _load(self, version):
+        from .models import SoftwareName
+
+        software = list(SoftwareName.objects.all())
+        self._by_id = {item.id: item for item in software}
+        self._by_name = {item.name: item for item in software}
+        self._version = version
+
+    def _refresh_due(self):
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= settings.SOFTWARE_CATALOG_CHECK_INTERVAL
+        )
+
+    def _refresh(self):
+        if not self._refresh_due():
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            version = cache.get(VERSION_KEY)
+            if version is None:
+                version = uuid.uuid4().hex
+                if not cache.add(VERSION_KEY, version, None):
+                    version = cache.get(VERSION_KEY)
+            if version != self._version:
+                self._load(version)
+            self._checked_at = now
+
+    def _lookup(self, index, key):
+        # ใน event loop ห้าม query DB: ใช้ข้อมูลที่ arefresh() โหลดไว้ตอนต้น request
+        if not in_event_loop():
+            self._refresh()
+        return getattr(self, index).get(key)
+
+    def get(self, software_id):
+        """คืนค่า SoftwareName ตาม id หรือ None"""
+        return self._lookup("_by_id", software_id)
+
+    def get_by_name(self, name):
+        """คืนค่า SoftwareName ตามชื่อ หรือ None"""
+        return self._lookup("_by_name", name)
+
+    async def arefresh(self):
+        """ตรวจสอบ version (และโหลดใหม่ถ้าจำเป็น) โดยไม่ block event loop"""
+        if self._refresh_due():
+            await sync_to_async(self._refresh)()
+
+    def clear(self):
+        """ให้ worker นี้โหลด catalog ใหม่ในการใช้งานครั้งถัดไป"""
+        self._checked_at = None
+        self._version = None
+
+
+catalog = SoftwareCatalog()
+
+
+def get_software(software_id):
+    return catalog.get(software_id)
+
+
+def get_software_by_name(name):
+    return catalog.get_by_name(name)
+
+
+async def aget_software_by_name(name):
+    await catalog.arefresh()
+    return catalog._by_name.get(name)
+
+
+def get_software_name(software_id):
+    """ชื่อซอฟต์แวร์ตาม id (ไม่ query DB)"""
+    software = catalog.get(software_id)
+    return software.name if software is not None else None
+
+
+def invalidate_catalog():
+    """เปลี่ยน version เพื่อให้ทุก worker โหลด catalog ใหม่ (เรียกเมื่อ SoftwareName เปลี่ยน)"""
+
+    def bump():
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        catalog.clear()
+
+    bump()
+    transaction.on_commit(bump)
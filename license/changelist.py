@@ -0,0 +1,103 @@
+"""
+Changelist ของ Django admin สำหรับตารางขนาดใหญ่ (License, ActivationLog)
+
+- จำนวนแถวใช้ EstimatedCountPaginator (reltuples หรือนับไม่เกิน count_limit)
+  และไม่ COUNT(*) ซ้ำเพื่อแสดง "ทั้งหมด" (show_full_result_count = False)
+  ถ้านับถึงเพดานจะแสดงเป็น "10000+" และหน้าสุดท้ายในรายการเลื่อนต่อได้เรื่อย ๆ
+- ไม่คำนวณ facet ของ list_filter
+- date_hierarchy สร้างรายการปี/เดือน/วันจาก MIN/MAX ของคอลัมน์ (ใช้ index)
+  แทน SELECT DISTINCT date_trunc(...) ที่ต้อง scan ทุกแถว ช่วงที่ไม่มีข้อมูลจะยังแสดงอยู่
+"""
+
+from datetime import timedelta
+from functools import cache
+
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .pagination import EstimatedCountPaginator
+
+
+def _truncate(value, kind):
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind in ("year", "month"):
+        value = value.replace(day=1)
+    if kind == "year":
+        value = value.replace(month=1)
+    return value
+
+
+def _next(value, kind):
+    if kind == "year":
+        return value.replace(year=value.year + 1)
+    if kind == "month":
+        if value.month == 12:
+            return value.replace(year=value.year + 1, month=1)
+        return value.replace(month=value.month + 1)
+    return value + timedelta(days=1)
+
+
+def date_periods(queryset, field_name, kind):
+    """ทุกช่วงเวลา (year/month/day) ตั้งแต่ค่าน้อยสุดถึงมากสุดของ field_name ใน queryset"""
+    bounds = queryset.order_by().aggregate(first=Min(field_name), last=Max(field_name))
+    if bounds["first"] is None:
+        return []
+
+    first, last = bounds["first"], bounds["last"]
+    if timezone.is_aware(first):
+        first, last = timezone.localtime(first), timezone.localtime(last)
+
+    periods = []
+    current = _truncate(first, kind)
+    while current <= last:
+        periods.append(current)
+        current = _next(current, kind)
+    return periods
+
+
+class PeriodQuerySetMixin:
+    """แทน dates()/datetimes() ที่ date_hierarchy เรียก ด้วย date_periods()"""
+
+    def dates(self, field_name, kind, order="ASC"):
+        return [period.date() for period in self.datetimes(field_name, kind, order)]
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        periods = date_periods(self, field_name, kind)
+        return periods if order == "ASC" else periods[::-1]
+
+
+@cache
+def _period_queryset_class(queryset_class):
+    return type(f"Period{queryset_class.__name__}", (PeriodQuerySetMixin, queryset_class), {})
+
+
+class ScalableChangeList(ChangeList):
+    """ChangeList ที่ queryset ใช้ PeriodQuerySetMixin สำหรับ date_hierarchy"""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.date_hierarchy and not isinstance(queryset, PeriodQuerySetMixin):
+            queryset.__class__ = _period_queryset_class(type(queryset))
+        return queryset
+
+
+class ScalableAdminMixin:
+    """Mixin สำหรับ ModelAdmin ของตารางขนาดใหญ่ (ใช้คู่กับ list_select_related)"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page_number = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            page_number = 1
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, page_number=page_number
+        )
@@ -0,0 +1,59 @@
+"""
+ตรวจสอบและแก้ไข LicenseCounter ให้ตรงกับตาราง License
+
+counter ถูกปรับด้วย trigger ทุกครั้งที่ License ถูกเขียน แต่ ``valid`` จะไม่ลดลงเอง
+เมื่อ License หมดอายุโดยไม่มีการเขียน จึงต้องรัน reconcile เป็นระยะ
+(``python manage.py reconcile_license_counters`` เช่นทุกชั่วโมงผ่าน cron)
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import License, LicenseCounter
+
+FIELDS = ["total", "active", "valid"]
+
+
+def reconcile_license_counters():
+    """
+    นับใหม่ด้วย aggregate query เดียวแล้วเขียนทับ counter ทุกแถว
+    คืนค่าจำนวนซอฟต์แวร์ที่ counter ไม่ตรง (ก่อนแก้ไข)
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        # lock counter ไว้ไม่ให้ trigger ปรับค่าระหว่างนับ
+        current = {
+            counter.software_id: counter
+            for counter in LicenseCounter.objects.select_for_update()
+        }
+
+        rows = (
+            License.objects.order_by()
+            .values("software_id")
+            .annotate(
+                total=Count("id"),
+                active=Count("id", filter=Q(is_active=True)),
+                valid=Count("id", filter=Q(is_active=True, expires_at__gt=now)),
+            )
+        )
+        counters = {row["software_id"]: row for row in rows}
+
+        # ซอฟต์แวร์ที่ไม่มี License เหลืออยู่แล้ว
+        for software_id in current.keys() - counters.keys():
+            counters[software_id] = {"software_id": software_id, **dict.fromkeys(FIELDS, 0)}
+
+        changed = sum(
+            1
+            for software_id, row in counters.items()
+            if software_id not in current
+            or any(getattr(current[software_id], field) != row[field] for field in FIELDS)
+        )
+
+        LicenseCounter.objects.bulk_create(
+            [LicenseCounter(reconciled_at=now, **row) for row in counters.values()],
+            update_conflicts=True,
+            unique_fields=["software"],
+            update_fields=[*FIELDS, "reconciled_at"],
+        )
+    return changed
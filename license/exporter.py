@@ -0,0 +1,170 @@
+"""
+Export License และ ActivationLog ทั้งตารางเป็น NDJSON หรือ CSV
+
+อ่านข้อมูลด้วย ``values_list().iterator(chunk_size)`` (server-side cursor บน PostgreSQL)
+และส่งออกทีละก้อน ทำให้หน่วยความจำคงที่และเริ่มส่งข้อมูลได้ทันทีไม่ว่าตารางจะใหญ่แค่ไหน
+ใช้ได้ทั้งจาก GET /api/licenses/export/, GET /api/logs/export/ และ ``manage.py export_data``
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from django.utils import timezone
+
+from .catalog import get_software_name
+from .useragents import resolve_user_agents
+
+FORMATS = ("ndjson", "csv")
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# ขนาดโดยประมาณ (ตัวอักษร) ของแต่ละก้อนที่ส่งออก
+BUFFER_SIZE = 64 * 1024
+
+DEFAULT_CHUNK_SIZE = 2000
+
+LICENSE_FIELDS = [
+    "id",
+    "license_key",
+    "software_id",
+    "customer_email",
+    "machine_id",
+    "mac_address",
+    "duration_days",
+    "activated_at",
+    "expires_at",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "notes",
+]
+
+ACTIVATION_LOG_FIELDS = [
+    "id",
+    "license_id",
+    "action",
+    "ip_address",
+    "user_agent",
+    "success",
+    "error_message",
+    "created_at",
+]
+
+# user_agent เก็บเป็น agent_id อ่านข้อความจาก cache ของ UserAgent (ไม่ต้อง JOIN)
+ACTIVATION_LOG_COLUMNS = [
+    "agent_id" if field == "user_agent" else field for field in ACTIVATION_LOG_FIELDS
+]
+USER_AGENT_INDEX = ACTIVATION_LOG_FIELDS.index("user_agent")
+
+
+class Export:
+    """คอลัมน์และแถวของข้อมูลที่จะ export"""
+
+    def __init__(self, name, columns, rows):
+        self.name = name
+        self.columns = columns
+        self.rows = rows
+
+    def filename(self, fmt, compress=False):
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        return f"{self.name}-{stamp}.{fmt}" + (".gz" if compress else "")
+
+
+def license_export(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export ของ License (software_name มาจาก catalog ไม่ต้อง JOIN)"""
+    columns = LICENSE_FIELDS[:3] + ["software_name"] + LICENSE_FIELDS[3:]
+
+    def rows():
+        for row in queryset.values_list(*LICENSE_FIELDS).iterator(chunk_size=chunk_size):
+            yield row[:3] + (get_software_name(row[2]),) + row[3:]
+
+    return Export("licenses", columns, rows())
+
+
+def activation_log_export(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export ของ ActivationLog"""
+    rows = queryset.values_list(*ACTIVATION_LOG_COLUMNS).iterator(chunk_size=chunk_size)
+    rows = activation_log_rows(rows)
+    return Export("activation_logs", ACTIVATION_LOG_FIELDS, rows)
+
+
+def activation_log_rows(rows):
+    """แถวของ values_list(*ACTIVATION_LOG_COLUMNS) ที่มีข้อความ user_agent แทน agent_id"""
+    return resolve_user_agents(rows, USER_AGENT_INDEX)
+
+
+def _format_value(value):
+    # datetime แบบเต็มความละเอียด (DjangoJSONEncoder ตัดเหลือ millisecond)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    value = _format_value(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def _ndjson_lines(export):
+    encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+    for row in export.rows:
+        yield encoder.encode(dict(zip(export.columns, row))) + "\n"
+
+
+def _csv_chunks(export):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(export.columns)
+    for row in export.rows:
+        writer.writerow([_format_value(value) for value in row])
+        # ส่งออกเป็นก้อนขนาด BUFFER_SIZE แทนการส่งทีละแถว
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _batched(lines):
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(export, fmt, compress=False):
+    """
+    yield bytes ของไฟล์ export ทีละก้อน
+    compress=True ส่งออกเป็นไฟล์ gzip
+    """
+    if fmt == "csv":
+        chunks = _csv_chunks(export)
+    else:
+        chunks = _batched(_ndjson_lines(export))
+
+    chunks = (chunk.encode("utf-8") for chunk in chunks if chunk)
+    if compress:
+        chunks = _gzip(chunks)
+    return chunks
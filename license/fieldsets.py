@@ -0,0 +1,145 @@
+"""
+Sparse fieldsets (``?fields=a,b,c``) และ fast path สำหรับ list endpoint
+
+``SparseFieldsetSerializerMixin`` ตัด field ที่ไม่ได้ขอออกจาก serializer
+``SparseFieldsetMixin`` (ใช้กับ ViewSet) ทำให้ list อ่านข้อมูลด้วย ``.values()``
+เฉพาะคอลัมน์ที่ต้องใช้ แล้วแปลงเป็น dict โดยตรง ไม่ต้องสร้าง model instance
+และไม่ต้องผ่าน serializer ทีละแถว (ผลลัพธ์เหมือน serializer ทุกประการ)
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer ที่รับ ``fields=[...]`` เพื่อแสดงเฉพาะบาง field
+
+    values_fields: {ชื่อ field: (คอลัมน์ที่ต้องใช้ใน .values(), ฟังก์ชัน(row))}
+    ใช้แทน SerializerMethodField ใน fast path ของ list
+    """
+
+    values_fields = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ValuesPlan:
+    """คอลัมน์ที่ต้อง query และวิธีแปลงแต่ละแถวของ .values() เป็นผลลัพธ์"""
+
+    def __init__(self, serializer):
+        self.columns = []
+        self.steps = []
+        self.supported = True
+
+        for name, field in serializer.fields.items():
+            if name in serializer.values_fields:
+                columns, function = serializer.values_fields[name]
+                self.columns.extend(columns)
+                self.steps.append((name, None, function))
+            elif isinstance(field, serializers.SerializerMethodField) or "." in field.source or field.source == "*":
+                # field ที่อ่านจาก instance โดยตรง ใช้ serializer ปกติ
+                self.supported = False
+                return
+            else:
+                self.columns.append(field.source)
+                # values() คืนค่า id ของ ForeignKey อยู่แล้ว
+                convert = None if isinstance(field, RelatedField) else field.to_representation
+                self.steps.append((name, field.source, convert))
+
+    def render(self, row):
+        data = {}
+        for name, column, convert in self.steps:
+            if column is None:
+                data[name] = convert(row)
+            else:
+                value = row[column]
+                data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin สำหรับ ViewSet: ?fields=a,b,c และ fast path ของ list
+    serializer_class ต้องใช้ SparseFieldsetSerializerMixin
+    """
+
+    fields_query_param = "fields"
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_requested_fields(self):
+        """รายชื่อ field ที่ขอผ่าน ?fields= หรือ None ถ้าไม่ได้ระบุ"""
+        if not hasattr(self, "_requested_fields"):
+            self._requested_fields = self._parse_requested_fields()
+        return self._requested_fields
+
+    def _parse_requested_fields(self):
+        raw = self.request.query_params.get(self.fields_query_param)
+        if not raw:
+            return None
+
+        requested = [name.strip() for name in raw.split(",") if name.strip()]
+        available = self.get_serializer_class()().fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise serializers.ValidationError(
+                {self.fields_query_param: [f"ไม่รู้จัก field: {', '.join(unknown)}"]}
+            )
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_fieldset_actions:
+            kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_values_plan(self):
+        if not hasattr(self, "_values_plan"):
+            self._values_plan = ValuesPlan(self.get_serializer())
+        return self._values_plan
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "retrieve" and self.get_requested_fields():
+            plan = self.get_values_plan()
+            if plan.supported:
+                # อ่านเฉพาะคอลัมน์ที่ต้องใช้ (annotation ไม่ต้องระบุใน only())
+                queryset = queryset.only(
+                    *[column for column in plan.columns if self._is_model_field(queryset.model, column)]
+                )
+        return queryset
+
+    @staticmethod
+    def _is_model_field(model, column):
+        try:
+            model._meta.get_field(column.split("__")[0])
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_values_plan()
+        if not plan.supported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # cursor pagination ต้องใช้คอลัมน์ที่ใช้เรียงลำดับ
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns = plan.columns + [field.lstrip("-") for field in ordering]
+        queryset = queryset.values(*dict.fromkeys(columns))
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = [plan.render(row) for row in rows]
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,52 @@
+"""
+ตัวกรอง License, ActivationLog และ ValidateRollup ตาม query parameters
+
+ใช้ร่วมกันระหว่าง ViewSet (list/export) และ management command ``export_data``
+params คือ object ที่มี ``.get()`` เช่น request.query_params หรือ dict
+"""
+
+from django.utils import timezone
+
+
+def filter_licenses(queryset, params):
+    """กรอง License ตาม software_id, email และ active_only"""
+    # กรองตาม software_id
+    software_id = params.get("software_id")
+    if software_id:
+        queryset = queryset.filter(software_id=software_id)
+
+    # กรองตาม email (ไม่สนตัวพิมพ์เล็ก/ใหญ่)
+    email = params.get("email")
+    if email:
+        queryset = queryset.filter(customer_email__iexact=email)
+
+    # กรองเฉพาะที่ยังใช้งานได้
+    active_only = params.get("active_only")
+    if active_only == "true":
+        queryset = queryset.filter(is_active=True, expires_at__gt=timezone.now())
+
+    return queryset
+
+
+def filter_activation_logs(queryset, params):
+    """กรอง ActivationLog ตาม license_id และ action"""
+    # กรองตาม license_id
+    license_id = params.get("license_id")
+    if license_id:
+        queryset = queryset.filter(license_id=license_id)
+
+    # กรองตาม action
+    action = params.get("action")
+    if action:
+        queryset = queryset.filter(action=action)
+
+    return queryset
+
+
+def filter_validate_rollups(queryset, params):
+    """กรอง ValidateRollup ตาม license_id"""
+    license_id = params.get("license_id")
+    if license_id:
+        queryset = queryset.filter(license_id=license_id)
+
+    return queryset
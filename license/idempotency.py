@@ -0,0 +1,199 @@
+"""
+Idempotency-Key สำหรับ POST /api/licenses/activate/ และ /renew/
+
+client ที่ส่ง header ``Idempotency-Key`` จะได้ผลลัพธ์ของ request แรกกลับไปทุกครั้ง
+ที่ส่งซ้ำภายใน LICENSE_IDEMPOTENCY_TIMEOUT วินาที โดยไม่แตะ DB
+(ผลลัพธ์เก็บใน cache ``default``)
+
+ถ้า request ซ้ำมาถึงขณะที่ request แรกยังทำงานอยู่ จะรอผลลัพธ์ของ request แรก
+แทนที่จะต่ออายุ License ซ้ำอีกครั้ง ถ้า request แรกจบโดยไม่มีผลลัพธ์ให้เก็บ (5xx)
+request ที่รออยู่จะทำงานเองทันทีแทนการรอจนหมดเวลา
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .async_cache import async_cache
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+KEY_PREFIX = "idempotency"
+MAX_KEY_LENGTH = 255
+
+# lock ของ request ที่กำลังทำงาน หมดอายุเองถ้า worker ตายระหว่างทำงาน
+IN_FLIGHT_TIMEOUT = 30
+# เวลาสูงสุดที่ request ซ้ำจะรอ request แรก
+IN_FLIGHT_WAIT = 10.0
+POLL_INTERVAL = 0.05
+
+
+def _cache_key(action, idempotency_key):
+    digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{action}:{digest}"
+
+
+def _request_hash(data):
+    """hash ของ body เพื่อตรวจว่า key เดิมถูกใช้กับข้อมูลเดิม"""
+    raw = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _error(message, http_status):
+    return {"success": False, "message": message}, http_status
+
+
+def _check_key(idempotency_key):
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        return _error(
+            f"{HEADER} ต้องยาวไม่เกิน {MAX_KEY_LENGTH} ตัวอักษร",
+            status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
+def _replay(stored, request_hash):
+    """คืนค่า (data, status) ที่บันทึกไว้ หรือ error ถ้า key ถูกใช้กับข้อมูลอื่น"""
+    if stored["request"] != request_hash:
+        return _error(
+            f"{HEADER} นี้ถูกใช้กับข้อมูลอื่นไปแล้ว",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return stored["data"], stored["status"]
+
+
+def _in_flight():
+    return _error(
+        "request เดียวกันกำลังประมวลผลอยู่ กรุณาลองใหม่อีกครั้ง",
+        status.HTTP_409_CONFLICT,
+    )
+
+
+def _should_store(http_status):
+    # ข้อผิดพลาดฝั่ง server ให้ client ลองใหม่ได้
+    return http_status < 500
+
+
+def idempotent(action):
+    """
+    decorator สำหรับ action ของ ViewSet
+    request ที่ไม่มี header Idempotency-Key ทำงานตามปกติ
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            idempotency_key = request.headers.get(HEADER)
+            if not idempotency_key:
+                return method(self, request, *args, **kwargs)
+
+            error = _check_key(idempotency_key)
+            if error:
+                return Response(*error)
+
+            key = _cache_key(action, idempotency_key)
+            lock_key = f"{key}:lock"
+            request_hash = _request_hash(request.data)
+            deadline = time.monotonic() + IN_FLIGHT_WAIT
+            stored = cache.get(key)
+
+            while stored is None:
+                if cache.add(lock_key, 1, IN_FLIGHT_TIMEOUT):
+                    try:
+                        response = method(self, request, *args, **kwargs)
+                        if _should_store(response.status_code):
+                            cache.set(
+                                key,
+                                {
+                                    "request": request_hash,
+                                    "status": response.status_code,
+                                    "data": response.data,
+                                },
+                                settings.LICENSE_IDEMPOTENCY_TIMEOUT,
+                            )
+                    finally:
+                        cache.delete(lock_key)
+                    return response
+
+                # รอจนกว่าจะมีผลลัพธ์ หรือ lock ถูกปล่อยโดยไม่มีผลลัพธ์ (ลองทำงานเองอีกรอบ)
+                while True:
+                    if time.monotonic() >= deadline:
+                        return Response(*_in_flight())
+                    time.sleep(POLL_INTERVAL)
+                    values = cache.get_many([key, lock_key])
+                    stored = values.get(key)
+                    if stored is not None or lock_key not in values:
+                        break
+
+            response = Response(*_replay(stored, request_hash))
+            response[REPLAY_HEADER] = "true"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def aidempotent(action, render):
+    """
+    idempotent แบบ async สำหรับ view ใน async_views
+    render(data, status) ใช้สร้าง response จากผลลัพธ์ที่บันทึกไว้
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, data):
+            idempotency_key = request.headers.get(HEADER)
+            if not idempotency_key:
+                return await view(request, data)
+
+            error = _check_key(idempotency_key)
+            if error:
+                return render(*error)
+
+            key = _cache_key(action, idempotency_key)
+            lock_key = f"{key}:lock"
+            request_hash = _request_hash(data)
+            deadline = time.monotonic() + IN_FLIGHT_WAIT
+            stored = await async_cache.get(key)
+
+            while stored is None:
+                if await async_cache.add(lock_key, 1, IN_FLIGHT_TIMEOUT):
+                    try:
+                        response = await view(request, data)
+                        if _should_store(response.status_code):
+                            await async_cache.set(
+                                key,
+                                {
+                                    "request": request_hash,
+                                    "status": response.status_code,
+                                    "data": json.loads(response.content),
+                                },
+                                settings.LICENSE_IDEMPOTENCY_TIMEOUT,
+                            )
+                    finally:
+                        await async_cache.delete(lock_key)
+                    return response
+
+                while True:
+                    if time.monotonic() >= deadline:
+                        return render(*_in_flight())
+                    await asyncio.sleep(POLL_INTERVAL)
+                    stored = await async_cache.get(key)
+                    if stored is not None or await async_cache.get(lock_key) is None:
+                        break
+
+            response = render(*_replay(stored, request_hash))
+            response[REPLAY_HEADER] = "true"
+            return response
+
+        return wrapper
+
+    return decorator
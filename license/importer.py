@@ -0,0 +1,160 @@
+"""
+นำเข้า License จำนวนมากจากไฟล์ CSV หรือ JSONL
+
+อ่านไฟล์ทีละแถวและบันทึกทีละ chunk ด้วย ``bulk_create`` ทำให้ใช้หน่วยความจำคงที่
+ไม่ว่าไฟล์จะใหญ่แค่ไหน ใช้ได้ทั้งจาก ``manage.py import_licenses``
+และ POST /api/licenses/import/
+
+คอลัมน์ที่ต้องมีเหมือน POST /api/licenses/activate/:
+software_id, customer_email, machine_id, mac_address, duration_days
+"""
+
+import csv
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .cache import invalidate_keys, validate_cache_key
+from .catalog import get_software_name
+from .models import License
+from .serializers import ActivateLicenseSerializer
+from .utils import license_fingerprint
+
+FORMATS = ("csv", "jsonl")
+
+ON_CONFLICT_SKIP = "skip"
+ON_CONFLICT_UPDATE = "update"
+
+# คอลัมน์ที่ถูกเขียนทับเมื่อ on_conflict="update" (เหมือนการ Activate ซ้ำ)
+UPDATE_FIELDS = ["customer_email", "duration_days", "activated_at", "expires_at", "is_active"]
+
+
+def detect_format(filename):
+    """เดารูปแบบไฟล์จากนามสกุล"""
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def iter_rows(stream, fmt):
+    """
+    อ่านไฟล์ (text stream) ทีละแถว
+    yield (เลขแถว, dict) หรือ (เลขแถว, None) ถ้าแถวนั้นอ่านไม่ได้
+    """
+    if fmt == "jsonl":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+    else:
+        # แถวที่ 1 คือ header
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, row
+
+
+class ImportResult:
+    """
+    สรุปผลการนำเข้า
+    accepted คือจำนวน License ที่ผ่านการตรวจสอบและถูกส่งไปบันทึก
+    (on_conflict="skip" จะไม่เขียนทับเครื่องที่มี License อยู่แล้ว)
+    """
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.total = 0
+        self.accepted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "accepted": self.accepted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _build_license(data, now):
+    return License(
+        software_id=data["software_id"],
+        customer_email=data["customer_email"],
+        machine_id=data["machine_id"],
+        mac_address=data["mac_address"],
+        fingerprint=license_fingerprint(
+            data["machine_id"], data["mac_address"], data["software_id"]
+        ),
+        duration_days=data["duration_days"],
+        activated_at=now,
+        expires_at=now + timedelta(days=data["duration_days"]),
+        is_active=True,
+    )
+
+
+def _write_chunk(chunk, on_conflict):
+    """บันทึก License หนึ่ง chunk แล้วล้าง validate cache ของเครื่องเหล่านั้น"""
+    licenses = list(chunk.values())
+    if on_conflict == ON_CONFLICT_UPDATE:
+        License.objects.bulk_create(
+            licenses,
+            update_conflicts=True,
+            unique_fields=["fingerprint"],
+            update_fields=UPDATE_FIELDS + ["updated_at"],
+        )
+    else:
+        License.objects.bulk_create(licenses, ignore_conflicts=True)
+
+    # ล้างทั้ง License ที่อัพเดทและผลลัพธ์ "ไม่พบ License" ที่อาจค้างอยู่ใน cache
+    invalidate_keys(
+        validate_cache_key(
+            license.machine_id, license.mac_address, get_software_name(license.software_id)
+        )
+        for license in licenses
+    )
+    return len(licenses)
+
+
+def import_licenses(rows, chunk_size=1000, on_conflict=ON_CONFLICT_SKIP, max_errors=1000):
+    """
+    ตรวจสอบและบันทึก License จาก iterator ของ (เลขแถว, dict)
+    ใช้กฎเดียวกับ ActivateLicenseSerializer และคืนค่า ImportResult
+    """
+    result = ImportResult(max_errors)
+    now = timezone.now()
+    # key คือ fingerprint เพื่อไม่ให้แถวซ้ำกันอยู่ใน INSERT เดียวกัน (แถวหลังชนะ)
+    chunk = {}
+
+    for row_number, row in rows:
+        result.total += 1
+        if row is None:
+            result.add_error(row_number, {"row": ["อ่านข้อมูลแถวนี้ไม่ได้"]})
+            continue
+
+        serializer = ActivateLicenseSerializer(data=row)
+        if not serializer.is_valid():
+            result.add_error(row_number, serializer.errors)
+            continue
+
+        license = _build_license(serializer.validated_data, now)
+        chunk[license.fingerprint] = license
+
+        if len(chunk) >= chunk_size:
+            result.accepted += _write_chunk(chunk, on_conflict)
+            chunk = {}
+
+    if chunk:
+        result.accepted += _write_chunk(chunk, on_conflict)
+
+    return result
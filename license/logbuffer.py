@@ -0,0 +1,245 @@
+"""
+Buffer สำหรับเขียน ActivationLog แบบ bulk
+
+แต่ละ worker process จะเก็บ log ไว้ในหน่วยความจำ แล้วให้ thread เบื้องหลัง
+บันทึกด้วย ``bulk_create`` เมื่อครบ LOG_BUFFER_BATCH_SIZE รายการ
+หรือทุก LOG_BUFFER_FLUSH_INTERVAL วินาที (แล้วแต่ว่าอย่างไหนถึงก่อน)
+
+ถ้า process ถูก kill แบบไม่ทันตั้งตัว จะสูญเสีย log ได้ไม่เกินจำนวนที่ค้างอยู่ใน buffer
+ซึ่งถูกจำกัดไว้ที่ LOG_BUFFER_MAX_PENDING รายการต่อ worker
+
+ถ้า DB ใช้งานไม่ได้ (OperationalError/InterfaceError) log ที่บันทึกไม่สำเร็จจะถูกคืนเข้า
+buffer แล้วลองใหม่ทุก LOG_BUFFER_FLUSH_INTERVAL วินาที ระหว่างนั้น buffer เก็บ log ได้
+ไม่เกิน LOG_BUFFER_MAX_PENDING รายการ (ทิ้งรายการเก่าสุดก่อน) log ที่ผิดพลาดเฉพาะแถว
+(เช่น License ถูกลบไปแล้ว) จะถูกทิ้งทีละรายการ
+
+validate ที่สำเร็จถูกรวมเป็น ValidateRollup รายชั่วโมงแทน (LOG_VALIDATE_ROLLUP ดู rollups.py)
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    InterfaceError,
+    OperationalError,
+    close_old_connections,
+    transaction,
+)
+
+from .models import ActivationLog
+from .rollups import accumulate, is_rollup, merge, write_rollups
+
+logger = logging.getLogger(__name__)
+
+# ข้อผิดพลาดที่แปลว่า DB ใช้งานไม่ได้ชั่วคราว (ไม่ใช่ข้อมูลผิด) ให้เก็บ log ไว้ลองใหม่
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+
+class ActivationLogBuffer:
+    """เก็บ ActivationLog ไว้ในหน่วยความจำแล้วบันทึกเป็นชุด"""
+
+    def __init__(self, batch_size, flush_interval, max_pending):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = []
+        self._rollups = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        # DB ใช้งานไม่ได้ในการ flush ครั้งล่าสุด (ไม่ปลุก thread ก่อนครบ flush_interval)
+        self._retrying = False
+
+    def add(self, log):
+        """เพิ่ม log เข้า buffer (ไม่แตะ DB)"""
+        self.add_many([log])
+
+    def add_many(self, logs):
+        """เพิ่ม log หลายรายการเข้า buffer พร้อมกัน"""
+        self._ensure_thread()
+        with self._lock:
+            for log in logs:
+                if is_rollup(log):
+                    accumulate(self._rollups, [log])
+                else:
+                    self._pending.append(log)
+            self._trim()
+            if len(self._pending) >= self.batch_size and not self._retrying:
+                self._wakeup.set()
+
+    def _trim(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            # DB มีปัญหานานเกินไป ทิ้ง log เก่าสุดเพื่อจำกัดหน่วยความจำ
+            del self._pending[:overflow]
+            logger.warning("ActivationLog buffer full, dropped %d record(s)", overflow)
+
+    def _requeue(self, logs=(), rollups=None):
+        """คืน log/rollup ที่บันทึกไม่ได้เพราะ DB ใช้งานไม่ได้กลับเข้า buffer"""
+        with self._lock:
+            self._retrying = True
+            self._pending[:0] = logs
+            self._trim()
+            if rollups:
+                self._rollups = merge(rollups, self._rollups)
+
+    def flush(self):
+        """บันทึก log และ ValidateRollup ที่ค้างอยู่ทั้งหมดลง DB"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                rollups, self._rollups = self._rollups, {}
+
+            saved = 0
+            if rollups:
+                try:
+                    saved += write_rollups(rollups)
+                    rollups = {}
+                except UNAVAILABLE_ERRORS:
+                    pass
+                except DatabaseError:
+                    logger.exception("Dropped %d validate rollup(s)", len(rollups))
+                    rollups = {}
+
+            written, retry = self._write_logs(batch)
+            saved += written
+
+            if retry or rollups:
+                logger.warning(
+                    "Database unavailable, keeping %d ActivationLog(s) and %d validate rollup(s) for retry",
+                    len(retry),
+                    len(rollups),
+                )
+                self._requeue(retry, rollups)
+            else:
+                self._retrying = False
+            return saved
+
+    def _write_logs(self, batch):
+        """บันทึก log คืนค่า (จำนวนที่บันทึกได้, log ที่ต้องลองใหม่เพราะ DB ใช้งานไม่ได้)"""
+        if not batch:
+            return 0, []
+
+        try:
+            ActivationLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            return len(batch), []
+        except UNAVAILABLE_ERRORS:
+            return 0, batch
+        except DatabaseError:
+            logger.exception("Bulk insert of %d ActivationLog(s) failed", len(batch))
+
+        # บันทึกทีละรายการ เพื่อไม่ให้ log ที่เสียรายการเดียวทำให้ทั้งชุดหาย
+        saved = 0
+        for index, log in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    log.save(force_insert=True)
+                saved += 1
+            except UNAVAILABLE_ERRORS:
+                return saved, batch[index:]
+            except DatabaseError:
+                logger.exception("Dropped ActivationLog for license %s", log.license_id)
+        return saved, []
+
+    def _ensure_thread(self):
+        # เริ่ม thread ใหม่หลัง fork (gunicorn สร้าง worker ด้วย fork)
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._pending = []
+            self._rollups = {}
+            self._thread = threading.Thread(
+                target=self._run, name="activation-log-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("ActivationLog buffer flush failed")
+
+
+_buffer = None
+
+
+def get_log_buffer():
+    """คืนค่า buffer ของ process ปัจจุบัน หรือ None ถ้าปิดการใช้งาน"""
+    global _buffer
+    if not settings.LOG_BUFFER_ENABLED:
+        return None
+    if _buffer is None:
+        _buffer = ActivationLogBuffer(
+            batch_size=settings.LOG_BUFFER_BATCH_SIZE,
+            flush_interval=settings.LOG_BUFFER_FLUSH_INTERVAL,
+            max_pending=settings.LOG_BUFFER_MAX_PENDING,
+        )
+    return _buffer
+
+
+def log_activation(**fields):
+    """
+    บันทึก ActivationLog ผ่าน buffer
+    ถ้าเรียกภายใน transaction จะเข้า buffer หลัง commit เท่านั้น
+    """
+    log = ActivationLog(**fields)
+    buffer = get_log_buffer()
+    if buffer is None:
+        if is_rollup(log):
+            transaction.on_commit(lambda: write_rollups(accumulate({}, [log])))
+        else:
+            transaction.on_commit(log.save)
+        return
+    transaction.on_commit(lambda: buffer.add(log))
+
+
+async def alog_activation(**fields):
+    """log_activation สำหรับ async view (ไม่มี transaction ให้รอ commit)"""
+    log = ActivationLog(**fields)
+    buffer = get_log_buffer()
+    if buffer is None:
+        if is_rollup(log):
+            await sync_to_async(write_rollups)(accumulate({}, [log]))
+        else:
+            await log.asave()
+        return
+    buffer.add(log)
+
+
+def log_activations(logs):
+    """บันทึก ActivationLog หลายรายการ (list ของ dict) ด้วย bulk insert ครั้งเดียว"""
+    logs = [ActivationLog(**fields) for fields in logs]
+    if not logs:
+        return
+    buffer = get_log_buffer()
+    if buffer is None:
+        rollups = accumulate({}, [log for log in logs if is_rollup(log)])
+        logs = [log for log in logs if not is_rollup(log)]
+        transaction.on_commit(lambda: write_rollups(rollups))
+        transaction.on_commit(lambda: ActivationLog.objects.bulk_create(logs))
+        return
+    transaction.on_commit(lambda: buffer.add_many(logs))
+
+
+def flush_activation_logs():
+    """บันทึก log ที่ค้างอยู่ใน buffer ทันที (ใช้ตอน worker ปิดตัว)"""
+    if _buffer is not None:
+        return _buffer.flush()
+    return 0
+
+
+atexit.register(flush_activation_logs)
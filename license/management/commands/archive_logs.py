@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from license.archive import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    ArchiveError,
+    archive_logs,
+    parquet_available,
+    parse_date,
+)
+from license.models import ActivationLog
+
+
+class Command(BaseCommand):
+    help = (
+        'Archive activation logs older than --before into compressed files partitioned '
+        'by month, verify the row counts and delete the archived rows in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            required=True,
+            help='Archive logs created before this date (YYYY-MM-DD or ISO datetime)'
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=settings.LOG_ARCHIVE_DIR,
+            help=f'Archive directory, local or mounted storage (default: {settings.LOG_ARCHIVE_DIR})'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='jsonl',
+            help='gzip-compressed JSON lines, or Parquet (requires pyarrow) (default: jsonl)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows read and deleted per query (default: {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Write and verify the archive but keep the rows in the database'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show how many logs would be archived'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            before = parse_date(options['before'])
+        except ValueError:
+            raise CommandError(f'Invalid --before date: {options["before"]}')
+        if before > timezone.now():
+            raise CommandError('--before must not be in the future')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['format'] == 'parquet' and not parquet_available():
+            raise CommandError('Parquet archives require pyarrow (pip install pyarrow)')
+
+        if options['dry_run']:
+            count = ActivationLog.objects.filter(created_at__lt=before).count()
+            self.stdout.write(f'{count} log(s) created before {before:%Y-%m-%d %H:%M} would be archived')
+            return
+
+        try:
+            result = archive_logs(
+                options['output_dir'],
+                before,
+                fmt=options['format'],
+                chunk_size=options['chunk_size'],
+                delete=not options['keep'],
+            )
+        except ArchiveError as exc:
+            raise CommandError(f'Archive failed, no logs were deleted: {exc}')
+
+        for path in result.files:
+            self.stdout.write(f'Wrote {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.rows} log(s) into {len(result.files)} file(s), '
+            f'deleted {result.deleted} from the database'
+        ))
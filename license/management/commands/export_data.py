@@ -0,0 +1,82 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from license.exporter import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    activation_log_export,
+    license_export,
+    stream_export,
+)
+from license.filters import filter_activation_logs, filter_licenses
+from license.models import ActivationLog, License
+
+
+class Command(BaseCommand):
+    help = 'Stream licenses or activation logs to NDJSON/CSV (optionally gzip)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=['licenses', 'logs'], help='What to export')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='ndjson',
+            help='Output format (default: ndjson)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Output file (default: stdout)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress the output with gzip'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows fetched from the database at a time (default: {DEFAULT_CHUNK_SIZE})'
+        )
+
+        # ตัวกรองเดียวกับ GET /api/licenses/ และ GET /api/logs/
+        parser.add_argument('--software-id', help='licenses: filter by software id')
+        parser.add_argument('--email', help='licenses: filter by customer email')
+        parser.add_argument(
+            '--active-only',
+            action='store_const',
+            const='true',
+            help='licenses: only active, unexpired licenses'
+        )
+        parser.add_argument('--license-id', help='logs: filter by license id')
+        parser.add_argument('--action', help='logs: filter by action')
+
+    def handle(self, *args, **options):
+        if options['model'] == 'licenses':
+            queryset = filter_licenses(License.objects.all(), options)
+            export = license_export(queryset, chunk_size=options['chunk_size'])
+        else:
+            queryset = filter_activation_logs(ActivationLog.objects.all(), options)
+            export = activation_log_export(queryset, chunk_size=options['chunk_size'])
+
+        chunks = stream_export(export, options['format'], compress=options['gzip'])
+
+        if options['output']:
+            try:
+                output = open(options['output'], 'wb')
+            except OSError as e:
+                raise CommandError(f'Cannot open {options["output"]}: {e}')
+        else:
+            output = sys.stdout.buffer
+
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f'Exported {export.name} to {options["output"]}'))
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from license.importer import (
+    FORMATS,
+    ON_CONFLICT_SKIP,
+    ON_CONFLICT_UPDATE,
+    detect_format,
+    import_licenses,
+    iter_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Import licenses from a CSV or JSONL file (streamed, bulk inserted in chunks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the CSV or JSONL file')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: detected from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert (default: 1000)'
+        )
+        parser.add_argument(
+            '--on-conflict',
+            choices=[ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE],
+            default=ON_CONFLICT_SKIP,
+            help='What to do when the machine already has a license (default: skip)'
+        )
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=1000,
+            help='Maximum number of row errors to print (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+
+        try:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Cannot open {options["path"]}: {e}')
+
+        with stream:
+            result = import_licenses(
+                iter_rows(stream, fmt),
+                chunk_size=options['chunk_size'],
+                on_conflict=options['on_conflict'],
+                max_errors=options['max_errors'],
+            )
+
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(
+                f'Row {error["row"]}: {json.dumps(error["errors"], ensure_ascii=False)}'
+            ))
+
+        self.stdout.write(self.style.SUCCESS('\n=== IMPORT FINISHED ==='))
+        self.stdout.write(f'Rows read: {result.total}')
+        self.stdout.write(f'Rows accepted: {result.accepted}')
+        self.stdout.write(f'Rows failed: {result.failed}')
+        if result.failed > len(result.errors):
+            self.stdout.write(self.style.WARNING(
+                f'Only the first {len(result.errors)} errors were printed.'
+            ))
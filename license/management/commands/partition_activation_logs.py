@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from license.models import ActivationLog, ValidateRollup
+from license.partitions import (
+    ensure_partitions,
+    expired_partitions,
+    is_partitioned,
+    prune_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly activation log partitions and drop (or detach) '
+        'partitions older than the retention window (run daily, e.g. via cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.LOG_PARTITION_MONTHS_AHEAD,
+            help=f'Months of partitions to create ahead (default: {settings.LOG_PARTITION_MONTHS_AHEAD})'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.LOG_RETENTION_DAYS,
+            help='Drop partitions whose logs are all older than this many days '
+                 f'(0 keeps everything, default: {settings.LOG_RETENTION_DAYS})'
+        )
+        parser.add_argument(
+            '--detach',
+            action='store_true',
+            help='Detach expired partitions and keep them as standalone tables instead of dropping'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show which partitions would be dropped'
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0 or options['retention_days'] < 0:
+            raise CommandError('--months-ahead and --retention-days must not be negative')
+
+        retention_days = options['retention_days']
+        cutoff = timezone.now() - timedelta(days=retention_days) if retention_days else None
+
+        if not is_partitioned():
+            # SQLite (development) ไม่มี partition: ลบแถวที่เก่ากว่า retention ตรง ๆ
+            self.stdout.write(self.style.WARNING(
+                'ActivationLog is not partitioned on this database; deleting old rows instead'
+            ))
+            if cutoff and not options['dry_run']:
+                deleted, _ = ActivationLog.objects.filter(created_at__lt=cutoff).delete()
+                self.stdout.write(f'Deleted {deleted} log(s) older than {cutoff:%Y-%m-%d}')
+                self.prune_rollups(cutoff)
+            return
+
+        if options['dry_run']:
+            expired = expired_partitions(cutoff) if cutoff else []
+            for partition in expired:
+                self.stdout.write(f'Would prune: {partition.name} (< {partition.upper:%Y-%m-%d})')
+            self.stdout.write(f'{len(expired)} partition(s) would be pruned')
+            return
+
+        for name in ensure_partitions(options['months_ahead']):
+            self.stdout.write(f'Created partition {name}')
+
+        if cutoff:
+            verb = 'Detached' if options['detach'] else 'Dropped'
+            for name in prune_partitions(cutoff, detach=options['detach']):
+                self.stdout.write(f'{verb} partition {name}')
+            self.prune_rollups(cutoff)
+
+        self.stdout.write(self.style.SUCCESS('Activation log partitions are up to date'))
+
+    def prune_rollups(self, cutoff):
+        # ValidateRollup มีขนาดเล็กกว่า log มาก ลบตาม retention เดียวกันได้โดยตรง
+        deleted, _ = ValidateRollup.objects.filter(hour__lt=cutoff).delete()
+        if deleted:
+            self.stdout.write(f'Deleted {deleted} validate rollup(s) older than {cutoff:%Y-%m-%d}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from license.counters import reconcile_license_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount per-software license counters (run periodically, e.g. hourly via cron)'
+
+    def handle(self, *args, **options):
+        changed = reconcile_license_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'License counters reconciled ({changed} software corrected)'
+        ))
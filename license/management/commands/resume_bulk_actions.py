@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from license.bulk import recover_bulk_actions
+
+
+class Command(BaseCommand):
+    help = (
+        'Resume admin bulk actions left pending/running by a worker restart, '
+        'continuing after the last processed primary key (run periodically via cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=10,
+            help='Only jobs without progress for this many minutes (default: 10)'
+        )
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Mark stale jobs as failed instead of resuming them'
+        )
+
+    def handle(self, *args, **options):
+        if options['stale_minutes'] < 1:
+            raise CommandError('--stale-minutes must be at least 1')
+
+        jobs = recover_bulk_actions(
+            timedelta(minutes=options['stale_minutes']), fail=options['fail']
+        )
+        for job in jobs:
+            line = f'{job}: {job.get_status_display()} ({job.processed} processed, {job.changed} changed)'
+            if job.status == 'failed':
+                self.stdout.write(self.style.WARNING(f'{line} {job.error}'))
+            else:
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'{len(jobs)} stale bulk action(s) handled'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from license.signing import generate_signing_key, unpublish_old_keys
+
+
+class Command(BaseCommand):
+    help = 'Rotate the Ed25519 key used to sign offline license tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=2,
+            help='Number of most recent public keys to keep published (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        keep = max(1, options['keep'])
+
+        key = generate_signing_key()
+        unpublished = unpublish_old_keys(keep)
+
+        self.stdout.write(self.style.SUCCESS('\n=== SIGNING KEY ROTATED ==='))
+        self.stdout.write(f'Key ID: {key.kid}')
+        self.stdout.write(f'Public Key (base64url): {key.public_key}')
+        self.stdout.write(f'Unpublished old keys: {unpublished}')
+
+        self.stdout.write(self.style.WARNING(
+            '\nNote: running workers pick up the new key within 60 seconds. '
+            'Clients should refresh GET /api/licenses/public_keys/.'
+        ))
@@ -0,0 +1,53 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from license.archive import ArchiveError, parse_date, scan_archive
+
+
+class Command(BaseCommand):
+    help = 'Search archived activation logs (see archive_logs) and print matches as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.LOG_ARCHIVE_DIR,
+            help=f'Archive directory (default: {settings.LOG_ARCHIVE_DIR})'
+        )
+        parser.add_argument('--license-id', type=int, help='Only logs of this license')
+        parser.add_argument('--action', help='Only logs with this action (activate, validate, ...)')
+        parser.add_argument('--since', help='Only logs created at or after this date (YYYY-MM-DD or ISO datetime)')
+        parser.add_argument('--until', help='Only logs created before this date (YYYY-MM-DD or ISO datetime)')
+        parser.add_argument(
+            '--count',
+            action='store_true',
+            help='Print only the number of matching logs'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_date(options['since']) if options['since'] else None
+            until = parse_date(options['until']) if options['until'] else None
+        except ValueError as exc:
+            raise CommandError(f'Invalid date: {exc}')
+
+        records = scan_archive(
+            options['archive_dir'],
+            license_id=options['license_id'],
+            action=options['action'],
+            since=since,
+            until=until,
+        )
+
+        count = 0
+        try:
+            for record in records:
+                count += 1
+                if not options['count']:
+                    record['created_at'] = record['created_at'].isoformat()
+                    self.stdout.write(json.dumps(record, ensure_ascii=False))
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+
+        if options['count']:
+            self.stdout.write(str(count))
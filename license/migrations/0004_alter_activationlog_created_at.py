@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0003_alter_softwarename_options'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activationlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='วันที่บันทึก'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0004_alter_activationlog_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SigningKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kid', models.CharField(max_length=32, unique=True, verbose_name='Key ID')),
+                ('private_key', models.TextField(verbose_name='Private Key (PEM)')),
+                ('public_key', models.CharField(max_length=64, verbose_name='Public Key (base64url)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='ใช้ลงนาม')),
+                ('is_published', models.BooleanField(default=True, verbose_name='เผยแพร่ Public Key')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='วันที่สร้าง')),
+            ],
+            options={
+                'verbose_name': 'Signing Key',
+                'verbose_name_plural': 'Signing Keys',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
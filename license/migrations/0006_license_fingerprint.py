@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:11
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+MAC_ADDRESS_PATTERN = re.compile(r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$")
+
+
+def normalize_mac_address(value):
+    if not MAC_ADDRESS_PATTERN.match(value):
+        return value
+    return value.replace("-", ":").upper()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """
+    แปลง MAC Address เป็นรูปแบบมาตรฐานและคำนวณ fingerprint ของ License เดิม
+    ถ้ามี License ซ้ำกันสำหรับเครื่องเดียวกัน จะให้ fingerprint กับรายการที่ใช้งานอยู่
+    และหมดอายุช้าที่สุดเท่านั้น รายการอื่นคง fingerprint เป็น NULL
+    """
+    License = apps.get_model("license", "License")
+    seen = set()
+    batch = []
+
+    licenses = License.objects.order_by(
+        "-is_active", models.F("expires_at").desc(nulls_last=True), "-id"
+    ).only("id", "machine_id", "mac_address", "software_id", "fingerprint")
+    for license in licenses.iterator(chunk_size=2000):
+        license.mac_address = normalize_mac_address(license.mac_address)
+        fingerprint = hashlib.sha256(
+            f"{license.machine_id}|{license.mac_address}|{license.software_id}".encode()
+        ).hexdigest()
+        license.fingerprint = None if fingerprint in seen else fingerprint
+        seen.add(fingerprint)
+        batch.append(license)
+
+        if len(batch) >= 2000:
+            License.objects.bulk_update(batch, ["mac_address", "fingerprint"])
+            batch = []
+
+    if batch:
+        License.objects.bulk_update(batch, ["mac_address", "fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0005_signingkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='license',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Machine Fingerprint'),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
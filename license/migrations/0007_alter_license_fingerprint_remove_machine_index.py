@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0006_license_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='license',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='Machine Fingerprint'),
+        ),
+        migrations.RemoveIndex(
+            model_name='license',
+            name='license_lic_machine_d58bd4_idx',
+        ),
+    ]
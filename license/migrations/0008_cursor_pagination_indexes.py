@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:21
+
+from django.db import migrations, models
+
+from license.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ทำงานใน transaction ไม่ได้
+    atomic = False
+
+    dependencies = [
+        ('license', '0007_alter_license_fingerprint_remove_machine_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='activationlog',
+            index=models.Index(fields=['created_at', 'id'], name='license_act_created_5334ab_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='activationlog',
+            index=models.Index(fields=['license', 'created_at', 'id'], name='license_act_license_9a034b_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(fields=['created_at', 'id'], name='license_lic_created_7353ba_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:27
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from license.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ทำงานใน transaction ไม่ได้
+    atomic = False
+
+    dependencies = [
+        ('license', '0008_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='activationlog',
+            index=models.Index(fields=['action', 'created_at', 'id'], name='license_act_action_c1a17c_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(fields=['software', 'created_at', 'id'], name='license_lic_softwar_51a10d_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['software', 'expires_at'], name='license_active_sw_expiry_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='license_active_expiry_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(django.db.models.functions.text.Upper('customer_email'), name='license_email_upper_idx'),
+        ),
+    ]
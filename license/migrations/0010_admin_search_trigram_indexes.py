@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:28
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from license.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ทำงานใน transaction ไม่ได้
+    atomic = False
+
+    dependencies = [
+        ('license', '0009_filter_indexes'),
+    ]
+
+    operations = [
+        # pg_trgm (ไม่ทำอะไรบน database อื่น)
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='license',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('license_key'), name='gin_trgm_ops'), name='license_key_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('customer_email'), name='gin_trgm_ops'), name='license_email_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('machine_id'), name='gin_trgm_ops'), name='license_machine_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('mac_address'), name='gin_trgm_ops'), name='license_mac_trgm_idx'),
+        ),
+    ]
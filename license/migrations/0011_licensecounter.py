@@ -0,0 +1,194 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# นับ License ในตาราง license_licensecounter ด้วย trigger ทำให้ทุกทางที่เขียน License
+# (save, upsert, UPDATE ... RETURNING, bulk_create, queryset.update ใน admin) ถูกนับเสมอ
+# และอยู่ใน transaction เดียวกับการเขียน
+
+POSTGRES_CREATE = """
+CREATE OR REPLACE FUNCTION license_counter_update() RETURNS trigger AS $$
+DECLARE
+    old_valid integer := 0;
+    new_valid integer := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_valid := COALESCE(OLD.is_active AND OLD.expires_at > now(), false)::integer;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_valid := COALESCE(NEW.is_active AND NEW.expires_at > now(), false)::integer;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.software_id = NEW.software_id THEN
+        -- ต่ออายุ License ที่ยังใช้งานได้ไม่ต้องแตะ counter
+        IF OLD.is_active IS DISTINCT FROM NEW.is_active OR old_valid <> new_valid THEN
+            UPDATE license_licensecounter
+            SET active = active + NEW.is_active::integer - OLD.is_active::integer,
+                valid = valid + new_valid - old_valid
+            WHERE software_id = NEW.software_id;
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE license_licensecounter
+        SET total = total - 1,
+            active = active - OLD.is_active::integer,
+            valid = valid - old_valid
+        WHERE software_id = OLD.software_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO license_licensecounter (software_id, total, active, valid)
+        VALUES (NEW.software_id, 1, NEW.is_active::integer, new_valid)
+        ON CONFLICT (software_id) DO UPDATE
+        SET total = license_licensecounter.total + 1,
+            active = license_licensecounter.active + EXCLUDED.active,
+            valid = license_licensecounter.valid + EXCLUDED.valid;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER license_counter_update
+AFTER INSERT OR UPDATE OF software_id, is_active, expires_at OR DELETE ON license_license
+FOR EACH ROW EXECUTE FUNCTION license_counter_update();
+"""
+
+POSTGRES_DROP = """
+DROP TRIGGER IF EXISTS license_counter_update ON license_license;
+DROP FUNCTION IF EXISTS license_counter_update();
+"""
+
+# SQLite (development) เวลาใน DB เก็บเป็นข้อความ UTC จึงเทียบกับ strftime ได้โดยตรง
+# ไม่ใช้ INSERT OR IGNORE เพราะ conflict clause ของคำสั่งภายนอก (เช่น upsert) จะถูกใช้แทน
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+SQLITE_CREATE = [
+    f"""
+    CREATE TRIGGER license_counter_insert AFTER INSERT ON license_license
+    BEGIN
+        INSERT INTO license_licensecounter (software_id, total, active, valid)
+        SELECT NEW.software_id, 0, 0, 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM license_licensecounter WHERE software_id = NEW.software_id
+        );
+        UPDATE license_licensecounter
+        SET total = total + 1,
+            active = active + NEW.is_active,
+            valid = valid + COALESCE(NEW.is_active AND NEW.expires_at > {SQLITE_NOW}, 0)
+        WHERE software_id = NEW.software_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER license_counter_update
+    AFTER UPDATE OF software_id, is_active, expires_at ON license_license
+    BEGIN
+        UPDATE license_licensecounter
+        SET total = total - 1,
+            active = active - OLD.is_active,
+            valid = valid - COALESCE(OLD.is_active AND OLD.expires_at > {SQLITE_NOW}, 0)
+        WHERE software_id = OLD.software_id;
+        INSERT INTO license_licensecounter (software_id, total, active, valid)
+        SELECT NEW.software_id, 0, 0, 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM license_licensecounter WHERE software_id = NEW.software_id
+        );
+        UPDATE license_licensecounter
+        SET total = total + 1,
+            active = active + NEW.is_active,
+            valid = valid + COALESCE(NEW.is_active AND NEW.expires_at > {SQLITE_NOW}, 0)
+        WHERE software_id = NEW.software_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER license_counter_delete AFTER DELETE ON license_license
+    BEGIN
+        UPDATE license_licensecounter
+        SET total = total - 1,
+            active = active - OLD.is_active,
+            valid = valid - COALESCE(OLD.is_active AND OLD.expires_at > {SQLITE_NOW}, 0)
+        WHERE software_id = OLD.software_id;
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS license_counter_insert",
+    "DROP TRIGGER IF EXISTS license_counter_update",
+    "DROP TRIGGER IF EXISTS license_counter_delete",
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, [POSTGRES_CREATE])
+    elif vendor == "sqlite":
+        _execute(schema_editor, SQLITE_CREATE)
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, [POSTGRES_DROP])
+    elif vendor == "sqlite":
+        _execute(schema_editor, SQLITE_DROP)
+
+
+def backfill_counters(apps, schema_editor):
+    """นับ License ที่มีอยู่แล้ว (เหมือน reconcile_license_counters)"""
+    License = apps.get_model("license", "License")
+    LicenseCounter = apps.get_model("license", "LicenseCounter")
+    now = timezone.now()
+
+    rows = (
+        License.objects.order_by()
+        .values("software_id")
+        .annotate(
+            total=models.Count("id"),
+            active=models.Count("id", filter=models.Q(is_active=True)),
+            valid=models.Count("id", filter=models.Q(is_active=True, expires_at__gt=now)),
+        )
+    )
+    LicenseCounter.objects.bulk_create(
+        [LicenseCounter(reconciled_at=now, **row) for row in rows],
+        update_conflicts=True,
+        unique_fields=["software"],
+        update_fields=["total", "active", "valid", "reconciled_at"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0010_admin_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseCounter',
+            fields=[
+                ('software', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='license_counter', serialize=False, to='license.softwarename', verbose_name='ซอฟต์แวร์')),
+                ('total', models.IntegerField(db_default=0, default=0, verbose_name='ทั้งหมด')),
+                ('active', models.IntegerField(db_default=0, default=0, verbose_name='เปิดใช้งาน')),
+                ('valid', models.IntegerField(db_default=0, default=0, verbose_name='ใช้งานได้')),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True, verbose_name='ตรวจสอบล่าสุด')),
+            ],
+            options={
+                'verbose_name': 'License Counter',
+                'verbose_name_plural': 'License Counters',
+            },
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0011_licensecounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('activate', 'เปิดใช้งาน'), ('deactivate', 'ปิดใช้งาน'), ('extend', 'ต่ออายุ')], max_length=20, verbose_name='การกระทำ')),
+                ('days', models.IntegerField(blank=True, null=True, verbose_name='จำนวนวัน')),
+                ('status', models.CharField(choices=[('pending', 'รอดำเนินการ'), ('running', 'กำลังดำเนินการ'), ('done', 'เสร็จสิ้น'), ('failed', 'ล้มเหลว')], default='pending', max_length=20, verbose_name='สถานะ')),
+                ('total', models.IntegerField(blank=True, null=True, verbose_name='ทั้งหมด')),
+                ('processed', models.IntegerField(default=0, verbose_name='ดำเนินการแล้ว')),
+                ('changed', models.IntegerField(default=0, verbose_name='เปลี่ยนแปลง')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='PK ล่าสุด')),
+                ('error', models.TextField(blank=True, default='', verbose_name='ข้อความ Error')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP Address')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='วันที่สร้าง')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='วันที่อัพเดท')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='วันที่เสร็จ')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='ผู้สั่ง')),
+            ],
+            options={
+                'verbose_name': 'Bulk Action',
+                'verbose_name_plural': 'Bulk Actions',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations
+from django.utils import timezone
+
+# แปลง license_activationlog เป็น partitioned table รายเดือน (PARTITION BY RANGE (created_at))
+# บน PostgreSQL เท่านั้น database อื่นไม่เปลี่ยนแปลง
+#
+# - ตารางเดิมถูกเปลี่ยนชื่อเป็น license_activationlog_legacy แล้ว ATTACH เป็น partition
+#   ช่วง MINVALUE ถึงต้นเดือนถัดไป (ไม่ต้องคัดลอกข้อมูล แต่ต้อง scan และสร้าง index
+#   (id, created_at) ของข้อมูลเดิมหนึ่งครั้ง) จะถูก DROP ตาม retention เมื่อทุกแถวเก่าพอ
+# - primary key เป็น (id, created_at) ตามข้อกำหนดของ partitioned table
+#   (Django ยังใช้ id เป็น pk ตามเดิม) และ id ใช้ sequence แทน identity column
+#   ซึ่ง PostgreSQL ก่อน 17 ไม่รองรับบน partitioned table
+# - index ทั้งหมดของตารางเดิมถูกสร้างบนตารางแม่ ทุก partition จึงมี index เดียวกัน
+# - สร้าง partition ล่วงหน้า 3 เดือน และ DEFAULT partition กันกรณีไม่มี partition ของเดือนนั้น
+#   (ดู python manage.py partition_activation_logs)
+
+TABLE = "license_activationlog"
+LEGACY = "license_activationlog_legacy"
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_activation_logs(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] == "p":
+            return
+
+        cursor.execute(
+            "SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisprimary"
+            " FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE i.indrelid = %s::regclass",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+            " WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT MAX(created_at) FROM {qn(TABLE)}")
+        latest = cursor.fetchone()[0]
+
+    # partition ของข้อมูลเดิมครอบคลุมถึงต้นเดือนถัดจากแถวล่าสุด
+    now = timezone.localtime()
+    latest = max(now, timezone.localtime(latest)) if latest else now
+    boundary = _add_months(
+        latest.replace(day=1, hour=0, minute=0, second=0, microsecond=0), 1
+    )
+
+    statements = [f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(LEGACY)}"]
+    for name, _, _ in indexes:
+        statements.append(f"ALTER INDEX {qn(name)} RENAME TO {qn(f'{name[:50]}_legacy')}")
+    statements += [
+        f"ALTER TABLE {qn(LEGACY)} ALTER COLUMN id DROP IDENTITY IF EXISTS",
+        f"ALTER TABLE {qn(LEGACY)} ALTER COLUMN id DROP DEFAULT",
+        f"DROP SEQUENCE IF EXISTS {qn(TABLE + '_id_seq')}",
+        f"CREATE SEQUENCE {qn(TABLE + '_id_seq')} AS bigint",
+        f"SELECT setval('{TABLE}_id_seq', COALESCE((SELECT MAX(id) FROM {qn(LEGACY)}), 0) + 1, false)",
+        f"CREATE TABLE {qn(TABLE)} (LIKE {qn(LEGACY)} INCLUDING DEFAULTS)"
+        " PARTITION BY RANGE (created_at)",
+        f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')",
+        f"ALTER SEQUENCE {qn(TABLE + '_id_seq')} OWNED BY {qn(TABLE)}.id",
+        f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_pkey')} PRIMARY KEY (id, created_at)",
+    ]
+    for name, definition in foreign_keys:
+        statements.append(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+    # index definition อ้างถึงชื่อตารางเดิม ซึ่งตอนนี้คือตารางแม่
+    statements += [definition for _, definition, is_primary in indexes if not is_primary]
+    statements.append(
+        f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(LEGACY)}"
+        f" FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"
+    )
+    for offset in range(MONTHS_AHEAD):
+        start = _add_months(boundary, offset)
+        end = _add_months(boundary, offset + 1)
+        statements.append(
+            f"CREATE TABLE {qn(f'{TABLE}_p{start:%Y_%m}')} PARTITION OF {qn(TABLE)}"
+            f" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    statements.append(f"CREATE TABLE {qn(TABLE + '_default')} PARTITION OF {qn(TABLE)} DEFAULT")
+
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("license", "0012_bulkaction"),
+    ]
+
+    operations = [
+        # ย้อนกลับไม่ได้แบบอัตโนมัติ (ตาราง partitioned ใช้งานกับ Django ได้ตามเดิม)
+        migrations.RunPython(partition_activation_logs, migrations.RunPython.noop),
+    ]
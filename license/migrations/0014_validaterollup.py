@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0013_partition_activationlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidateRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='ชั่วโมง')),
+                ('count', models.IntegerField(default=0, verbose_name='จำนวนครั้ง')),
+                ('ip_addresses', models.JSONField(blank=True, default=list, verbose_name='IP Addresses')),
+                ('distinct_ips', models.IntegerField(default=0, verbose_name='จำนวน IP')),
+                ('first_seen', models.DateTimeField(blank=True, null=True, verbose_name='ครั้งแรก')),
+                ('last_seen', models.DateTimeField(blank=True, null=True, verbose_name='ครั้งล่าสุด')),
+                ('license', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validate_rollups', to='license.license', verbose_name='License')),
+            ],
+            options={
+                'verbose_name': 'Validate Rollup',
+                'verbose_name_plural': 'Validate Rollups',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour', 'id'], name='license_val_hour_78272e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('license', 'hour'), name='validate_rollup_license_hour')],
+            },
+        ),
+    ]
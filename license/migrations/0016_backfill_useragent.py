@@ -0,0 +1,60 @@
+import hashlib
+
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef, Subquery
+
+# แต่ละชุดของ id ถูก UPDATE และ commit แยกกัน (migration นี้ไม่ atomic)
+# จึงไม่ lock ทั้งตารางนาน ถ้าหยุดกลางทางรันใหม่ได้ (ข้ามแถวที่มี agent_id แล้ว)
+BATCH_SIZE = 50000
+
+
+def _batches(queryset):
+    bounds = queryset.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return
+    for start in range(bounds["first"], bounds["last"] + 1, BATCH_SIZE):
+        yield queryset.filter(id__gte=start, id__lt=start + BATCH_SIZE)
+
+
+def backfill_user_agents(apps, schema_editor):
+    """สร้าง UserAgent จากข้อความที่ไม่ซ้ำกันใน ActivationLog แล้วกำหนด agent_id ทีละชุด"""
+    ActivationLog = apps.get_model("license", "ActivationLog")
+    UserAgent = apps.get_model("license", "UserAgent")
+
+    logs = ActivationLog.objects.filter(agent__isnull=True, user_agent__isnull=False)
+    values = logs.order_by().values_list("user_agent", flat=True).distinct()
+    UserAgent.objects.bulk_create(
+        [
+            UserAgent(digest=hashlib.sha256(value.encode()).hexdigest(), value=value)
+            for value in values.iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    # UserAgent มีไม่กี่แถว subquery ตาม value จึงไม่ต้องมี index
+    agent = UserAgent.objects.filter(value=OuterRef("user_agent")).values("id")[:1]
+    for batch in _batches(logs):
+        batch.update(agent_id=Subquery(agent))
+
+
+def restore_user_agents(apps, schema_editor):
+    ActivationLog = apps.get_model("license", "ActivationLog")
+    UserAgent = apps.get_model("license", "UserAgent")
+
+    value = UserAgent.objects.filter(id=OuterRef("agent_id")).values("value")[:1]
+    for batch in _batches(ActivationLog.objects.filter(agent__isnull=False)):
+        batch.update(user_agent=Subquery(value))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('license', '0015_useragent'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_agents, restore_user_agents),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0016_backfill_useragent'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='activationlog',
+            name='user_agent',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:04
+
+from django.db import migrations, models
+
+
+def keep_latest_active_key(apps, schema_editor):
+    """ถ้ามีหลาย key ที่ใช้งานอยู่ (worker สร้าง key แรกพร้อมกัน) ใช้เฉพาะรายการล่าสุด"""
+    SigningKey = apps.get_model("license", "SigningKey")
+    latest = SigningKey.objects.filter(is_active=True).order_by("-created_at", "-pk").first()
+    if latest is not None:
+        SigningKey.objects.filter(is_active=True).exclude(pk=latest.pk).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0017_remove_activationlog_user_agent'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_active_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='signingkey',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='signing_key_single_active'),
+        ),
+    ]
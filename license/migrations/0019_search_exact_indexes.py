@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:14
+
+from django.db import migrations, models
+
+from license.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ทำงานใน transaction ไม่ได้
+    atomic = False
+
+    dependencies = [
+        ('license', '0018_signingkey_single_active'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='activationlog',
+            index=models.Index(fields=['ip_address', 'created_at', 'id'], name='license_log_ip_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='license',
+            index=models.Index(fields=['mac_address'], name='license_mac_idx'),
+        ),
+    ]
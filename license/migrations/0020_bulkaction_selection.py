@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0019_search_exact_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkaction',
+            name='selection',
+            field=models.BinaryField(null=True, verbose_name='License ที่เลือก'),
+        ),
+    ]
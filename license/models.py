@@ -1,9 +1,17 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, connections, router, transaction
+from django.db.models import BooleanField, Case, DurationField, F, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest, Upper
+from django.db.models.sql import UpdateQuery
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 import secrets
 
+from .utils import normalize_mac_address, license_fingerprint
+
 
 class SoftwareName(models.Model):
     """Model สำหรับเก็บชื่อซอฟต์แวร์ที่มีในระบบ"""
@@ -22,6 +30,223 @@ class SoftwareName(models.Model):
         return self.name
 
 
+class LicenseQuerySet(models.QuerySet):
+    """QuerySet ของ License"""
+
+    def with_status(self, now=None):
+        """
+        คำนวณสถานะใน SQL ด้วยเวลาเดียวกันทุกแถว:
+        expired (bool) เหมือน is_expired() และ remaining (timedelta) ที่ .days เท่ากับ days_remaining()
+        """
+        now = now or timezone.now()
+        now_value = Value(now, output_field=models.DateTimeField())
+        return self.annotate(
+            expired=Case(
+                When(expires_at__lt=now_value, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            remaining=Case(
+                When(expires_at__gt=now_value, then=F("expires_at") - now_value),
+                default=Value(timedelta(0)),
+                output_field=DurationField(),
+            ),
+        )
+
+
+def _from_returning(connection, table, fields, row):
+    """แปลงค่าจาก RETURNING (cursor ตรง) เป็นค่าของ field เหมือนที่ ORM อ่าน"""
+    values = []
+    for field, value in zip(fields, row):
+        col = field.get_col(table)
+        for converter in connection.ops.get_db_converters(col) + field.get_db_converters(
+            connection
+        ):
+            value = converter(value, col, connection)
+        values.append(value)
+    return values
+
+
+class LicenseManager(models.Manager.from_queryset(LicenseQuerySet)):
+    """Manager ของ License"""
+
+    # คอลัมน์ที่ถูกเขียนทับเมื่อ Activate เครื่องที่มี License อยู่แล้ว
+    ACTIVATION_UPDATE_FIELDS = [
+        "customer_email",
+        "duration_days",
+        "activated_at",
+        "expires_at",
+        "is_active",
+        "updated_at",
+    ]
+
+    # คอลัมน์ที่ไม่ต้องอ่านกลับหลังต่ออายุ (โหลดเมื่อถูกใช้งาน)
+    RENEW_DEFERRED_FIELDS = ["created_at", "updated_at", "notes"]
+
+    def upsert_activation(
+        self, software_id, customer_email, machine_id, mac_address, duration_days
+    ):
+        """
+        Activate License ของเครื่องด้วยคำสั่งเดียว:
+        INSERT ... ON CONFLICT (fingerprint) DO UPDATE ... RETURNING
+
+        คืนค่า (license, created) โดย created เป็น False ถ้าเครื่องนี้มี License อยู่แล้ว
+        ถ้า database ไม่รองรับ RETURNING จะใช้วิธีค้นหาแล้วบันทึกแบบเดิม
+        """
+        from .cache import invalidate_license
+
+        db = router.db_for_write(self.model)
+        connection = connections[db]
+        if not (
+            connection.features.can_return_columns_from_insert
+            and connection.features.supports_update_conflicts_with_target
+        ):
+            return self._upsert_activation_fallback(
+                software_id, customer_email, machine_id, mac_address, duration_days
+            )
+
+        now = timezone.now()
+        mac_address = normalize_mac_address(mac_address)
+        values = {
+            "license_key": str(uuid.uuid4()),
+            "software_id": software_id,
+            "customer_email": customer_email,
+            "machine_id": machine_id,
+            "mac_address": mac_address,
+            "fingerprint": license_fingerprint(machine_id, mac_address, software_id),
+            "duration_days": duration_days,
+            "activated_at": now,
+            "expires_at": now + timedelta(days=duration_days),
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        opts = self.model._meta
+        fields = {field.attname: field for field in opts.concrete_fields}
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(fields[name].column) for name in values)
+        placeholders = ", ".join(["%s"] * len(values))
+        updates = ", ".join(
+            f"{qn(fields[name].column)} = EXCLUDED.{qn(fields[name].column)}"
+            for name in self.ACTIVATION_UPDATE_FIELDS
+        )
+        # คอลัมน์ที่ไม่ถูกเขียนทับเมื่อเป็นการอัพเดท อ่านค่าจริงของแถวกลับมา
+        returning = [opts.pk, fields["license_key"], fields["created_at"]]
+        sql = (
+            f"INSERT INTO {qn(opts.db_table)} ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({qn(fields['fingerprint'].column)}) DO UPDATE SET {updates} "
+            f"RETURNING {', '.join(qn(field.column) for field in returning)}"
+        )
+        params = [
+            fields[name].get_db_prep_save(value, connection)
+            for name, value in values.items()
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        pk, license_key, created_at = _from_returning(connection, opts.db_table, returning, row)
+
+        # ถ้า license_key ที่ได้กลับมาไม่ใช่ค่าที่เพิ่งสร้าง แปลว่าเป็นการอัพเดท
+        created = license_key == values["license_key"]
+        values.update({opts.pk.attname: pk, "license_key": license_key, "created_at": created_at})
+
+        field_names = [f.attname for f in opts.concrete_fields if f.attname in values]
+        license = self.model.from_db(db, field_names, [values[name] for name in field_names])
+        invalidate_license(license)
+        return license, created
+
+    def renew(self, machine_id, mac_address, software_id, duration_days):
+        """
+        ต่ออายุ License ด้วย UPDATE คำสั่งเดียว:
+        expires_at = GREATEST(expires_at, now) + duration_days ... RETURNING
+
+        ถ้า License หมดอายุแล้วจะเริ่มนับใหม่จากวันนี้ (activated_at = now)
+        คืนค่า License ที่ต่ออายุแล้ว หรือ None ถ้าไม่พบ License
+        """
+        from .cache import invalidate_license
+
+        db = router.db_for_write(self.model)
+        connection = connections[db]
+        now = timezone.now()
+        queryset = self.using(db).filter(
+            fingerprint=license_fingerprint(machine_id, mac_address, software_id)
+        )
+        current_expiry = Coalesce(F("expires_at"), Value(now))
+        values = {
+            "activated_at": Case(
+                When(expires_at__lt=now, then=Value(now)),
+                default=F("activated_at"),
+            ),
+            "expires_at": Greatest(current_expiry, Value(now))
+            + Value(timedelta(days=duration_days)),
+            "duration_days": duration_days,
+            "is_active": True,
+            "updated_at": now,
+        }
+
+        if not connection.features.can_return_columns_from_insert:
+            # database ไม่รองรับ RETURNING: UPDATE แบบ atomic แล้วค่อยอ่านกลับ
+            if not queryset.update(**values):
+                return None
+            license = queryset.get()
+        else:
+            opts = self.model._meta
+            query = queryset.query.chain(UpdateQuery)
+            query.add_update_values(values)
+            update_sql, params = query.get_compiler(db).as_sql()
+
+            # คอลัมน์ที่อ่านกลับ (เรียงตาม concrete_fields ตามที่ from_db ต้องการ)
+            fields = [
+                field
+                for field in opts.concrete_fields
+                if field.name not in self.RENEW_DEFERRED_FIELDS
+            ]
+            qn = connection.ops.quote_name
+            returning = ", ".join(qn(field.column) for field in fields)
+            with connection.cursor() as cursor:
+                cursor.execute(f"{update_sql} RETURNING {returning}", params)
+                row = cursor.fetchone()
+            if row is None:
+                return None
+
+            values = _from_returning(connection, opts.db_table, fields, row)
+            license = self.model.from_db(db, [field.attname for field in fields], values)
+
+        invalidate_license(license)
+        return license
+
+    def _upsert_activation_fallback(
+        self, software_id, customer_email, machine_id, mac_address, duration_days
+    ):
+        with transaction.atomic():
+            license = (
+                self.select_for_update()
+                .filter(fingerprint=license_fingerprint(machine_id, mac_address, software_id))
+                .first()
+            )
+            if license is None:
+                license = self.create(
+                    software_id=software_id,
+                    customer_email=customer_email,
+                    machine_id=machine_id,
+                    mac_address=mac_address,
+                    duration_days=duration_days,
+                    activated_at=timezone.now(),
+                    is_active=True,
+                )
+                return license, True
+
+            license.customer_email = customer_email
+            license.duration_days = duration_days
+            license.activated_at = timezone.now()
+            license.expires_at = timezone.now() + timedelta(days=duration_days)
+            license.is_active = True
+            license.save()
+            return license, False
+
+
 class License(models.Model):
     """Model สำหรับเก็บข้อมูล License"""
 
@@ -42,6 +267,14 @@ class License(models.Model):
     # ข้อมูล Hardware
     machine_id = models.CharField(max_length=255, verbose_name="Machine ID")
     mac_address = models.CharField(max_length=17, verbose_name="MAC Address")
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Machine Fingerprint",
+    )
 
     # ข้อมูลระยะเวลา
     duration_days = models.IntegerField(verbose_name="ระยะเวลา (วัน)")
@@ -60,14 +293,51 @@ class License(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="วันที่อัพเดท")
     notes = models.TextField(blank=True, null=True, verbose_name="หมายเหตุ")
 
+    objects = LicenseManager()
+
     class Meta:
         verbose_name = "License"
         verbose_name_plural = "Licenses"
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["license_key"]),
-            models.Index(fields=["machine_id", "mac_address"]),
             models.Index(fields=["expires_at"]),
+            # cursor pagination ของ /api/licenses/
+            models.Index(fields=["created_at", "id"]),
+            # ?software_id= (API) และตัวกรอง software ใน admin เรียงตามวันที่สร้าง
+            models.Index(fields=["software", "created_at", "id"]),
+            # ?active_only=true (is_active และ expires_at > now) แยกและไม่แยกซอฟต์แวร์
+            models.Index(
+                fields=["software", "expires_at"],
+                condition=Q(is_active=True),
+                name="license_active_sw_expiry_idx",
+            ),
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(is_active=True),
+                name="license_active_expiry_idx",
+            ),
+            # ?email= (customer_email__iexact ใช้ UPPER(customer_email))
+            models.Index(Upper("customer_email"), name="license_email_upper_idx"),
+            # ค้นหาใน admin ด้วย MAC Address แบบตรงตัว (search.exact_license_q)
+            models.Index(fields=["mac_address"], name="license_mac_idx"),
+            # ค้นหาใน admin: icontains คือ UPPER(col) LIKE '%...%' ใช้ pg_trgm (PostgreSQL เท่านั้น)
+            GinIndex(
+                OpClass(Upper("license_key"), name="gin_trgm_ops"),
+                name="license_key_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("customer_email"), name="gin_trgm_ops"),
+                name="license_email_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("machine_id"), name="gin_trgm_ops"),
+                name="license_machine_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("mac_address"), name="gin_trgm_ops"),
+                name="license_mac_trgm_idx",
+            ),
         ]
 
     def __str__(self):
@@ -91,14 +361,83 @@ class License(models.Model):
         return delta.days
 
     def save(self, *args, **kwargs):
-        """Override save เพื่อคำนวณวันหมดอายุอัตโนมัติ"""
+        """
+        Override save เพื่อคำนวณวันหมดอายุและ fingerprint อัตโนมัติ
+        (cache ถูกล้างใน license/signals.py ซึ่งครอบคลุม queryset.delete() และ cascade ด้วย)
+        """
         if not self.expires_at:
             self.expires_at = self.activated_at + timedelta(days=self.duration_days)
+        self.mac_address = normalize_mac_address(self.mac_address)
+        fingerprint = license_fingerprint(self.machine_id, self.mac_address, self.software_id)
+        if self._is_legacy_duplicate() and self._fingerprint_taken(fingerprint):
+            # License ซ้ำของเครื่องเดียวกัน (migration 0006) คง fingerprint เป็น NULL ไว้
+            fingerprint = None
+        self.fingerprint = fingerprint
         super().save(*args, **kwargs)
 
+    def clean(self):
+        """แจ้ง error ในฟอร์มแทน IntegrityError เมื่อมี License ของเครื่องและซอฟต์แวร์นี้อยู่แล้ว"""
+        if self.software_id is None or not self.machine_id or not self.mac_address:
+            return
+        if self._is_legacy_duplicate():
+            return
+        fingerprint = license_fingerprint(
+            self.machine_id, normalize_mac_address(self.mac_address), self.software_id
+        )
+        if self._fingerprint_taken(fingerprint):
+            raise ValidationError(
+                "มี License ของเครื่องนี้ (Machine ID และ MAC Address) สำหรับซอฟต์แวร์นี้อยู่แล้ว"
+            )
+
+    def _is_legacy_duplicate(self):
+        # แถวเดิมใน DB ที่ไม่มี fingerprint คือ License ซ้ำที่ migration 0006 ไม่ได้ให้ fingerprint
+        return not self._state.adding and self.fingerprint is None
+
+    def _fingerprint_taken(self, fingerprint):
+        return License.objects.filter(fingerprint=fingerprint).exclude(pk=self.pk).exists()
+
+
+class UserAgent(models.Model):
+    """
+    ข้อความ User Agent ที่ไม่ซ้ำกัน (ActivationLog อ้างถึงด้วย id แทนการเก็บข้อความทุกแถว)
+    ดู license/useragents.py
+    """
+
+    id = models.AutoField(primary_key=True)
+    # SHA-256 ของ value (unique index บนข้อความยาวไม่จำกัดไม่ได้ใน PostgreSQL)
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    value = models.TextField(verbose_name="User Agent")
+
+    class Meta:
+        verbose_name = "User Agent"
+        verbose_name_plural = "User Agents"
+
+    def __str__(self):
+        return self.value
+
+
+class ActivationLogManager(models.Manager):
+    """Manager ของ ActivationLog"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """แปลง user_agent เป็น UserAgent ก่อน insert (bulk_create ไม่เรียก save())"""
+        from .useragents import intern_user_agents
+
+        objs = list(objs)
+        intern_user_agents(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class ActivationLog(models.Model):
-    """Model สำหรับบันทึก Log การ Activate และ Validate"""
+    """
+    Model สำหรับบันทึก Log การ Activate และ Validate
+
+    บน PostgreSQL ตารางถูกแบ่ง partition รายเดือนตาม created_at (migration 0013,
+    license/partitions.py) primary key ใน DB คือ (id, created_at)
+
+    user_agent เป็น property: ข้อความถูกเก็บครั้งเดียวใน UserAgent และแปลง
+    ข้อความ ↔ id ผ่าน cache ของ worker (license/useragents.py)
+    """
 
     ACTION_CHOICES = [
         ("activate", "Activate"),
@@ -116,15 +455,211 @@ class ActivationLog(models.Model):
     ip_address = models.GenericIPAddressField(
         null=True, blank=True, verbose_name="IP Address"
     )
-    user_agent = models.TextField(blank=True, null=True, verbose_name="User Agent")
+    # ไม่สร้าง index (ไม่มีการค้นหา log ตาม User Agent และ UserAgent ไม่ถูกลบ)
+    agent = models.ForeignKey(
+        UserAgent,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="+",
+        verbose_name="User Agent",
+    )
     success = models.BooleanField(default=True, verbose_name="สำเร็จ")
     error_message = models.TextField(blank=True, null=True, verbose_name="ข้อความ Error")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="วันที่บันทึก")
+    # ใช้ default แทน auto_now_add เพื่อเก็บเวลาที่เกิดเหตุการณ์จริง (log ถูกบันทึกแบบ bulk ภายหลัง)
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="วันที่บันทึก")
+
+    objects = ActivationLogManager()
+
+    # ข้อความ User Agent ที่ยังไม่ได้แปลงเป็น agent_id หรืออ่านจาก cache แล้ว
+    _user_agent = None
 
     class Meta:
         verbose_name = "Activation Log"
         verbose_name_plural = "Activation Logs"
         ordering = ["-created_at"]
+        indexes = [
+            # cursor pagination ของ /api/logs/ (ทั้งหมด และกรองตาม license_id)
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["license", "created_at", "id"]),
+            # ?action= (API) และตัวกรอง action ใน admin
+            models.Index(fields=["action", "created_at", "id"]),
+            # ค้นหาใน admin ด้วย IP Address แบบตรงตัว (search.search_activation_logs)
+            models.Index(fields=["ip_address", "created_at", "id"], name="license_log_ip_idx"),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.license.software.name} - {self.created_at}"
+
+    @property
+    def user_agent(self):
+        """ข้อความ User Agent (None ถ้าไม่ได้บันทึก)"""
+        if self._user_agent is None and self.agent_id is not None:
+            from .useragents import get_user_agent
+
+            self._user_agent = get_user_agent(self.agent_id)
+        return self._user_agent
+
+    @user_agent.setter
+    def user_agent(self, value):
+        self._user_agent = value
+        self.agent_id = None
+
+    def save(self, *args, **kwargs):
+        """Override save เพื่อแปลง user_agent เป็น UserAgent"""
+        from .useragents import intern_user_agents
+
+        intern_user_agents([self])
+        super().save(*args, **kwargs)
+
+
+class ValidateRollup(models.Model):
+    """
+    ผลรวมการ validate ที่สำเร็จของ License หนึ่งในหนึ่งชั่วโมง (UTC)
+    ใช้แทน ActivationLog ทีละแถวเมื่อ LOG_VALIDATE_ROLLUP เปิดอยู่ ดู license/rollups.py
+    """
+
+    license = models.ForeignKey(
+        License,
+        on_delete=models.CASCADE,
+        related_name="validate_rollups",
+        verbose_name="License",
+    )
+    hour = models.DateTimeField(verbose_name="ชั่วโมง")
+    count = models.IntegerField(default=0, verbose_name="จำนวนครั้ง")
+    # IP Address ที่ไม่ซ้ำกัน เก็บไม่เกิน rollups.MAX_IP_ADDRESSES รายการ
+    ip_addresses = models.JSONField(default=list, blank=True, verbose_name="IP Addresses")
+    distinct_ips = models.IntegerField(default=0, verbose_name="จำนวน IP")
+    first_seen = models.DateTimeField(null=True, blank=True, verbose_name="ครั้งแรก")
+    last_seen = models.DateTimeField(null=True, blank=True, verbose_name="ครั้งล่าสุด")
+
+    class Meta:
+        verbose_name = "Validate Rollup"
+        verbose_name_plural = "Validate Rollups"
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(fields=["license", "hour"], name="validate_rollup_license_hour"),
+        ]
+        indexes = [
+            # cursor pagination ของ /api/logs/hourly/ (กรองตาม license ใช้ unique constraint)
+            models.Index(fields=["hour", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.license_id} @ {self.hour}: {self.count}"
+
+
+class LicenseCounter(models.Model):
+    """
+    จำนวน License ของแต่ละซอฟต์แวร์ (ใช้แทน COUNT ทั้งตาราง)
+
+    ถูกอัพเดทโดย database trigger ทุกครั้งที่ License ถูกเพิ่ม แก้ไข หรือลบ
+    (ใน transaction เดียวกัน) ดู migration 0011_licensecounter
+    valid นับ License ที่ยังไม่หมดอายุ ณ เวลาที่แถวถูกเขียน License ที่หมดอายุเอง
+    ระหว่างนั้นจะถูกแก้ให้ถูกต้องโดย ``manage.py reconcile_license_counters``
+    """
+
+    software = models.OneToOneField(
+        SoftwareName,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="license_counter",
+        verbose_name="ซอฟต์แวร์",
+    )
+    total = models.IntegerField(default=0, db_default=0, verbose_name="ทั้งหมด")
+    active = models.IntegerField(default=0, db_default=0, verbose_name="เปิดใช้งาน")
+    valid = models.IntegerField(default=0, db_default=0, verbose_name="ใช้งานได้")
+    reconciled_at = models.DateTimeField(null=True, blank=True, verbose_name="ตรวจสอบล่าสุด")
+
+    class Meta:
+        verbose_name = "License Counter"
+        verbose_name_plural = "License Counters"
+
+    def __str__(self):
+        return f"{self.software_id}: {self.valid} / {self.active} / {self.total}"
+
+
+class BulkAction(models.Model):
+    """
+    งาน bulk action ของ admin (เปิด/ปิดใช้งาน/ต่ออายุ License จำนวนมาก)
+    ทำงานเบื้องหลังทีละ chunk ดู license/bulk.py
+
+    selection เป็น pickle ของ QuerySet.query ซึ่งไม่รับประกันว่าอ่านได้ข้ามเวอร์ชันของ Django
+    งานที่ค้างอยู่ก่อนอัพเกรด Django อาจทำต่อไม่ได้ (resume_bulk_actions จะปิดเป็นล้มเหลว)
+    """
+
+    ACTION_CHOICES = [
+        ("activate", "เปิดใช้งาน"),
+        ("deactivate", "ปิดใช้งาน"),
+        ("extend", "ต่ออายุ"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "รอดำเนินการ"),
+        ("running", "กำลังดำเนินการ"),
+        ("done", "เสร็จสิ้น"),
+        ("failed", "ล้มเหลว"),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name="การกระทำ")
+    days = models.IntegerField(null=True, blank=True, verbose_name="จำนวนวัน")
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="pending", verbose_name="สถานะ"
+    )
+    total = models.IntegerField(null=True, blank=True, verbose_name="ทั้งหมด")
+    processed = models.IntegerField(default=0, verbose_name="ดำเนินการแล้ว")
+    changed = models.IntegerField(default=0, verbose_name="เปลี่ยนแปลง")
+    # primary key ล่าสุดที่ทำเสร็จแล้ว (chunk ถัดไปเริ่มจาก pk > last_pk)
+    last_pk = models.BigIntegerField(default=0, verbose_name="PK ล่าสุด")
+    # query ของ License ที่เลือก (pickle ของ QuerySet.query) ใช้ทำงานที่ค้างต่อจาก last_pk
+    selection = models.BinaryField(null=True, editable=False, verbose_name="License ที่เลือก")
+    error = models.TextField(blank=True, default="", verbose_name="ข้อความ Error")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="ผู้สั่ง",
+    )
+    ip_address = models.GenericIPAddressField(
+        null=True, blank=True, verbose_name="IP Address"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="วันที่สร้าง")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="วันที่อัพเดท")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="วันที่เสร็จ")
+
+    class Meta:
+        verbose_name = "Bulk Action"
+        verbose_name_plural = "Bulk Actions"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_action_display()} ({self.get_status_display()})"
+
+
+class SigningKey(models.Model):
+    """Model สำหรับเก็บ Ed25519 key ที่ใช้ลงนาม offline license token"""
+
+    kid = models.CharField(max_length=32, unique=True, verbose_name="Key ID")
+    private_key = models.TextField(verbose_name="Private Key (PEM)")
+    public_key = models.CharField(max_length=64, verbose_name="Public Key (base64url)")
+    is_active = models.BooleanField(default=True, verbose_name="ใช้ลงนาม")
+    is_published = models.BooleanField(default=True, verbose_name="เผยแพร่ Public Key")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="วันที่สร้าง")
+
+    class Meta:
+        verbose_name = "Signing Key"
+        verbose_name_plural = "Signing Keys"
+        ordering = ["-created_at"]
+        constraints = [
+            # ใช้ลงนามได้ครั้งละหนึ่ง key (กันหลาย worker สร้าง key แรกพร้อมกัน)
+            models.UniqueConstraint(
+                fields=["is_active"],
+                condition=Q(is_active=True),
+                name="signing_key_single_active",
+            ),
+        ]
+
+    def __str__(self):
+        return self.kid
@@ -0,0 +1,118 @@
+"""
+Migration operations ที่ไม่ lock ตารางระหว่างสร้าง index
+
+บน PostgreSQL ใช้ CREATE/DROP INDEX CONCURRENTLY ทำให้ตารางที่มีข้อมูลจำนวนมาก
+ยังอ่านและเขียนได้ตามปกติระหว่าง migrate (migration ต้องตั้ง ``atomic = False``)
+database อื่น (เช่น SQLite ตอน development) จะสร้าง index แบบปกติ
+และข้าม index เฉพาะของ PostgreSQL (GinIndex ฯลฯ) ไป
+
+ต่างจาก ``django.contrib.postgres.operations.AddIndexConcurrently``
+ตรงที่ใช้ได้กับทุก database จึงไม่ต้องแยก migration ตาม environment
+
+ตารางที่เป็น partitioned table (ActivationLog) สร้าง index แบบ CONCURRENTLY ที่ตารางแม่ไม่ได้
+จึงสร้าง index บนตารางแม่ด้วย ON ONLY แล้วสร้างทีละ partition แบบ CONCURRENTLY
+และ ATTACH เข้ากับ index ของตารางแม่
+"""
+
+from django.contrib.postgres.indexes import PostgresIndex
+from django.db.migrations.operations import AddIndex, RemoveIndex
+
+
+def _concurrently(schema_editor):
+    return {"concurrently": True} if schema_editor.connection.vendor == "postgresql" else {}
+
+
+def _supported(schema_editor, index):
+    return schema_editor.connection.vendor == "postgresql" or not isinstance(index, PostgresIndex)
+
+
+def _partitions(schema_editor, model):
+    """ชื่อ partition ของตาราง หรือ None ถ้าไม่ใช่ partitioned table"""
+    if schema_editor.connection.vendor != "postgresql":
+        return None
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+        if not row or row[0] != "p":
+            return None
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [model._meta.db_table],
+        )
+        return [name for name, in cursor.fetchall()]
+
+
+def _add_index(schema_editor, model, index):
+    partitions = _partitions(schema_editor, model)
+    if partitions is None:
+        schema_editor.add_index(model, index, **_concurrently(schema_editor))
+        return
+
+    qn = schema_editor.quote_name
+    table = qn(model._meta.db_table)
+    sql = str(index.create_sql(model, schema_editor))
+    schema_editor.execute(sql.replace(f" ON {table}", f" ON ONLY {table}", 1), params=None)
+    for partition in partitions:
+        name = schema_editor._create_index_name(partition, [index.name], suffix="idx")
+        partition_sql = str(index.create_sql(model, schema_editor, concurrently=True))
+        partition_sql = partition_sql.replace(f" ON {table}", f" ON {qn(partition)}", 1)
+        partition_sql = partition_sql.replace(qn(index.name), qn(name), 1)
+        schema_editor.execute(partition_sql, params=None)
+        schema_editor.execute(f"ALTER INDEX {qn(index.name)} ATTACH PARTITION {qn(name)}", params=None)
+
+
+def _remove_index(schema_editor, model, index):
+    # DROP INDEX CONCURRENTLY ใช้กับ index ของ partitioned table ไม่ได้
+    concurrently = _concurrently(schema_editor) if _partitions(schema_editor, model) is None else {}
+    schema_editor.remove_index(model, index, **concurrently)
+
+
+class AddIndexConcurrently(AddIndex):
+    """AddIndex ที่ใช้ CREATE INDEX CONCURRENTLY บน PostgreSQL"""
+
+    atomic = False
+
+    def describe(self):
+        return f"Concurrently {super().describe().lower()}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model) and _supported(
+            schema_editor, self.index
+        ):
+            _add_index(schema_editor, model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model) and _supported(
+            schema_editor, self.index
+        ):
+            _remove_index(schema_editor, model, self.index)
+
+
+class RemoveIndexConcurrently(RemoveIndex):
+    """RemoveIndex ที่ใช้ DROP INDEX CONCURRENTLY บน PostgreSQL"""
+
+    atomic = False
+
+    def describe(self):
+        return f"Concurrently {super().describe().lower()}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            from_model_state = from_state.models[app_label, self.model_name_lower]
+            index = from_model_state.get_index_by_name(self.name)
+            if _supported(schema_editor, index):
+                _remove_index(schema_editor, model, index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            to_model_state = to_state.models[app_label, self.model_name_lower]
+            index = to_model_state.get_index_by_name(self.name)
+            if _supported(schema_editor, index):
+                _add_index(schema_editor, model, index)
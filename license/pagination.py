@@ -0,0 +1,112 @@
+"""
+Pagination สำหรับตารางขนาดใหญ่ (License, ActivationLog)
+
+ใช้ cursor (keyset) ตาม (created_at, id) แทน page number ทำให้ทุกหน้ามีต้นทุนเท่ากัน
+ไม่มี OFFSET ลึก ๆ และไม่ COUNT(*) ทุก request
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+def estimated_count(queryset, limit=None):
+    """
+    จำนวนแถวของ queryset คืนค่า (count, is_estimated)
+    queryset ที่ไม่มีเงื่อนไขบน PostgreSQL ใช้ค่าประมาณจาก pg_class.reltuples (ไม่ scan ตาราง)
+    ถ้าระบุ limit จะนับไม่เกิน limit แถว (คืนค่า limit และ is_estimated=True ถ้ามีมากกว่านั้น)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind, reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            row = cursor.fetchone()
+            # partitioned table (ActivationLog) ไม่มี reltuples ของตัวเอง ใช้ผลรวมของทุก partition
+            # (partition ล่วงหน้าที่ยังว่างและไม่เคยถูก ANALYZE นับเป็น 0)
+            if row and row[0] == "p":
+                cursor.execute(
+                    "SELECT CASE WHEN max(c.reltuples) < 0 THEN -1"
+                    " ELSE coalesce(sum(greatest(c.reltuples, 0)), 0) END::bigint"
+                    " FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+                    " WHERE i.inhparent = %s::regclass",
+                    [table],
+                )
+                row = (row[0], cursor.fetchone()[0])
+        # reltuples เป็น -1 ถ้าตารางยังไม่เคยถูก ANALYZE
+        if row and row[1] >= 0:
+            return row[1], True
+    if limit is not None:
+        count = queryset.order_by()[: limit + 1].count()
+        return min(count, limit), count > limit
+    return queryset.count(), False
+
+
+class CappedCount(int):
+    """จำนวนแถวที่นับถึงเพดานแล้ว (มีมากกว่านี้) แสดงใน template เป็น 10000+"""
+
+    def __str__(self):
+        return f"{int(self)}+"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator สำหรับ Django admin ที่ไม่ COUNT(*) ทั้งตาราง
+    ไม่มีตัวกรอง: ใช้ reltuples บน PostgreSQL, มีตัวกรอง: นับไม่เกิน count_limit แถว
+    ถัดจากหน้าที่เปิดอยู่ (page_number) จึงเลื่อนไปหน้าที่เลยเพดานได้เสมอ
+    """
+
+    count_limit = 10000
+
+    def __init__(self, *args, page_number=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_number = max(page_number, 1)
+
+    @cached_property
+    def count(self):
+        limit = self.count_limit + (self.page_number - 1) * self.per_page
+        count, is_estimated = estimated_count(self.object_list, limit=limit)
+        if is_estimated and count == limit:
+            return CappedCount(count)
+        return count
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination เรียงจากใหม่ไปเก่าตาม (created_at, id)
+    ?page_size=N เปลี่ยนจำนวนต่อหน้า, ?count=true เพิ่มจำนวนทั้งหมด (ประมาณได้) ใน response
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "true":
+            self.count = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            count, is_estimated = self.count
+            response.data = {"count": count, "count_estimated": is_estimated, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count"] = {"type": "integer", "example": 123}
+        schema["properties"]["count_estimated"] = {"type": "boolean"}
+        return schema
+
+
+class HourCursorPagination(CreatedAtCursorPagination):
+    """Cursor pagination ของ ValidateRollup เรียงจากชั่วโมงล่าสุด"""
+
+    ordering = ("-hour", "-id")
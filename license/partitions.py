@@ -0,0 +1,184 @@
+"""
+จัดการ partition รายเดือนของตาราง ActivationLog (PostgreSQL)
+
+ตาราง license_activationlog เป็น partitioned table (PARTITION BY RANGE (created_at))
+ดู migration 0013 แต่ละเดือนเป็น partition ชื่อ license_activationlog_pYYYY_MM
+และมี partition DEFAULT รับแถวที่ไม่มี partition ของเดือนนั้น (ไม่ควรมี ถ้าสร้างล่วงหน้าไว้)
+
+- ensure_partitions() สร้าง partition ของเดือนปัจจุบันและเดือนถัดไปล่วงหน้า
+- prune_partitions() ลบ (DROP) หรือแยก (DETACH) partition ที่เก่ากว่า retention ทั้งก้อน
+  ทันที แทนการ DELETE ทีละแถว
+
+เดือนนับตาม TIME_ZONE ของระบบ
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivationLog
+
+PARTITION_PREFIX = f"{ActivationLog._meta.db_table}_p"
+DEFAULT_PARTITION = f"{ActivationLog._meta.db_table}_default"
+
+_BOUND_PATTERN = re.compile(r"FROM \((?P<lower>[^)]+)\) TO \((?P<upper>[^)]+)\)")
+
+
+@dataclass
+class Partition:
+    """partition หนึ่งตัว (lower/upper เป็น None ถ้าไม่มีขอบเขต เช่น MINVALUE หรือ DEFAULT)"""
+
+    name: str
+    lower: datetime = None
+    upper: datetime = None
+    is_default: bool = False
+
+
+def month_start(value):
+    """วันที่ 1 เวลา 00:00 ของเดือนของ value (ตาม TIME_ZONE)"""
+    value = timezone.localtime(value)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start):
+    return f"{PARTITION_PREFIX}{start:%Y_%m}"
+
+
+def is_partitioned():
+    """ตาราง ActivationLog เป็น partitioned table หรือไม่"""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [ActivationLog._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def _parse_bound(value):
+    value = value.strip()
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return parse_datetime(value.strip("'"))
+
+
+def list_partitions():
+    """partition ทั้งหมดของ ActivationLog เรียงตามช่วงเวลา"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [ActivationLog._meta.db_table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound)
+        if match is None:
+            partitions.append(Partition(name, is_default=True))
+        else:
+            partitions.append(
+                Partition(name, _parse_bound(match["lower"]), _parse_bound(match["upper"]))
+            )
+    return sorted(
+        partitions,
+        key=lambda p: (p.is_default, p.lower or datetime.min.replace(tzinfo=dt_timezone.utc)),
+    )
+
+
+def _overlaps(partition, start, end):
+    if partition.is_default:
+        return False
+    return (partition.lower is None or partition.lower < end) and (
+        partition.upper is None or partition.upper > start
+    )
+
+
+def create_partition(start, end):
+    """สร้าง partition ช่วง [start, end) ย้ายแถวที่ตกไปอยู่ใน DEFAULT partition มาด้วย"""
+    qn = connection.ops.quote_name
+    table = qn(ActivationLog._meta.db_table)
+    name = partition_name(start)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        has_default = cursor.fetchone()[0]
+        if has_default:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)}"
+                " WHERE created_at >= %s AND created_at < %s)",
+                [start, end],
+            )
+            has_default = cursor.fetchone()[0]
+
+        if not has_default:
+            cursor.execute(f"CREATE TABLE {qn(name)} PARTITION OF {table} FOR VALUES {bounds}")
+            return name
+
+        # มีแถวของเดือนนี้อยู่ใน DEFAULT: ย้ายไปตารางใหม่ก่อน ATTACH
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)}"
+            " WHERE created_at >= %s AND created_at < %s RETURNING *)"
+            f" INSERT INTO {qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {qn(name)} FOR VALUES {bounds}")
+    return name
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """สร้าง partition ของเดือนปัจจุบันถึง months_ahead เดือนข้างหน้าที่ยังไม่มี"""
+    start = month_start(now or timezone.now())
+    partitions = list_partitions()
+    created = []
+    for offset in range(months_ahead + 1):
+        lower = add_months(start, offset)
+        upper = add_months(start, offset + 1)
+        if not any(_overlaps(partition, lower, upper) for partition in partitions):
+            created.append(create_partition(lower, upper))
+    return created
+
+
+def expired_partitions(cutoff):
+    """partition ที่ทุกแถวเก่ากว่า cutoff (ไม่รวม DEFAULT)"""
+    return [
+        partition
+        for partition in list_partitions()
+        if not partition.is_default and partition.upper is not None and partition.upper <= cutoff
+    ]
+
+
+def prune_partitions(cutoff, detach=False):
+    """
+    DETACH partition ที่เก่ากว่า cutoff แล้ว DROP (หรือเก็บไว้เป็นตารางแยกถ้า detach=True)
+    คืนค่ารายชื่อ partition ที่ถูกแยกออก
+    """
+    qn = connection.ops.quote_name
+    table = qn(ActivationLog._meta.db_table)
+    pruned = []
+    for partition in expired_partitions(cutoff):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {qn(partition.name)}")
+            if not detach:
+                cursor.execute(f"DROP TABLE {qn(partition.name)}")
+        pruned.append(partition.name)
+    return pruned
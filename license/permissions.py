@@ -34,11 +34,16 @@ class HasStaticAPIKey(permissions.BasePermission):
         # Get token from header or query parameter
         api_key = request.headers.get('X-API-TOKEN') or request.query_params.get('token')
 
-        if not api_key:
-            return False
+        return is_valid_static_api_key(api_key)
 
-        if not settings.API_TOKEN:
-            return False
 
-        # Simple string comparison for static key
-        return api_key == settings.API_TOKEN
+def is_valid_static_api_key(api_key):
+    """Check a static API key against settings.API_TOKEN (shared with async views)."""
+    if not api_key:
+        return False
+
+    if not settings.API_TOKEN:
+        return False
+
+    # Simple string comparison for static key
+    return api_key == settings.API_TOKEN
@@ -0,0 +1,142 @@
+"""
+รวมการ validate ที่สำเร็จเป็นแถวรายชั่วโมงต่อ License (ValidateRollup)
+
+ActivationLog เกือบทั้งหมดคือ validate ที่สำเร็จซึ่งไม่มีใครอ่านทีละแถว เมื่อเปิด
+LOG_VALIDATE_ROLLUP log เหล่านี้จะถูกรวมในหน่วยความจำ (ใน ActivationLogBuffer)
+เป็น จำนวนครั้ง, IP ที่ไม่ซ้ำ, ครั้งแรก/ล่าสุด ต่อ (License, ชั่วโมง) แล้วบันทึกทีละชุด
+validate ที่ไม่สำเร็จ และ activate/renew/revoke ยังบันทึกเป็น ActivationLog ตามเดิม
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import License, ValidateRollup
+
+# จำนวน IP Address ที่ไม่ซ้ำสูงสุดที่เก็บต่อแถว (distinct_ips จะไม่เกินค่านี้)
+MAX_IP_ADDRESSES = 100
+
+
+@dataclass
+class Rollup:
+    """ผลรวมที่ยังไม่ได้บันทึกของ (License, ชั่วโมง) หนึ่งคู่"""
+
+    count: int = 0
+    ip_addresses: dict = field(default_factory=dict)
+    first_seen: datetime = None
+    last_seen: datetime = None
+
+    def add(self, log):
+        self.count += 1
+        if log.ip_address and len(self.ip_addresses) < MAX_IP_ADDRESSES:
+            self.ip_addresses[log.ip_address] = None
+        if self.first_seen is None or log.created_at < self.first_seen:
+            self.first_seen = log.created_at
+        if self.last_seen is None or log.created_at > self.last_seen:
+            self.last_seen = log.created_at
+
+    def merge(self, other):
+        self.count += other.count
+        for ip_address in other.ip_addresses:
+            if len(self.ip_addresses) >= MAX_IP_ADDRESSES:
+                break
+            self.ip_addresses[ip_address] = None
+        self.first_seen = min(filter(None, [self.first_seen, other.first_seen]), default=None)
+        self.last_seen = max(filter(None, [self.last_seen, other.last_seen]), default=None)
+
+
+def is_rollup(log):
+    """log นี้ถูกรวมเป็น ValidateRollup แทนการบันทึกทีละแถวหรือไม่"""
+    return settings.LOG_VALIDATE_ROLLUP and log.action == "validate" and log.success
+
+
+def hour_of(value):
+    """ต้นชั่วโมง (UTC) ของเวลา"""
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def accumulate(pending, logs):
+    """เพิ่ม log เข้า pending ({(license_id, hour): Rollup}) คืนค่า pending"""
+    for log in logs:
+        key = (log.license_id, hour_of(log.created_at))
+        pending.setdefault(key, Rollup()).add(log)
+    return pending
+
+
+def merge(pending, other):
+    """รวม other ({(license_id, hour): Rollup}) เข้า pending คืนค่า pending"""
+    for key, rollup in other.items():
+        if key in pending:
+            pending[key].merge(rollup)
+        else:
+            pending[key] = rollup
+    return pending
+
+
+def write_rollups(pending):
+    """
+    บันทึก pending ลง ValidateRollup (เพิ่มค่าในแถวเดิมของชั่วโมงนั้น)
+    สร้างแถวที่ยังไม่มีด้วย ON CONFLICT DO NOTHING แล้ว lock ทุกแถวตามลำดับเดียวกัน
+    ทำให้หลาย worker บันทึกชั่วโมงเดียวกันพร้อมกันได้โดยไม่นับหาย
+    ข้าม License ที่ถูกลบไปแล้ว (ON CONFLICT ไม่ครอบคลุม foreign key)
+    """
+    if not pending:
+        return 0
+
+    try:
+        return _write_rollups(pending)
+    except IntegrityError:
+        # License ถูกลบระหว่างบันทึก (foreign key ถูกตรวจตอน commit) กรองใหม่แล้วลองอีกครั้ง
+        return _write_rollups(pending)
+
+
+def _write_rollups(pending):
+    existing = set(
+        License.objects.filter(pk__in={license_id for license_id, _ in pending}).values_list(
+            "pk", flat=True
+        )
+    )
+    keys = sorted(key for key in pending if key[0] in existing)
+    if not keys:
+        return 0
+
+    with transaction.atomic():
+        ValidateRollup.objects.bulk_create(
+            [ValidateRollup(license_id=license_id, hour=hour) for license_id, hour in keys],
+            ignore_conflicts=True,
+        )
+        rows = {
+            (row.license_id, row.hour): row
+            for row in ValidateRollup.objects.select_for_update()
+            .filter(
+                license_id__in={license_id for license_id, _ in keys},
+                hour__in={hour for _, hour in keys},
+            )
+            .order_by("license_id", "hour")
+        }
+
+        updated = []
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                # License ถูกลบไปแล้ว
+                continue
+            rollup = pending[key]
+            ip_addresses = dict.fromkeys(row.ip_addresses)
+            for ip_address in rollup.ip_addresses:
+                if len(ip_addresses) >= MAX_IP_ADDRESSES:
+                    break
+                ip_addresses[ip_address] = None
+            row.count += rollup.count
+            row.ip_addresses = list(ip_addresses)
+            row.distinct_ips = len(ip_addresses)
+            row.first_seen = min(filter(None, [row.first_seen, rollup.first_seen]))
+            row.last_seen = max(filter(None, [row.last_seen, rollup.last_seen]))
+            updated.append(row)
+
+        ValidateRollup.objects.bulk_update(
+            updated, ["count", "ip_addresses", "distinct_ips", "first_seen", "last_seen"]
+        )
+    return sum(pending[(row.license_id, row.hour)].count for row in updated)
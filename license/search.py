@@ -0,0 +1,93 @@
+"""
+ค้นหา License และ ActivationLog สำหรับ Django admin
+
+- คำค้นที่เป็น UUID (license_key) หรือ MAC Address ใช้การเทียบแบบตรงตัว (btree index)
+- คำค้นอื่นใช้ icontains ซึ่งบน PostgreSQL ใช้ GIN index ของ pg_trgm
+  (UPPER(col) gin_trgm_ops ดู License.Meta.indexes) แทนการ scan ทั้งตาราง
+- ActivationLog ค้นหา License ก่อนแล้วกรอง Log ด้วย license_id IN (...)
+  ไม่ต้อง JOIN ทั้งสองตารางสำหรับทุกแถว
+  คำค้นที่เป็น IP Address ใช้ index (ip_address, created_at, id) ของทุก partition
+
+บน SQLite ไม่มี trigram index แต่ผลลัพธ์เหมือนกันทุกประการ
+"""
+
+import uuid
+from functools import reduce
+from ipaddress import ip_address
+from operator import and_, or_
+
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import License
+from .utils import MAC_ADDRESS_PATTERN, normalize_mac_address
+
+# คอลัมน์ของ License ที่ค้นหาแบบ icontains (มี trigram index)
+LICENSE_SEARCH_FIELDS = ["license_key", "customer_email", "machine_id", "mac_address"]
+
+
+def _terms(search_term):
+    """แยกคำค้นแบบเดียวกับ Django admin (รองรับ "ข้อความในเครื่องหมายคำพูด")"""
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            terms.append(bit)
+    return terms
+
+
+def exact_license_q(term):
+    """Q สำหรับคำค้นที่เป็น license_key (UUID) หรือ MAC Address หรือ None"""
+    try:
+        key = str(uuid.UUID(term))
+    except ValueError:
+        pass
+    else:
+        return Q(license_key__in={key, term})
+
+    if MAC_ADDRESS_PATTERN.match(term):
+        return Q(mac_address=normalize_mac_address(term))
+
+    return None
+
+
+def license_q(term):
+    """Q ของ License สำหรับคำค้นหนึ่งคำ"""
+    exact = exact_license_q(term)
+    if exact is not None:
+        return exact
+    return reduce(or_, [Q(**{f"{field}__icontains": term}) for field in LICENSE_SEARCH_FIELDS])
+
+
+def search_licenses(queryset, search_term):
+    """กรอง License ด้วยคำค้น (ทุกคำต้องตรง)"""
+    terms = _terms(search_term)
+    if not terms:
+        return queryset
+    return queryset.filter(reduce(and_, [license_q(term) for term in terms]))
+
+
+def _is_ip_address(term):
+    try:
+        ip_address(term)
+    except ValueError:
+        return False
+    return True
+
+
+def search_activation_logs(queryset, search_term):
+    """
+    กรอง ActivationLog ด้วยคำค้น: license_key, customer_email (ผ่าน License)
+    หรือ IP Address แบบตรงตัว
+    """
+    for term in _terms(search_term):
+        if _is_ip_address(term):
+            queryset = queryset.filter(ip_address=term)
+        else:
+            licenses = License.objects.filter(
+                exact_license_q(term)
+                or Q(license_key__icontains=term) | Q(customer_email__icontains=term)
+            )
+            queryset = queryset.filter(license__in=licenses.values("pk"))
+    return queryset
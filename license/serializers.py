@@ -1,10 +1,13 @@
 from rest_framework import serializers
-from .models import SoftwareName, License, ActivationLog
-from django.utils import timezone
-from datetime import timedelta
+from rest_framework.settings import api_settings
+from .models import SoftwareName, License, ActivationLog, ValidateRollup
+from . import catalog
+from .utils import MAC_ADDRESS_PATTERN, normalize_mac_address
+from .fieldsets import SparseFieldsetSerializerMixin
+from django.conf import settings
 
 
-class SoftwareNameSerializer(serializers.ModelSerializer):
+class SoftwareNameSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer สำหรับ SoftwareName"""
 
     class Meta:
@@ -12,13 +15,20 @@ class SoftwareNameSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description", "is_active"]
 
 
-class LicenseSerializer(serializers.ModelSerializer):
+class LicenseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer สำหรับ License"""
 
-    software_name = serializers.CharField(source="software.name", read_only=True)
+    software_name = serializers.SerializerMethodField()
     is_expired = serializers.SerializerMethodField()
     days_remaining = serializers.SerializerMethodField()
 
+    # fast path ของ list (queryset ผ่าน with_status() แล้ว)
+    values_fields = {
+        "software_name": (["software"], lambda row: catalog.get_software_name(row["software"])),
+        "is_expired": (["expired"], lambda row: row["expired"]),
+        "days_remaining": (["remaining"], lambda row: row["remaining"].days),
+    }
+
     class Meta:
         model = License
         fields = [
@@ -40,10 +50,18 @@ class LicenseSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["license_key", "created_at"]
 
+    def get_software_name(self, obj):
+        return catalog.get_software_name(obj.software_id)
+
     def get_is_expired(self, obj):
+        # ใช้ค่าที่คำนวณใน SQL ถ้า queryset ผ่าน with_status() มาแล้ว
+        if hasattr(obj, "expired"):
+            return obj.expired
         return obj.is_expired()
 
     def get_days_remaining(self, obj):
+        if hasattr(obj, "remaining"):
+            return obj.remaining.days
         return obj.days_remaining()
 
 
@@ -58,37 +76,20 @@ class ActivateLicenseSerializer(serializers.Serializer):
 
     def validate_software_id(self, value):
         """ตรวจสอบว่า Software ID มีอยู่จริงและ Active"""
-        try:
-            software = SoftwareName.objects.get(id=value, is_active=True)
-        except SoftwareName.DoesNotExist:
+        software = catalog.get_software(value)
+        if software is None or not software.is_active:
             raise serializers.ValidationError("ไม่พบซอฟต์แวร์ที่ระบุหรือซอฟต์แวร์ถูกปิดการใช้งาน")
         return value
 
     def validate_mac_address(self, value):
-        """ตรวจสอบรูปแบบ MAC Address"""
-        import re
-
-        # รูปแบบ MAC Address: XX:XX:XX:XX:XX:XX หรือ XX-XX-XX-XX-XX-XX
-        pattern = r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$"
-        if not re.match(pattern, value):
+        """ตรวจสอบรูปแบบ MAC Address และแปลงเป็นรูปแบบมาตรฐาน"""
+        if not MAC_ADDRESS_PATTERN.match(value):
             raise serializers.ValidationError("รูปแบบ MAC Address ไม่ถูกต้อง")
-        return value
+        return normalize_mac_address(value)
 
     def create(self, validated_data):
-        """สร้าง License ใหม่"""
-        software = SoftwareName.objects.get(id=validated_data["software_id"])
-
-        # สร้าง License
-        license = License.objects.create(
-            software=software,
-            customer_email=validated_data["customer_email"],
-            machine_id=validated_data["machine_id"],
-            mac_address=validated_data["mac_address"],
-            duration_days=validated_data["duration_days"],
-            activated_at=timezone.now(),
-            is_active=True,
-        )
-
+        """สร้าง License ใหม่ (หรืออัพเดท License เดิมของเครื่องนี้)"""
+        license, _ = License.objects.upsert_activation(**validated_data)
         return license
 
 
@@ -99,6 +100,20 @@ class ValidateLicenseSerializer(serializers.Serializer):
     mac_address = serializers.CharField(required=True, max_length=17)
     software_name = serializers.CharField(required=True, max_length=255)
 
+    def validate_mac_address(self, value):
+        """แปลง MAC Address เป็นรูปแบบมาตรฐาน"""
+        return normalize_mac_address(value)
+
+
+class ValidateBatchLicenseSerializer(serializers.Serializer):
+    """Serializer สำหรับการ Validate หลาย License ในครั้งเดียว"""
+
+    licenses = ValidateLicenseSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.LICENSE_VALIDATE_BATCH_MAX_ITEMS,
+    )
+
 
 class RenewLicenseSerializer(serializers.Serializer):
     """Serializer สำหรับการต่ออายุ License"""
@@ -108,44 +123,41 @@ class RenewLicenseSerializer(serializers.Serializer):
     software_id = serializers.IntegerField(required=True)
     duration_days = serializers.IntegerField(required=True, min_value=1)
 
-    def validate(self, data):
-        """ตรวจสอบว่ามี License อยู่จริง"""
-        try:
-            license = License.objects.get(
-                machine_id=data["machine_id"],
-                mac_address=data["mac_address"],
-                software_id=data["software_id"],
-            )
-            data["license"] = license
-        except License.DoesNotExist:
-            raise serializers.ValidationError("ไม่พบ License ที่ระบุ")
-        return data
+    def validate_mac_address(self, value):
+        """แปลง MAC Address เป็นรูปแบบมาตรฐาน"""
+        return normalize_mac_address(value)
 
     def save(self):
-        """ต่ออายุ License"""
-        license = self.validated_data["license"]
-        duration_days = self.validated_data["duration_days"]
-
-        # ถ้า License หมดอายุแล้ว ให้เริ่มนับใหม่จากวันนี้
-        if license.is_expired():
-            license.activated_at = timezone.now()
-            license.expires_at = timezone.now() + timedelta(days=duration_days)
-        else:
-            # ถ้ายังไม่หมดอายุ ให้ขยายเวลาต่อจากวันหมดอายุเดิม
-            license.expires_at = license.expires_at + timedelta(days=duration_days)
-
-        license.duration_days = duration_days
-        license.is_active = True
-        license.save()
-
+        """
+        ต่ออายุ License ด้วย UPDATE คำสั่งเดียว
+        ถ้า License หมดอายุแล้ว ให้เริ่มนับใหม่จากวันนี้
+        ถ้ายังไม่หมดอายุ ให้ขยายเวลาต่อจากวันหมดอายุเดิม
+        """
+        license = License.objects.renew(
+            machine_id=self.validated_data["machine_id"],
+            mac_address=self.validated_data["mac_address"],
+            software_id=self.validated_data["software_id"],
+            duration_days=self.validated_data["duration_days"],
+        )
+        if license is None:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["ไม่พบ License ที่ระบุ"]}
+            )
         return license
 
 
-class ActivationLogSerializer(serializers.ModelSerializer):
+class ActivationLogSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer สำหรับ ActivationLog"""
 
     license_info = serializers.SerializerMethodField()
 
+    values_fields = {
+        "license_info": (
+            ["license__software_id", "license__customer_email"],
+            lambda row: f"{catalog.get_software_name(row['license__software_id'])} - {row['license__customer_email']}",
+        ),
+    }
+
     class Meta:
         model = ActivationLog
         fields = [
@@ -160,4 +172,30 @@ class ActivationLogSerializer(serializers.ModelSerializer):
         ]
 
     def get_license_info(self, obj):
-        return f"{obj.license.software.name} - {obj.license.customer_email}"
+        return f"{catalog.get_software_name(obj.license.software_id)} - {obj.license.customer_email}"
+
+
+class ValidateRollupSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializer สำหรับ ValidateRollup (validate ที่สำเร็จรายชั่วโมง)"""
+
+    license_info = serializers.SerializerMethodField()
+
+    values_fields = {
+        "license_info": ActivationLogSerializer.values_fields["license_info"],
+    }
+
+    class Meta:
+        model = ValidateRollup
+        fields = [
+            "id",
+            "license",
+            "license_info",
+            "hour",
+            "count",
+            "distinct_ips",
+            "first_seen",
+            "last_seen",
+        ]
+
+    def get_license_info(self, obj):
+        return f"{catalog.get_software_name(obj.license.software_id)} - {obj.license.customer_email}"
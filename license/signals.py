@@ -0,0 +1,46 @@
+"""
+ล้าง cache ของ validate เมื่อ License ถูกบันทึกหรือลบ และ catalog ของ SoftwareName
+เมื่อ SoftwareName ถูกบันทึกหรือลบ
+
+ใช้ signal แทนการ override save()/delete() ของ model เพราะ queryset.delete()
+(เช่น action "ลบที่เลือก" ใน admin) และการลบแบบ cascade จาก SoftwareName
+ไม่เรียก delete() ของแต่ละ instance แต่ Collector ส่ง post_delete ทีละแถวเสมอ
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_license, invalidate_queryset
+from .catalog import invalidate_catalog
+from .models import License, SoftwareName
+
+
+@receiver(pre_save, sender=License)
+def invalidate_previous_license(sender, instance, raw=False, **kwargs):
+    # ล้าง cache ของค่าเดิมใน DB เผื่อมีการเปลี่ยนเครื่องหรือซอฟต์แวร์
+    if instance.pk and not raw:
+        invalidate_queryset(License.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=License)
+def invalidate_saved_license(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_license(instance)
+
+
+@receiver(post_delete, sender=License)
+def invalidate_deleted_license(sender, instance, **kwargs):
+    invalidate_license(instance)
+
+
+@receiver(pre_save, sender=SoftwareName)
+def invalidate_software_licenses(sender, instance, raw=False, **kwargs):
+    # cache ของ validate ใช้ชื่อซอฟต์แวร์เป็น key ล้างของชื่อเดิมก่อนเปลี่ยน
+    if instance.pk and not raw:
+        invalidate_queryset(License.objects.filter(software_id=instance.pk))
+
+
+@receiver(post_save, sender=SoftwareName)
+@receiver(post_delete, sender=SoftwareName)
+def invalidate_software_catalog(sender, **kwargs):
+    invalidate_catalog()
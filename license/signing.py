@@ -0,0 +1,171 @@
+"""
+Offline license token แบบ JWT (EdDSA / Ed25519)
+
+Client สามารถตรวจสอบ token ได้เองด้วย public key จาก
+GET /api/licenses/public_keys/ และเรียก validate อีกครั้งเมื่อถึง refresh_at
+หรือใกล้ exp เท่านั้น
+"""
+
+import base64
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .catalog import get_software_name
+from .models import SigningKey
+from .utils import in_event_loop
+
+# เก็บ private key ที่ใช้งานอยู่ไว้ในหน่วยความจำของ worker ช่วงสั้นๆ
+# เพื่อให้การ rotate key มีผลกับทุก worker ภายในเวลานี้
+ACTIVE_KEY_CACHE_SECONDS = 60
+
+_active_key = None
+_active_key_loaded_at = 0.0
+
+
+def b64url_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def machine_fingerprint(machine_id, mac_address):
+    """Fingerprint ของเครื่อง: SHA-256 ของ machine_id และ MAC Address"""
+    return hashlib.sha256(f"{machine_id}|{mac_address}".encode()).hexdigest()
+
+
+def generate_signing_key(rotate=True):
+    """
+    สร้าง Ed25519 key ใหม่และตั้งเป็น key ที่ใช้งานอยู่
+    rotate=False: ไม่ยกเลิก key เดิม raise IntegrityError ถ้ามี key ที่ใช้งานอยู่แล้ว
+    (constraint signing_key_single_active)
+    """
+    global _active_key
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+    public_raw = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw,
+    )
+
+    with transaction.atomic():
+        # key เดิมเลิกใช้ลงนาม แต่ยังเผยแพร่ public key เพื่อให้ token เก่าตรวจสอบได้
+        if rotate:
+            SigningKey.objects.filter(is_active=True).update(is_active=False)
+        key = SigningKey.objects.create(
+            kid=hashlib.sha256(public_raw).hexdigest()[:16],
+            private_key=private_pem,
+            public_key=b64url_encode(public_raw),
+        )
+    _active_key = None
+    return key
+
+
+def unpublish_old_keys(keep):
+    """หยุดเผยแพร่ public key ที่เก่ากว่า ``keep`` รายการล่าสุด"""
+    keep_ids = SigningKey.objects.order_by("-created_at").values_list("pk", flat=True)[
+        :keep
+    ]
+    return (
+        SigningKey.objects.filter(is_published=True)
+        .exclude(pk__in=list(keep_ids))
+        .update(is_published=False)
+    )
+
+
+def get_active_signing_key():
+    """คืนค่า SigningKey ล่าสุดที่ใช้ลงนาม (สร้างให้อัตโนมัติถ้ายังไม่มี)"""
+    global _active_key, _active_key_loaded_at
+    now = time.monotonic()
+    if _active_key is not None and (
+        now - _active_key_loaded_at < ACTIVE_KEY_CACHE_SECONDS
+        # ใน event loop ห้าม query DB: ใช้ key ที่ aget_active_signing_key() โหลดไว้
+        or in_event_loop()
+    ):
+        return _active_key
+
+    key = _load_active_key()
+    if key is None:
+        key = _bootstrap_signing_key()
+    key.private = serialization.load_pem_private_key(
+        key.private_key.encode(), password=None
+    )
+    _active_key = key
+    _active_key_loaded_at = now
+    return key
+
+
+def _load_active_key():
+    return SigningKey.objects.filter(is_active=True).first()
+
+
+def _bootstrap_signing_key():
+    """
+    สร้าง key แรกเมื่อยังไม่มี key ที่ใช้งานอยู่ ถ้าหลาย worker สร้างพร้อมกัน
+    unique constraint ให้สำเร็จเพียงรายการเดียว รายการอื่นใช้ key ของผู้ที่สำเร็จ
+    """
+    try:
+        return generate_signing_key(rotate=False)
+    except IntegrityError:
+        return SigningKey.objects.get(is_active=True)
+
+
+async def aget_active_signing_key():
+    """get_active_signing_key สำหรับ async view (โหลด key จาก DB ใน thread แยกเมื่อจำเป็น)"""
+    if _active_key is not None and (
+        time.monotonic() - _active_key_loaded_at < ACTIVE_KEY_CACHE_SECONDS
+    ):
+        return _active_key
+    return await sync_to_async(get_active_signing_key)()
+
+
+def public_jwks():
+    """Public key ทั้งหมดที่ยังเผยแพร่อยู่ ในรูปแบบ JWKS"""
+    keys = SigningKey.objects.filter(is_published=True).order_by("-created_at")
+    return {
+        "keys": [
+            {
+                "kty": "OKP",
+                "crv": "Ed25519",
+                "alg": "EdDSA",
+                "use": "sig",
+                "kid": key.kid,
+                "x": key.public_key,
+            }
+            for key in keys
+        ]
+    }
+
+
+def sign_license_token(license, machine_id, mac_address):
+    """สร้าง token ที่ลงนามแล้วสำหรับ License"""
+    key = get_active_signing_key()
+    now = int(timezone.now().timestamp())
+
+    header = {"alg": "EdDSA", "typ": "JWT", "kid": key.kid}
+    payload = {
+        "sub": str(license.license_key),
+        "software": get_software_name(license.software_id),
+        "fingerprint": machine_fingerprint(machine_id, mac_address),
+        "iat": now,
+        "refresh_at": now + settings.LICENSE_TOKEN_REFRESH_INTERVAL,
+    }
+    # License ที่ไม่มีวันหมดอายุ (expires_at ว่าง) ไม่ใส่ exp เหมือน License.is_expired()
+    if license.expires_at is not None:
+        payload["exp"] = int(license.expires_at.timestamp())
+
+    signing_input = ".".join(
+        b64url_encode(json.dumps(part, separators=(",", ":")).encode())
+        for part in (header, payload)
+    )
+    signature = key.private.sign(signing_input.encode())
+    return f"{signing_input}.{b64url_encode(signature)}"
@@ -0,0 +1,111 @@
+"""
+สถิติ License แยกตามซอฟต์แวร์ สำหรับ GET /api/licenses/stats/ และ dashboard
+
+จำนวนทั้งหมดและที่เปิดใช้งานอ่านจาก LicenseCounter ส่วนที่หมดอายุ/ใกล้หมดอายุนับด้วย
+aggregate query เดียวเฉพาะช่วง expires_at < now + N วัน และเก็บผลไว้ใน cache ``default``
+ไม่เกิน LICENSE_STATS_CACHE_TIMEOUT วินาที ทุกครั้งที่ License ถูกแก้ไข
+version ของ cache จะถูกเปลี่ยน ทำให้ request ถัดไปคำนวณใหม่
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .catalog import get_software_name
+from .models import License, LicenseCounter
+
+VERSION_KEY = "license_stats:version"
+
+COUNTERS = ["total", "active", "expired", "inactive", "expiring"]
+
+
+def _cache_key(expiring_days):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+    return f"license_stats:{version}:{expiring_days}"
+
+
+def _compute(expiring_days):
+    now = timezone.now()
+
+    # total และ active (is_active) มาจาก LicenseCounter ที่ trigger อัปเดตตลอด
+    counters = {
+        counter.software_id: counter
+        for counter in LicenseCounter.objects.filter(total__gt=0).order_by("software_id")
+    }
+
+    # นับเฉพาะ License ที่หมดอายุแล้วหรือใกล้หมดอายุ (range scan บน index ของ expires_at)
+    window = {
+        row["software_id"]: row
+        for row in License.objects.filter(expires_at__lt=now + timedelta(days=expiring_days))
+        .order_by()
+        .values("software_id")
+        .annotate(
+            expired=Count("id", filter=Q(expires_at__lt=now)),
+            expired_active=Count("id", filter=Q(is_active=True, expires_at__lt=now)),
+            expiring=Count("id", filter=Q(is_active=True, expires_at__gte=now)),
+        )
+    }
+
+    rows = []
+    for software_id, counter in counters.items():
+        counts = window.get(software_id, {})
+        rows.append(
+            {
+                "software_id": software_id,
+                "total": counter.total,
+                # เหมือน is_active และ not is_expired() ใน dashboard เดิม
+                "active": counter.active - counts.get("expired_active", 0),
+                "expired": counts.get("expired", 0),
+                "inactive": counter.total - counter.active,
+                "expiring": counts.get("expiring", 0),
+            }
+        )
+
+    software = []
+    totals = dict.fromkeys(COUNTERS, 0)
+    for row in rows:
+        for counter in COUNTERS:
+            totals[counter] += row[counter]
+        software.append(
+            {
+                "software_id": row["software_id"],
+                "software_name": get_software_name(row["software_id"]),
+                **{counter: row[counter] for counter in COUNTERS},
+            }
+        )
+
+    return {
+        "generated_at": timezone.localtime(now),
+        "expiring_days": expiring_days,
+        "totals": totals,
+        "software": software,
+    }
+
+
+def get_license_stats(expiring_days=30):
+    """สถิติ License ทั้งหมดและแยกตามซอฟต์แวร์ (ผ่าน cache)"""
+    key = _cache_key(expiring_days)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute(expiring_days)
+        cache.set(key, stats, settings.LICENSE_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_license_stats():
+    """เปลี่ยน version เพื่อให้ทุก worker คำนวณสถิติใหม่ (เรียกเมื่อ License เปลี่ยน)"""
+
+    def bump():
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
@@ -1,3 +1,1157 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .archive import ArchiveError, archive_logs, count_rows, scan_archive
+from .bulk import USER_AGENT, recover_bulk_actions, run_bulk_action, start_bulk_action
+from .catalog import VERSION_KEY, catalog, get_software_name
+from .counters import reconcile_license_counters
+from .idempotency import _cache_key
+from .importer import import_licenses
+from .logbuffer import ActivationLogBuffer
+from .pagination import EstimatedCountPaginator
+from .rollups import accumulate, write_rollups
+from .useragents import UserAgentCache, resolve_user_agents, user_agents
+from .models import (
+    ActivationLog,
+    BulkAction,
+    License,
+    LicenseCounter,
+    SigningKey,
+    SoftwareName,
+    UserAgent,
+    ValidateRollup,
+)
+from . import partitions, signing
+from .admin import LicenseAdmin, SoftwareNameAdmin
+from .views import ActivationLogViewSet, LicenseViewSet
+
+API_HEADERS = {"HTTP_X_API_TOKEN": "test-token"}
+
+
+@override_settings(API_TOKEN="test-token", LOG_BUFFER_ENABLED=False)
+class LicenseAPITestCase(TestCase):
+    """ข้อมูลตั้งต้นสำหรับทดสอบ API ของ License"""
+
+    def setUp(self):
+        cache.clear()
+        catalog.clear()
+        user_agents.clear()
+        self.software = SoftwareName.objects.create(name="Software A")
+        self.license = License.objects.create(
+            software=self.software,
+            customer_email="a@example.com",
+            machine_id="M1",
+            mac_address="00:1B:63:84:45:E6",
+            duration_days=30,
+        )
+
+    def validate(self, machine_id="M1", software_name="Software A"):
+        response = self.client.post(
+            "/api/licenses/validate/",
+            {
+                "machine_id": machine_id,
+                "mac_address": "00:1B:63:84:45:E6",
+                "software_name": software_name,
+            },
+            content_type="application/json",
+            **API_HEADERS,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class ValidateCacheInvalidationTests(LicenseAPITestCase):
+    """cache ของ validate ต้องถูกล้างทุกครั้งที่ License ถูกลบ ไม่ว่าจะลบด้วยวิธีใด"""
+
+    def warm_cache(self):
+        self.assertTrue(self.validate()["valid"])
+        self.assertTrue(self.validate()["valid"])
+
+    def test_queryset_delete_invalidates_cache(self):
+        self.warm_cache()
+        License.objects.filter(machine_id="M1").delete()
+        self.assertFalse(self.validate()["valid"])
+
+    def test_instance_delete_invalidates_cache(self):
+        self.warm_cache()
+        self.license.delete()
+        self.assertFalse(self.validate()["valid"])
+
+    def test_update_via_save_invalidates_cache(self):
+        self.warm_cache()
+        self.license.is_active = False
+        self.license.save()
+        self.assertFalse(self.validate()["valid"])
+
+
+class ActivationLogBufferTests(LicenseAPITestCase):
+    """buffer ต้องเก็บ log ไว้ลองใหม่ระหว่างที่ DB ใช้งานไม่ได้ (ไม่เกิน max_pending)"""
+
+    def make_logs(self, count):
+        return [ActivationLog(license=self.license, action="activate") for _ in range(count)]
+
+    def test_keeps_logs_while_database_unavailable(self):
+        buffer = ActivationLogBuffer(batch_size=100, flush_interval=3600, max_pending=5)
+        buffer.add_many(self.make_logs(3))
+
+        with mock.patch(
+            "license.models.ActivationLogManager.bulk_create", side_effect=OperationalError
+        ):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(ActivationLog.objects.count(), 0)
+
+        # log ใหม่ระหว่างรอ: เก็บได้ไม่เกิน max_pending (ทิ้งรายการเก่าสุด)
+        buffer.add_many(self.make_logs(4))
+        self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(ActivationLog.objects.count(), 5)
+
+
+class SigningKeyBootstrapTests(TestCase):
+    """มี key ที่ใช้ลงนามได้ครั้งละหนึ่ง key แม้หลาย worker สร้าง key แรกพร้อมกัน"""
+
+    def setUp(self):
+        signing._active_key = None
+
+    def test_bootstrap_creates_single_key(self):
+        key = signing.get_active_signing_key()
+        self.assertEqual(list(SigningKey.objects.values_list("kid", flat=True)), [key.kid])
+
+    def test_concurrent_bootstrap_uses_existing_key(self):
+        existing = signing.generate_signing_key()
+        # worker นี้ไม่เห็น key ที่ worker อื่นเพิ่งสร้าง
+        with mock.patch("license.signing._load_active_key", return_value=None):
+            key = signing.get_active_signing_key()
+        self.assertEqual(key.kid, existing.kid)
+        self.assertEqual(SigningKey.objects.filter(is_active=True).count(), 1)
+
+    def test_single_active_key_constraint(self):
+        signing.generate_signing_key()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SigningKey.objects.create(kid="other", private_key="", public_key="")
+
+    def test_rotation_keeps_previous_key_published(self):
+        old = signing.generate_signing_key()
+        new = signing.generate_signing_key()
+        old.refresh_from_db()
+        self.assertFalse(old.is_active)
+        self.assertTrue(old.is_published)
+        self.assertEqual(signing.get_active_signing_key().kid, new.kid)
+
+
+class LicenseFingerprintTests(LicenseAPITestCase):
+    """License ซ้ำของเครื่องเดียวกันต้องไม่ทำให้การบันทึกใน admin ล้มด้วย IntegrityError"""
+
+    def make_legacy_duplicate(self):
+        # แถวที่ migration 0006 ไม่ได้ให้ fingerprint เพราะซ้ำกับ self.license
+        duplicate = License.objects.create(
+            software=self.software,
+            customer_email="b@example.com",
+            machine_id="M2",
+            mac_address="00:1B:63:84:45:E6",
+            duration_days=30,
+        )
+        License.objects.filter(pk=duplicate.pk).update(machine_id="M1", fingerprint=None)
+        return License.objects.get(pk=duplicate.pk)
+
+    def test_editing_legacy_duplicate_keeps_null_fingerprint(self):
+        duplicate = self.make_legacy_duplicate()
+        duplicate.notes = "edited"
+        duplicate.full_clean()
+        duplicate.save()
+        duplicate.refresh_from_db()
+        self.assertIsNone(duplicate.fingerprint)
+        self.assertEqual(duplicate.notes, "edited")
+
+    def test_legacy_duplicate_gets_fingerprint_once_unique(self):
+        duplicate = self.make_legacy_duplicate()
+        self.license.delete()
+        duplicate.save()
+        self.assertIsNotNone(duplicate.fingerprint)
+
+    def test_new_duplicate_is_a_validation_error(self):
+        duplicate = License(
+            software=self.software,
+            customer_email="b@example.com",
+            machine_id="M1",
+            mac_address="00-1b-63-84-45-e6",
+            duration_days=30,
+        )
+        with self.assertRaises(ValidationError):
+            duplicate.full_clean()
+
+
+class SoftwareCatalogInvalidationTests(LicenseAPITestCase):
+    """catalog ของทุก worker ต้องถูกล้างเมื่อ SoftwareName ถูกลบด้วย queryset.delete()"""
+
+    def activate(self):
+        return self.client.post(
+            "/api/licenses/activate/",
+            {
+                "software_id": self.software.pk,
+                "customer_email": "a@example.com",
+                "machine_id": "M9",
+                "mac_address": "00:1B:63:84:45:E6",
+                "duration_days": 30,
+            },
+            content_type="application/json",
+            **API_HEADERS,
+        )
+
+    def test_queryset_delete_removes_software_from_catalog(self):
+        self.assertEqual(self.activate().status_code, 201)
+        SoftwareName.objects.filter(pk=self.software.pk).delete()
+        self.assertIsNone(catalog.get(self.software.pk))
+        self.assertEqual(self.activate().status_code, 400)
+
+    def test_cascade_delete_invalidates_validate_cache(self):
+        self.assertTrue(self.validate()["valid"])
+        SoftwareName.objects.filter(pk=self.software.pk).delete()
+        self.assertFalse(self.validate()["valid"])
+
+
+class AsyncCatalogTests(LicenseAPITestCase):
+    """โค้ด sync ที่ async view เรียก (validate_result ฯลฯ) ต้องไม่ query DB ใน event loop"""
+
+    async def test_lookup_in_event_loop_uses_loaded_catalog(self):
+        await catalog.arefresh()
+        # ครบเวลาตรวจ version และ catalog ถูกเปลี่ยนโดย worker อื่น
+        catalog._checked_at = None
+        cache.set(VERSION_KEY, "changed")
+        self.assertEqual(get_software_name(self.software.pk), "Software A")
+
+
+class IdempotencyTests(LicenseAPITestCase):
+    """request ซ้ำที่รออยู่ต้องทำงานเองทันทีเมื่อ request แรกจบโดยไม่มีผลลัพธ์ (5xx)"""
+
+    def test_waiter_retries_when_first_request_fails(self):
+        key = _cache_key("activate", "key-1")
+        # request แรกกำลังทำงานอยู่ แล้วล้มด้วย 5xx (ปล่อย lock โดยไม่เก็บผลลัพธ์)
+        cache.set(f"{key}:lock", 1)
+        with mock.patch(
+            "license.idempotency.time.sleep",
+            side_effect=lambda seconds: cache.delete(f"{key}:lock"),
+        ):
+            response = self.client.post(
+                "/api/licenses/activate/",
+                {
+                    "software_id": self.software.pk,
+                    "customer_email": "a@example.com",
+                    "machine_id": "M9",
+                    "mac_address": "00:1B:63:84:45:E6",
+                    "duration_days": 30,
+                },
+                content_type="application/json",
+                HTTP_IDEMPOTENCY_KEY="key-1",
+                **API_HEADERS,
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(cache.get(key))
+
+
+class ListQueryCountTests(LicenseAPITestCase):
+    """จำนวน query ต่อหน้าของ list ต้องคงที่ ไม่เพิ่มตามจำนวนแถวในหน้า (N+1)"""
+
+    def setUp(self):
+        super().setUp()
+        other = SoftwareName.objects.create(name="Software B")
+        for i in range(20):
+            license = License.objects.create(
+                software=other if i % 2 else self.software,
+                customer_email=f"user{i}@example.com",
+                machine_id=f"M-{i}",
+                mac_address=f"00:1B:63:84:45:{i:02X}",
+                duration_days=30,
+            )
+            ActivationLog.objects.create(license=license, action="activate", user_agent=f"client/{i}")
+
+    def get(self, path, page_size):
+        response = self.client.get(path, {"page_size": page_size}, **API_HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), page_size)
+
+    def test_license_list_queries_per_page(self):
+        self.get("/api/licenses/", 2)
+        for page_size in (5, 20):
+            with self.assertNumQueries(1):
+                self.get("/api/licenses/", page_size)
+
+    def test_log_list_queries_per_page(self):
+        self.get("/api/logs/", 2)
+        for page_size in (5, 20):
+            with self.assertNumQueries(1):
+                self.get("/api/logs/", page_size)
+
+
+class AdminChangelistCountTests(LicenseAPITestCase):
+    """changelist ที่นับถึง count_limit ต้องแสดงว่ามีมากกว่านั้น และเลื่อนหน้าเลยเพดานได้"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(20):
+            License.objects.create(
+                software=self.software,
+                customer_email=f"user{i}@example.com",
+                machine_id=f"M-{i}",
+                mac_address=f"00:1B:63:84:45:{i:02X}",
+                duration_days=30,
+            )
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+
+    def changelist(self, **params):
+        # 2 แถวต่อหน้า นับไม่เกิน 5 แถว: ไม่เลื่อนหน้าจะเห็นแค่ 3 หน้า
+        with (
+            mock.patch.object(EstimatedCountPaginator, "count_limit", 5),
+            mock.patch.object(LicenseAdmin, "list_per_page", 2),
+        ):
+            response = self.client.get("/admin/license/license/", {"q": "example.com", **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_capped_count_is_marked(self):
+        response = self.changelist()
+        self.assertEqual(str(response.context["cl"].result_count), "5+")
+        self.assertContains(response, "5+ Licenses")
+
+    def test_pages_past_the_cap(self):
+        cl = self.changelist(p=4).context["cl"]
+        self.assertEqual(str(cl.result_count), "11+")
+        self.assertEqual(cl.paginator.num_pages, 6)
+        self.assertEqual(self.changelist(p=11).context["cl"].result_count, 21)
+
+
+@override_settings(LICENSE_BULK_ACTION_CHUNK_SIZE=2)
+class BulkActionRecoveryTests(LicenseAPITestCase):
+    """bulk action ที่ค้างเพราะ worker ถูก restart ต้องทำต่อจาก last_pk หรือปิดเป็นล้มเหลวได้"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            License.objects.create(
+                software=self.software,
+                customer_email=f"bulk{i}@example.com",
+                machine_id=f"B-{i}",
+                mac_address=f"00:1B:63:84:46:{i:02X}",
+                duration_days=30,
+            )
+        self.selected = License.objects.filter(machine_id__startswith="B-")
+        # ไม่มี commit ใน TestCase งานเบื้องหลังจึงไม่เริ่ม (เหมือน worker ตายก่อนเริ่ม)
+        self.job = start_bulk_action(self.selected, "deactivate")
+
+    def make_stale(self, **fields):
+        BulkAction.objects.filter(pk=self.job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1), **fields
+        )
+
+    def test_resumes_after_last_pk(self):
+        first = self.selected.order_by("pk")[0]
+        License.objects.filter(pk=first.pk).update(is_active=False)
+        self.make_stale(status="running", processed=1, last_pk=first.pk)
+
+        [job] = recover_bulk_actions(timedelta(minutes=10))
+        self.assertEqual(job.status, "done")
+        self.assertEqual((job.processed, job.changed), (5, 4))
+        self.assertFalse(self.selected.filter(is_active=True).exists())
+        self.assertTrue(License.objects.get(pk=self.license.pk).is_active)
+        self.assertEqual(
+            {log.user_agent for log in ActivationLog.objects.filter(action="revoke")},
+            {USER_AGENT},
+        )
+
+    def test_recent_jobs_are_left_alone(self):
+        self.assertEqual(recover_bulk_actions(timedelta(minutes=10)), [])
+
+    def test_background_runner_stops_when_job_is_taken(self):
+        # งานรอคิวใน executor นานจน resume_bulk_actions รับไปทำเสร็จแล้ว
+        BulkAction.objects.filter(pk=self.job.pk).update(status="done")
+        self.job = start_bulk_action(self.selected, "extend", days=10)
+        expires = dict(self.selected.values_list("pk", "expires_at"))
+        self.make_stale()
+        [job] = recover_bulk_actions(timedelta(minutes=10))
+        self.assertEqual(job.status, "done")
+
+        run_bulk_action(self.job, self.selected)
+        for pk, expires_at in self.selected.values_list("pk", "expires_at"):
+            self.assertEqual(expires_at, expires[pk] + timedelta(days=10))
+
+    def test_chunk_is_rolled_back_when_job_is_taken_mid_run(self):
+        from . import bulk
+
+        process_chunk = bulk._process_chunk
+
+        def taken_after_chunk(job, ids):
+            changed = process_chunk(job, ids)
+            BulkAction.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+            return changed
+
+        with mock.patch("license.bulk._process_chunk", side_effect=taken_after_chunk):
+            run_bulk_action(self.job, self.selected)
+        self.assertEqual(self.selected.filter(is_active=False).count(), 0)
+        self.assertEqual(BulkAction.objects.get(pk=self.job.pk).last_pk, 0)
+
+    def test_unreadable_selection_fails_cleanly(self):
+        self.make_stale(status="running", selection=b"not a pickle")
+        [job] = recover_bulk_actions(timedelta(minutes=10))
+        self.assertEqual(job.status, "failed")
+        self.assertIn("อ่านรายการ License ที่เลือกไม่ได้", job.error)
+
+    def test_fail_marks_stale_jobs_failed(self):
+        self.make_stale(status="running")
+        [job] = recover_bulk_actions(timedelta(minutes=10), fail=True)
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(self.selected.filter(is_active=True).exists())
+
+
+class ValidateRollupWriteTests(LicenseAPITestCase):
+    """rollup ของ License ที่ถูกลบไปแล้วต้องไม่ทำให้ทั้งชุดล้มด้วย foreign key"""
+
+    def test_skips_deleted_licenses(self):
+        deleted = License.objects.create(
+            software=self.software,
+            customer_email="b@example.com",
+            machine_id="M2",
+            mac_address="00:1B:63:84:45:E7",
+            duration_days=30,
+        )
+        now = timezone.now()
+        pending = accumulate(
+            {},
+            [
+                ActivationLog(license_id=license_id, action="validate", success=True, created_at=now)
+                for license_id in (self.license.pk, deleted.pk, self.license.pk)
+            ],
+        )
+        deleted.delete()
+
+        self.assertEqual(write_rollups(pending), 2)
+        self.assertEqual(
+            list(ValidateRollup.objects.values_list("license_id", "count")),
+            [(self.license.pk, 2)],
+        )
+
+
+class PartitionListTests(SimpleTestCase):
+    """อ่านและเรียง partition จาก pg_inherits (จำลองผลลัพธ์ของ catalog)"""
+
+    ROWS = [
+        ("license_activationlog_default", "DEFAULT"),
+        (
+            "license_activationlog_p2026_11",
+            "FOR VALUES FROM ('2026-11-01 00:00:00+07') TO ('2026-12-01 00:00:00+07')",
+        ),
+        (
+            "license_activationlog_p2026_10",
+            "FOR VALUES FROM ('2026-10-01 00:00:00+07') TO ('2026-11-01 00:00:00+07')",
+        ),
+        ("license_activationlog_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-10-01 00:00:00+07')"),
+    ]
+
+    def setUp(self):
+        patcher = mock.patch("license.partitions.connection")
+        connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = self.ROWS
+
+    def test_list_partitions_sorted_by_range(self):
+        self.assertEqual(
+            [partition.name for partition in partitions.list_partitions()],
+            [
+                "license_activationlog_legacy",
+                "license_activationlog_p2026_10",
+                "license_activationlog_p2026_11",
+                "license_activationlog_default",
+            ],
+        )
+
+    @override_settings(TIME_ZONE="Asia/Bangkok")
+    def test_ensure_partitions_creates_missing_months(self):
+        now = datetime(2026, 10, 17, 8, tzinfo=dt_timezone.utc)
+        with mock.patch(
+            "license.partitions.create_partition",
+            side_effect=lambda start, end: partitions.partition_name(start),
+        ) as create:
+            created = partitions.ensure_partitions(months_ahead=3, now=now)
+        self.assertEqual(
+            created, ["license_activationlog_p2026_12", "license_activationlog_p2027_01"]
+        )
+        self.assertEqual(create.call_count, 2)
+
+
+class ValidateBatchTests(LicenseAPITestCase):
+    """validate_batch คืนผลตามลำดับเดียวกับที่ส่งมา และบันทึก log ของ License ที่พบ"""
+
+    def validate_batch(self, items):
+        return self.client.post(
+            "/api/licenses/validate_batch/",
+            {"licenses": items},
+            content_type="application/json",
+            **API_HEADERS,
+        )
+
+    def item(self, machine_id="M1", software_name="Software A"):
+        return {
+            "machine_id": machine_id,
+            "mac_address": "00-1b-63-84-45-e6",
+            "software_name": software_name,
+        }
+
+    def test_results_follow_request_order(self):
+        expired = License.objects.create(
+            software=self.software,
+            customer_email="b@example.com",
+            machine_id="M2",
+            mac_address="00:1B:63:84:45:E6",
+            duration_days=30,
+        )
+        License.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(days=1))
+
+        # log ถูกบันทึกหลัง transaction commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.validate_batch(
+                [
+                    self.item(),
+                    self.item(machine_id="unknown"),
+                    self.item(machine_id="M2"),
+                    self.item(software_name="Unknown software"),
+                    self.item(),
+                ]
+            )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["valid"] for result in results], [True, False, False, False, True])
+        self.assertEqual(results[2]["message"], "License หมดอายุแล้ว")
+        self.assertEqual(results[0]["data"]["customer_email"], "a@example.com")
+        self.assertEqual(
+            sorted(ActivationLog.objects.values_list("license_id", "success")),
+            sorted([(self.license.pk, True), (self.license.pk, True), (expired.pk, False)]),
+        )
+
+    def test_inactive_license_is_not_found(self):
+        License.objects.filter(pk=self.license.pk).update(is_active=False)
+        [result] = self.validate_batch([self.item()]).json()["results"]
+        self.assertFalse(result["valid"])
+        self.assertFalse(ActivationLog.objects.exists())
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.validate_batch([]).status_code, 400)
+        oversized = [self.item()] * (settings.LICENSE_VALIDATE_BATCH_MAX_ITEMS + 1)
+        self.assertEqual(self.validate_batch(oversized).status_code, 400)
+
+
+class UpsertActivationTests(LicenseAPITestCase):
+    """Activate ด้วย INSERT ... ON CONFLICT: เครื่องเดิมอัพเดทแถวเดิม ไม่สร้าง License ซ้ำ"""
+
+    def upsert(self, **fields):
+        values = {
+            "software_id": self.software.pk,
+            "customer_email": "new@example.com",
+            "machine_id": "M1",
+            "mac_address": "00-1b-63-84-45-e6",
+            "duration_days": 90,
+            **fields,
+        }
+        return License.objects.upsert_activation(**values)
+
+    def test_new_machine_is_created(self):
+        license, created = self.upsert(machine_id="M2")
+        self.assertTrue(created)
+        stored = License.objects.get(pk=license.pk)
+        self.assertEqual(
+            (stored.license_key, stored.created_at, stored.mac_address),
+            (license.license_key, license.created_at, "00:1B:63:84:45:E6"),
+        )
+
+    def test_repeat_activation_updates_existing_row(self):
+        License.objects.filter(pk=self.license.pk).update(
+            created_at=timezone.now() - timedelta(days=100)
+        )
+        existing = License.objects.get(pk=self.license.pk)
+
+        license, created = self.upsert()
+        self.assertFalse(created)
+        self.assertEqual(License.objects.count(), 1)
+        self.assertEqual(
+            (license.pk, license.license_key, license.created_at),
+            (existing.pk, existing.license_key, existing.created_at),
+        )
+        stored = License.objects.get(pk=self.license.pk)
+        self.assertEqual(stored.customer_email, "new@example.com")
+        self.assertEqual(stored.duration_days, 90)
+        self.assertEqual(license.expires_at, stored.expires_at)
+
+    def test_activate_endpoint_reports_renew_for_existing_machine(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/licenses/activate/",
+                {
+                    "software_id": self.software.pk,
+                    "customer_email": "a@example.com",
+                    "machine_id": "M1",
+                    "mac_address": "00:1B:63:84:45:E6",
+                    "duration_days": 30,
+                },
+                content_type="application/json",
+                **API_HEADERS,
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["data"]["license_key"], str(self.license.license_key))
+        self.assertEqual(list(ActivationLog.objects.values_list("action", flat=True)), ["renew"])
+
+
+class RenewTests(LicenseAPITestCase):
+    """ต่ออายุด้วย UPDATE เดียว: GREATEST(expires_at, now) + duration_days"""
+
+    def renew(self, duration_days=10, machine_id="M1"):
+        return License.objects.renew(
+            machine_id=machine_id,
+            mac_address="00:1B:63:84:45:E6",
+            software_id=self.software.pk,
+            duration_days=duration_days,
+        )
+
+    def test_valid_license_extends_from_current_expiry(self):
+        before = License.objects.get(pk=self.license.pk)
+        license = self.renew()
+        self.assertEqual(license.expires_at, before.expires_at + timedelta(days=10))
+        self.assertEqual(license.activated_at, before.activated_at)
+        self.assertEqual(License.objects.get(pk=self.license.pk).expires_at, license.expires_at)
+
+    def test_expired_license_restarts_from_now(self):
+        License.objects.filter(pk=self.license.pk).update(
+            expires_at=timezone.now() - timedelta(days=5), is_active=False
+        )
+        started = timezone.now()
+        license = self.renew()
+        self.assertGreaterEqual(license.activated_at, started)
+        self.assertEqual(license.expires_at, license.activated_at + timedelta(days=10))
+        self.assertTrue(license.is_active)
+        self.assertEqual(license.duration_days, 10)
+
+    def test_license_without_expiry_starts_from_now(self):
+        License.objects.filter(pk=self.license.pk).update(expires_at=None)
+        started = timezone.now()
+        license = self.renew()
+        self.assertGreaterEqual(license.expires_at, started + timedelta(days=10))
+
+    def test_unknown_license_returns_none(self):
+        self.assertIsNone(self.renew(machine_id="unknown"))
+
+
+class LicenseImportTests(LicenseAPITestCase):
+    """นำเข้า License จาก CSV/JSONL: รายงาน error ทีละแถว และ skip/update เมื่อเครื่องมี License แล้ว"""
+
+    HEADER = "software_id,customer_email,machine_id,mac_address,duration_days\n"
+
+    def csv_file(self, *rows):
+        return SimpleUploadedFile("licenses.csv", (self.HEADER + "".join(rows)).encode())
+
+    def upload(self, upload, **data):
+        return self.client.post(
+            "/api/licenses/import/", {"file": upload, **data}, **API_HEADERS
+        )
+
+    def test_reports_errors_per_row(self):
+        response = self.upload(
+            self.csv_file(
+                f"{self.software.pk},b@example.com,M2,00:1B:63:84:45:E7,30\n",
+                f"{self.software.pk},not-an-email,M3,00:1B:63:84:45:E8,30\n",
+                f"999,c@example.com,M4,00:1B:63:84:45:E9,30\n",
+                f"{self.software.pk},d@example.com,M5,00:1B:63:84:45:EA,0\n",
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual((data["total"], data["accepted"], data["failed"]), (4, 1, 3))
+        self.assertEqual([error["row"] for error in data["errors"]], [3, 4, 5])
+        self.assertIn("customer_email", data["errors"][0]["errors"])
+        self.assertIn("software_id", data["errors"][1]["errors"])
+        self.assertIn("duration_days", data["errors"][2]["errors"])
+        self.assertFalse(data["errors_truncated"])
+        self.assertTrue(License.objects.filter(machine_id="M2").exists())
+
+    def test_jsonl_reports_unreadable_lines(self):
+        upload = SimpleUploadedFile(
+            "licenses.jsonl",
+            b'{"software_id": %d, "customer_email": "b@example.com", "machine_id": "M2",'
+            b' "mac_address": "00:1B:63:84:45:E7", "duration_days": 30}\n'
+            b"not json\n\n[1, 2]\n" % self.software.pk,
+        )
+        data = self.upload(upload).json()["data"]
+        self.assertEqual((data["total"], data["accepted"], data["failed"]), (3, 1, 2))
+        self.assertEqual([error["row"] for error in data["errors"]], [2, 4])
+
+    def test_errors_are_truncated(self):
+        rows = [(number, {"software_id": "x"}) for number in range(2, 7)]
+        result = import_licenses(rows, max_errors=2).as_dict()
+        self.assertEqual(result["failed"], 5)
+        self.assertEqual(len(result["errors"]), 2)
+        self.assertTrue(result["errors_truncated"])
+
+    def test_skip_keeps_existing_license(self):
+        row = f"{self.software.pk},new@example.com,M1,00-1b-63-84-45-e6,90\n"
+        data = self.upload(self.csv_file(row)).json()["data"]
+        self.assertEqual(data["accepted"], 1)
+        self.assertEqual(License.objects.count(), 1)
+        self.assertEqual(License.objects.get().customer_email, "a@example.com")
+
+    def test_update_overwrites_existing_license(self):
+        row = f"{self.software.pk},new@example.com,M1,00-1b-63-84-45-e6,90\n"
+        data = self.upload(self.csv_file(row), on_conflict="update").json()["data"]
+        self.assertEqual(data["accepted"], 1)
+        license = License.objects.get()
+        self.assertEqual(
+            (license.pk, license.customer_email, license.duration_days),
+            (self.license.pk, "new@example.com", 90),
+        )
+
+    def test_rejects_unknown_options(self):
+        response = self.upload(self.csv_file(), format="xml", on_conflict="merge")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"format", "on_conflict"})
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(self.HEADER + f"{self.software.pk},b@example.com,M2,00:1B:63:84:45:E7,30\n")
+        self.addCleanup(os.remove, file.name)
+        out = io.StringIO()
+        call_command("import_licenses", file.name, stdout=out)
+        self.assertIn("Rows accepted: 1", out.getvalue())
+        self.assertTrue(License.objects.filter(machine_id="M2").exists())
+
+
+class ExportTests(LicenseAPITestCase):
+    """export แบบ stream ต้องได้แถวเดียวกับ list endpoint (ตัวกรองเดียวกัน)"""
+
+    def setUp(self):
+        super().setUp()
+        other = SoftwareName.objects.create(name="Software B")
+        for i in range(6):
+            license = License.objects.create(
+                software=other if i % 2 else self.software,
+                customer_email=f"user{i}@example.com",
+                machine_id=f"M-{i}",
+                mac_address=f"00:1B:63:84:45:{i:02X}",
+                duration_days=30,
+                notes='comma, "quote"\nnewline' if i == 0 else None,
+            )
+            ActivationLog.objects.create(license=license, action="activate", user_agent=f"client/{i}")
+
+    def get(self, path, **params):
+        response = self.client.get(path, params, **API_HEADERS)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def listed(self, path, **params):
+        return self.get(path, page_size=1000, **params).json()["results"]
+
+    def ndjson(self, path, **params):
+        body = b"".join(self.get(path, **params).streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def csv_rows(self, path, **params):
+        response = self.get(path, file_format="csv", **params)
+        body = b"".join(response.streaming_content)
+        if params.get("gzip") == "true":
+            body = gzip.decompress(body)
+        return list(csv.DictReader(io.StringIO(body.decode())))
+
+    def test_license_export_matches_list(self):
+        params = {"software_id": self.software.pk}
+        listed = {row["id"]: row for row in self.listed("/api/licenses/", **params)}
+        exported = {row["id"]: row for row in self.ndjson("/api/licenses/export/", **params)}
+        self.assertEqual(set(exported), set(listed))
+        for pk, row in exported.items():
+            for field in ("license_key", "customer_email", "machine_id", "mac_address", "notes"):
+                self.assertEqual(row[field], listed[pk][field])
+            self.assertEqual(row["software_name"], "Software A")
+
+        rows = self.csv_rows("/api/licenses/export/", gzip="true", **params)
+        self.assertEqual({int(row["id"]) for row in rows}, set(listed))
+        notes = {row["machine_id"]: row["notes"] for row in rows}
+        self.assertEqual(notes["M-0"], 'comma, "quote"\nnewline')
+
+    def test_log_export_matches_list(self):
+        listed = {row["id"]: row for row in self.listed("/api/logs/", action="activate")}
+        exported = self.ndjson("/api/logs/export/", action="activate")
+        self.assertEqual({row["id"] for row in exported}, set(listed))
+        machines = dict(License.objects.values_list("pk", "machine_id"))
+        for row in exported:
+            self.assertEqual(row["license_id"], listed[row["id"]]["license"])
+            self.assertEqual(row["user_agent"], "client/" + machines[row["license_id"]][2:])
+        self.assertEqual(len(self.csv_rows("/api/logs/export/", action="activate")), len(listed))
+
+    def test_rejects_unknown_format(self):
+        response = self.client.get("/api/licenses/export/", {"file_format": "xml"}, **API_HEADERS)
+        self.assertEqual(response.status_code, 400)
+
+
+class SparseFieldsetTests(LicenseAPITestCase):
+    """fast path ของ list (.values()) ต้องได้ผลลัพธ์เหมือน serializer ทุก field"""
+
+    def setUp(self):
+        super().setUp()
+        expired = License.objects.create(
+            software=self.software,
+            customer_email="b@example.com",
+            machine_id="M2",
+            mac_address="00:1B:63:84:45:E7",
+            duration_days=30,
+            notes="note",
+        )
+        License.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(days=1))
+        for license in License.objects.all():
+            ActivationLog.objects.create(
+                license=license, action="validate", ip_address="10.0.0.1", success=False
+            )
+
+    def get(self, path, **params):
+        response = self.client.get(path, params, **API_HEADERS)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_list_matches_retrieve(self, path):
+        for row in self.get(path)["results"]:
+            self.assertEqual(row, self.get(f"{path}{row['id']}/"))
+
+    def test_license_list_matches_serializer(self):
+        self.assert_list_matches_retrieve("/api/licenses/")
+
+    def test_log_list_matches_serializer(self):
+        self.assert_list_matches_retrieve("/api/logs/")
+
+    def test_requested_fields_only(self):
+        fields = ["id", "software_name", "is_expired", "days_remaining"]
+        rows = self.get("/api/licenses/", fields=",".join(fields))["results"]
+        for row in rows:
+            self.assertEqual(list(row), fields)
+            full = self.get(f"/api/licenses/{row['id']}/")
+            self.assertEqual(row, {field: full[field] for field in fields})
+            self.assertEqual(row, self.get(f"/api/licenses/{row['id']}/", fields=",".join(fields)))
+        self.assertEqual(sorted(row["is_expired"] for row in rows), [False, True])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/licenses/", {"fields": "id,secret"}, **API_HEADERS)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.json())
+
+
+class LicenseStatsTests(LicenseAPITestCase):
+    """สถิติของ /api/licenses/stats/ ตรงกับ License จริง และคำนวณใหม่เมื่อ License เปลี่ยน"""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.other = SoftwareName.objects.create(name="Software B")
+        self.create(self.software, "M2", expires_at=now - timedelta(days=1))
+        self.create(self.software, "M3", expires_at=now + timedelta(days=5))
+        self.create(self.software, "M4", is_active=False)
+        self.create(self.other, "M5")
+
+    def create(self, software, machine_id, **fields):
+        license = License.objects.create(
+            software=software,
+            customer_email=f"{machine_id}@example.com",
+            machine_id=machine_id,
+            mac_address="00:1B:63:84:45:E6",
+            duration_days=30,
+        )
+        if fields:
+            License.objects.filter(pk=license.pk).update(**fields)
+        return license
+
+    def stats(self, expiring_days=10):
+        response = self.client.get(
+            "/api/licenses/stats/", {"expiring_days": expiring_days}, **API_HEADERS
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def counts(self, row):
+        return {key: row[key] for key in ("total", "active", "expired", "inactive", "expiring")}
+
+    def test_counts_per_software(self):
+        data = self.stats()
+        software = {row["software_name"]: self.counts(row) for row in data["software"]}
+        self.assertEqual(
+            software,
+            {
+                "Software A": {"total": 4, "active": 2, "expired": 1, "inactive": 1, "expiring": 1},
+                "Software B": {"total": 1, "active": 1, "expired": 0, "inactive": 0, "expiring": 0},
+            },
+        )
+        self.assertEqual(
+            self.counts(data["totals"]),
+            {"total": 5, "active": 3, "expired": 1, "inactive": 1, "expiring": 1},
+        )
+
+    def test_cached_stats_follow_license_changes(self):
+        self.assertEqual(self.stats()["totals"]["total"], 5)
+        self.create(self.other, "M6")
+        self.assertEqual(self.stats()["totals"]["total"], 6)
+        License.objects.filter(machine_id="M6").delete()
+        self.assertEqual(self.stats()["totals"]["total"], 5)
+
+    def test_rejects_invalid_expiring_days(self):
+        for value in ("0", "366", "x"):
+            response = self.client.get(
+                "/api/licenses/stats/", {"expiring_days": value}, **API_HEADERS
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class LicenseCounterTests(LicenseAPITestCase):
+    """counter ที่ trigger ปรับทุกครั้งที่ License ถูกเขียน ต้องตรงกับการนับใหม่ของ reconcile"""
+
+    def counters(self):
+        return {
+            row[0]: row[1:]
+            for row in LicenseCounter.objects.values_list("software_id", "total", "active", "valid")
+        }
+
+    def test_triggers_match_reconcile(self):
+        other = SoftwareName.objects.create(name="Software B")
+        License.objects.bulk_create(
+            [
+                License(
+                    software=other,
+                    customer_email=f"user{i}@example.com",
+                    machine_id=f"M-{i}",
+                    mac_address="00:1B:63:84:45:E6",
+                    duration_days=30,
+                    expires_at=timezone.now() + timedelta(days=30),
+                )
+                for i in range(5)
+            ]
+        )
+        License.objects.filter(machine_id="M-0").update(is_active=False)
+        License.objects.filter(machine_id="M-1").update(expires_at=timezone.now() - timedelta(days=1))
+        License.objects.filter(machine_id="M-2").update(software=self.software)
+        License.objects.filter(machine_id="M-3").delete()
+        self.license.is_active = False
+        self.license.save()
+
+        self.assertEqual(
+            self.counters(),
+            {self.software.pk: (2, 1, 1), other.pk: (3, 2, 1)},
+        )
+        triggered = self.counters()
+        self.assertEqual(reconcile_license_counters(), 0)
+        self.assertEqual(self.counters(), triggered)
+
+    def test_reconcile_fixes_drift(self):
+        # License ที่หมดอายุเองโดยไม่มีการเขียน: valid ยังนับอยู่จนกว่าจะ reconcile
+        LicenseCounter.objects.filter(software=self.software).update(valid=5)
+        self.assertEqual(reconcile_license_counters(), 1)
+        counter = LicenseCounter.objects.get(software=self.software)
+        self.assertEqual((counter.total, counter.active, counter.valid), (1, 1, 1))
+        self.assertIsNotNone(counter.reconciled_at)
+
+    def test_admin_labels_valid_with_reconciled_at(self):
+        model_admin = SoftwareNameAdmin(SoftwareName, admin.site)
+        software = SoftwareName.objects.select_related("license_counter").get(pk=self.software.pk)
+        self.assertIn("ยังไม่เคย reconcile", model_admin.license_count(software))
+
+        reconcile_license_counters()
+        software = SoftwareName.objects.select_related("license_counter").get(pk=self.software.pk)
+        html = model_admin.license_count(software)
+        self.assertIn(">1</span> / 1", html)
+        self.assertIn("ณ ", html)
+
+
+class ArchiveTests(LicenseAPITestCase):
+    """archive_logs เขียนไฟล์ครบก่อนลบ และอ่านกลับได้แถวเดิม"""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        now = timezone.now()
+        self.old = [
+            ActivationLog(
+                license=self.license,
+                action="validate" if i % 2 else "activate",
+                ip_address="10.0.0.1",
+                user_agent="agent/1.0" if i % 3 else None,
+                success=bool(i % 4),
+                error_message=None if i % 4 else "หมดอายุ",
+                created_at=now - timedelta(days=60 + i * 10),
+            )
+            for i in range(7)
+        ]
+        ActivationLog.objects.bulk_create(self.old)
+        ActivationLog.objects.create(license=self.license, action="validate")
+        self.before = now - timedelta(days=30)
+
+    def expected(self):
+        return [
+            {
+                "id": log.pk,
+                "license_id": log.license_id,
+                "action": log.action,
+                "ip_address": log.ip_address,
+                "user_agent": log.user_agent,
+                "success": log.success,
+                "error_message": log.error_message,
+                "created_at": log.created_at,
+            }
+            for log in ActivationLog.objects.filter(created_at__lt=self.before).order_by("pk")
+        ]
+
+    def test_round_trip(self):
+        expected = self.expected()
+        result = archive_logs(self.root, self.before, chunk_size=3)
+
+        self.assertEqual(result.rows, 7)
+        self.assertEqual(result.deleted, 7)
+        self.assertGreater(len(result.files), 1)
+        archived = sorted(scan_archive(self.root), key=lambda record: record["id"])
+        self.assertEqual(archived, expected)
+        self.assertEqual(sum(count_rows(path) for path in result.files), 7)
+        self.assertEqual(ActivationLog.objects.count(), 1)
+
+    def test_row_count_mismatch_deletes_nothing(self):
+        with mock.patch("license.archive.count_rows", return_value=0):
+            with self.assertRaises(ArchiveError):
+                archive_logs(self.root, self.before)
+        self.assertEqual(ActivationLog.objects.count(), 8)
+
+
+class UserAgentTests(LicenseAPITestCase):
+    """การแปลงข้อความ User Agent ↔ id ระหว่างหลาย worker"""
+
+    def test_ids_for_is_idempotent_across_workers(self):
+        first = UserAgentCache()
+        second = UserAgentCache()
+        ids = first.ids_for({"agent/1.0", "agent/2.0"})
+        self.assertEqual(second.ids_for({"agent/2.0", "agent/1.0"}), ids)
+        self.assertEqual(first.ids_for({"agent/1.0"}), {"agent/1.0": ids["agent/1.0"]})
+
+        # worker ที่สองสร้างข้อความใหม่ปนกับข้อความที่มีอยู่แล้ว
+        mixed = second.ids_for({"agent/1.0", "agent/3.0"})
+        self.assertEqual(mixed["agent/1.0"], ids["agent/1.0"])
+        self.assertEqual(UserAgent.objects.count(), 3)
+        self.assertEqual(
+            dict(UserAgent.objects.values_list("value", "id")),
+            {**ids, "agent/3.0": mixed["agent/3.0"]},
+        )
+
+    def test_rolled_back_ids_are_not_remembered(self):
+        worker = UserAgentCache()
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                worker.ids_for({"agent/1.0"})
+                raise IntegrityError
+        self.assertFalse(UserAgent.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = worker.ids_for({"agent/1.0"})
+        self.assertEqual(ids, {"agent/1.0": UserAgent.objects.get().pk})
+
+    def test_resolve_user_agents(self):
+        ids = user_agents.ids_for({"agent/1.0", "agent/2.0"})
+        rows = [
+            (1, ids["agent/1.0"], "a"),
+            (2, None, "b"),
+            (3, ids["agent/2.0"], "c"),
+            (4, ids["agent/1.0"], "d"),
+        ]
+        # worker อื่นที่ cache ว่างต้องอ่านข้อความจาก database
+        user_agents.clear()
+        with self.assertNumQueries(2):
+            resolved = list(resolve_user_agents(rows, 1, chunk_size=3))
+        self.assertEqual(
+            resolved,
+            [(1, "agent/1.0", "a"), (2, None, "b"), (3, "agent/2.0", "c"), (4, "agent/1.0", "d")],
+        )
+
+
+class LicenseTokenTests(LicenseAPITestCase):
+    """payload ของ offline token"""
+
+    def setUp(self):
+        super().setUp()
+        signing._active_key = None
+
+    def payload(self, license):
+        token = signing.sign_license_token(license, license.machine_id, license.mac_address)
+        body = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+
+    def test_exp_is_expires_at(self):
+        payload = self.payload(self.license)
+        self.assertEqual(payload["exp"], int(self.license.expires_at.timestamp()))
+        self.assertEqual(payload["sub"], str(self.license.license_key))
+
+    def test_license_without_expiry_has_no_exp(self):
+        License.objects.filter(pk=self.license.pk).update(expires_at=None)
+        self.license.refresh_from_db()
+        payload = self.payload(self.license)
+        self.assertNotIn("exp", payload)
+        self.assertEqual(payload["software"], "Software A")
+
+
+class CursorPaginationTests(LicenseAPITestCase):
+    """แถวที่ created_at เท่ากันต้องไม่หายหรือซ้ำระหว่างหน้า (id เป็นตัวตัดสิน)"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            license = License.objects.create(
+                software=self.software,
+                customer_email=f"user{i}@example.com",
+                machine_id=f"M-{i}",
+                mac_address=f"00:1B:63:84:45:{i:02X}",
+                duration_days=30,
+            )
+            ActivationLog.objects.create(license=license, action="activate")
+        self.created_at = timezone.now().replace(microsecond=0)
+        License.objects.update(created_at=self.created_at)
+        ActivationLog.objects.update(created_at=self.created_at)
+
+    def ids(self, path, params):
+        ids = []
+        response = self.client.get(path, {"page_size": 2, **params}, **API_HEADERS)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [row["id"] for row in data["results"]]
+            if not data["next"]:
+                return ids
+            response = self.client.get(data["next"], **API_HEADERS)
+
+    def test_ordering_matches_index(self):
+        # ลำดับต้องตรงกับ Index(fields=["created_at", "id"]) เพื่อให้อ่านตาม index ได้
+        # และแถวที่ created_at เท่ากันมีลำดับแน่นอน (cursor ใช้ offset ภายในกลุ่มนั้น)
+        for viewset in (LicenseViewSet, ActivationLogViewSet):
+            model = viewset.queryset.model
+            ordering = [field.lstrip("-") for field in viewset.pagination_class.ordering]
+            self.assertIn(ordering, [index.fields for index in model._meta.indexes])
+            self.assertEqual(ordering, ["created_at", "id"])
+
+    def test_pages_break_ties_by_id(self):
+        expected = list(License.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(self.ids("/api/licenses/", {}), expected)
+        self.assertEqual(self.ids("/api/licenses/", {"fields": "id,machine_id"}), expected)
+
+        logs = list(ActivationLog.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(self.ids("/api/logs/", {}), logs)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import SoftwareNameViewSet, LicenseViewSet, ActivationLogViewSet
@@ -11,3 +12,13 @@ router.register(r"logs", ActivationLogViewSet, basename="log")
 urlpatterns = [
     path("", include(router.urls)),
 ]
+
+if settings.LICENSE_ASYNC_API:
+    # ASGI: ใช้ async views แทน action ของ LicenseViewSet สำหรับ endpoint ที่ถูกเรียกบ่อย
+    from . import async_views
+
+    urlpatterns = [
+        path("licenses/activate/", async_views.activate, name="license-activate"),
+        path("licenses/validate/", async_views.validate, name="license-validate"),
+        path("licenses/renew/", async_views.renew, name="license-renew"),
+    ] + urlpatterns
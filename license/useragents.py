@@ -0,0 +1,137 @@
+"""
+แปลงข้อความ User Agent ↔ id ของ UserAgent สำหรับ ActivationLog
+
+client ส่ง User Agent เพียงไม่กี่แบบ ActivationLog จึงเก็บแค่ agent_id (integer)
+แทนข้อความยาวหลายร้อย byte ทุกแถว แต่ละ worker จำคู่ข้อความ/id ที่ใช้ล่าสุดไว้
+ไม่เกิน USER_AGENT_CACHE_SIZE รายการ (LRU) การบันทึก log ปกติจึงไม่ต้อง query เพิ่ม
+
+UserAgent ใหม่ถูกสร้างด้วย bulk insert (ignore_conflicts) ทำให้หลาย worker
+สร้างข้อความเดียวกันพร้อมกันได้ และ id จะถูกจำไว้หลัง transaction commit เท่านั้น
+(ไม่จำ id ของแถวที่อาจถูก rollback)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+
+def user_agent_digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class UserAgentCache:
+    """LRU ของข้อความ ↔ id ของ UserAgent"""
+
+    def __init__(self):
+        self._ids = OrderedDict()
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, pairs):
+        with self._lock:
+            for value, pk in pairs.items():
+                self._ids[value] = pk
+                self._ids.move_to_end(value)
+                self._values[pk] = value
+            while len(self._ids) > settings.USER_AGENT_CACHE_SIZE:
+                _, pk = self._ids.popitem(last=False)
+                self._values.pop(pk, None)
+
+    def _remember_on_commit(self, pairs):
+        if pairs:
+            transaction.on_commit(lambda: self._remember(pairs))
+
+    def ids_for(self, values):
+        """{ข้อความ: id} ของทุกข้อความใน values (สร้าง UserAgent ที่ยังไม่มี)"""
+        found = {}
+        with self._lock:
+            for value in values:
+                if value in self._ids:
+                    self._ids.move_to_end(value)
+                    found[value] = self._ids[value]
+
+        missing = {user_agent_digest(value): value for value in values if value not in found}
+        if missing:
+            loaded = self._load(missing)
+            found.update(loaded)
+            self._remember_on_commit(loaded)
+        return found
+
+    def _load(self, digests):
+        from .models import UserAgent
+
+        rows = dict(UserAgent.objects.filter(digest__in=digests).values_list("digest", "id"))
+        new = [digest for digest in digests if digest not in rows]
+        if new:
+            UserAgent.objects.bulk_create(
+                [UserAgent(digest=digest, value=digests[digest]) for digest in new],
+                ignore_conflicts=True,
+            )
+            rows.update(UserAgent.objects.filter(digest__in=new).values_list("digest", "id"))
+        return {digests[digest]: pk for digest, pk in rows.items()}
+
+    def values_for(self, ids):
+        """{id: ข้อความ} ของทุก id ใน ids"""
+        from .models import UserAgent
+
+        found = {}
+        with self._lock:
+            for pk in ids:
+                value = self._values.get(pk)
+                if value is not None:
+                    self._ids.move_to_end(value)
+                    found[pk] = value
+
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            loaded = dict(UserAgent.objects.filter(pk__in=missing).values_list("id", "value"))
+            found.update(loaded)
+            self._remember_on_commit({value: pk for pk, value in loaded.items()})
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._values.clear()
+
+
+user_agents = UserAgentCache()
+
+
+def get_user_agent(agent_id):
+    """ข้อความ User Agent ตาม id"""
+    return user_agents.values_for([agent_id]).get(agent_id)
+
+
+def intern_user_agents(logs):
+    """กำหนด agent_id ของ ActivationLog ที่มีข้อความ user_agent แต่ยังไม่มี agent_id"""
+    pending = [log for log in logs if log.agent_id is None and log._user_agent is not None]
+    if not pending:
+        return
+    ids = user_agents.ids_for({log._user_agent for log in pending})
+    for log in pending:
+        log.agent_id = ids[log._user_agent]
+
+
+def resolve_user_agents(rows, index, chunk_size=1000):
+    """
+    แทน agent_id ในตำแหน่ง index ของแต่ละแถว (tuple จาก values_list) ด้วยข้อความ
+    อ่านทีละ chunk_size แถวเพื่อ query UserAgent ที่ไม่อยู่ใน cache ครั้งเดียวต่อ chunk
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _resolve_chunk(chunk, index)
+            chunk = []
+    if chunk:
+        yield from _resolve_chunk(chunk, index)
+
+
+def _resolve_chunk(rows, index):
+    values = user_agents.values_for({row[index] for row in rows if row[index] is not None})
+    for row in rows:
+        yield row[:index] + (values.get(row[index]),) + row[index + 1 :]
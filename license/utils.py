@@ -1,7 +1,12 @@
+import asyncio
 import hashlib
+import re
 from django.utils import timezone
 from datetime import timedelta
 
+# รูปแบบ MAC Address: XX:XX:XX:XX:XX:XX หรือ XX-XX-XX-XX-XX-XX
+MAC_ADDRESS_PATTERN = re.compile(r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$")
+
 def generate_api_token(secret, dt=None):
     """
     Generate a SHA256 token based on secret and hourly timestamp.
@@ -37,3 +42,31 @@ def verify_api_token(token, secret):
         return True
         
     return False
+
+
+def normalize_mac_address(value):
+    """
+    แปลง MAC Address เป็นรูปแบบมาตรฐาน XX:XX:XX:XX:XX:XX (ตัวพิมพ์ใหญ่)
+    ค่าที่ไม่ใช่ MAC Address จะถูกคืนค่ากลับไปตามเดิม
+    """
+    if not MAC_ADDRESS_PATTERN.match(value):
+        return value
+    return value.replace("-", ":").upper()
+
+
+def license_fingerprint(machine_id, mac_address, software_id):
+    """
+    Fingerprint ของ License: SHA-256 ของ machine_id, MAC Address (มาตรฐาน) และ software_id
+    ใช้เป็น key สำหรับค้นหา License ของเครื่องด้วย index เดียว
+    """
+    data = f"{machine_id}|{normalize_mac_address(mac_address)}|{software_id}"
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def in_event_loop():
+    """โค้ดนี้ทำงานใน event loop (async view) หรือไม่ ซึ่งห้ามเรียก ORM แบบ sync"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
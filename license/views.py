@@ -1,10 +1,12 @@
-from rest_framework import viewsets, status
+import io
+
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.utils import timezone
-from django.db import transaction
+from rest_framework.parsers import MultiPartParser
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
@@ -12,16 +14,43 @@ from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.cache import never_cache
 
-from .models import SoftwareName, License, ActivationLog
+from .models import SoftwareName, License, ActivationLog, ValidateRollup
 from .serializers import (
     SoftwareNameSerializer,
     LicenseSerializer,
     ActivateLicenseSerializer,
     ValidateLicenseSerializer,
+    ValidateBatchLicenseSerializer,
     RenewLicenseSerializer,
     ActivationLogSerializer,
+    ValidateRollupSerializer,
 )
 from .permissions import HasStaticAPIKey
+from .pagination import CreatedAtCursorPagination, HourCursorPagination
+from .filters import filter_licenses, filter_activation_logs, filter_validate_rollups
+from .fieldsets import SparseFieldsetMixin
+from .stats import get_license_stats
+from .exporter import (
+    CONTENT_TYPES,
+    FORMATS as EXPORT_FORMATS,
+    activation_log_export,
+    license_export,
+    stream_export,
+)
+from .cache import get_license_for_validate
+from .logbuffer import log_activation, log_activations
+from .signing import sign_license_token, public_jwks
+from .utils import license_fingerprint
+from .catalog import get_software_by_name, get_software_name
+from .idempotency import idempotent
+from .importer import (
+    FORMATS,
+    ON_CONFLICT_SKIP,
+    ON_CONFLICT_UPDATE,
+    detect_format,
+    import_licenses,
+    iter_rows,
+)
 
 
 def get_client_ip(request):
@@ -34,7 +63,94 @@ def get_client_ip(request):
     return ip
 
 
-class SoftwareNameViewSet(viewsets.ReadOnlyModelViewSet):
+def activate_result(license):
+    """สร้างผลลัพธ์การ Activate License"""
+    return {
+        "success": True,
+        "message": "Activate สำเร็จ",
+        "data": {
+            "license_key": license.license_key,
+            "software_name": get_software_name(license.software_id),
+            "customer_email": license.customer_email,
+            "activated_at": license.activated_at,
+            "expires_at": license.expires_at,
+            "duration_days": license.duration_days,
+            "days_remaining": license.days_remaining(),
+            "token": sign_license_token(license, license.machine_id, license.mac_address),
+        },
+    }
+
+
+def renew_result(license):
+    """สร้างผลลัพธ์การต่ออายุ License"""
+    return {
+        "success": True,
+        "message": "ต่ออายุ License สำเร็จ",
+        "data": {
+            "software_name": get_software_name(license.software_id),
+            "expires_at": license.expires_at,
+            "days_remaining": license.days_remaining(),
+            "token": sign_license_token(license, license.machine_id, license.mac_address),
+        },
+    }
+
+
+def validate_result(license):
+    """สร้างผลลัพธ์การ Validate ของ License หนึ่งรายการ (None = ไม่พบ License)"""
+    if license is None:
+        return {
+            "success": True,
+            "valid": False,
+            "message": "ไม่พบ License หรือ License ไม่ถูกต้อง",
+        }
+
+    if license.is_expired():
+        return {
+            "success": True,
+            "valid": False,
+            "message": "License หมดอายุแล้ว",
+            "data": {"expires_at": license.expires_at},
+        }
+
+    return {
+        "success": True,
+        "valid": True,
+        "message": "License ใช้งานได้",
+        "data": {
+            "software_name": get_software_name(license.software_id),
+            "customer_email": license.customer_email,
+            "expires_at": license.expires_at,
+            "days_remaining": license.days_remaining(),
+            "token": sign_license_token(
+                license, license.machine_id, license.mac_address
+            ),
+        },
+    }
+
+
+def export_response(request, export):
+    """StreamingHttpResponse ของไฟล์ export ตาม ?file_format= และ ?gzip=true"""
+    fmt = request.query_params.get("file_format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return Response(
+            {
+                "success": False,
+                "message": "ข้อมูลไม่ถูกต้อง",
+                "errors": {"file_format": [f"รองรับเฉพาะ {', '.join(EXPORT_FORMATS)}"]},
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    compress = request.query_params.get("gzip") == "true"
+    response = StreamingHttpResponse(
+        stream_export(export, fmt, compress),
+        content_type="application/gzip" if compress else f"{CONTENT_TYPES[fmt]}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{export.filename(fmt, compress)}"'
+    return response
+
+
+class SoftwareNameViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet สำหรับดึงข้อมูลซอฟต์แวร์
     GET /api/software/ - ดึงรายการซอฟต์แวร์ทั้งหมด
@@ -46,7 +162,7 @@ class SoftwareNameViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [HasStaticAPIKey]
 
 
-class LicenseViewSet(viewsets.ModelViewSet):
+class LicenseViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet สำหรับจัดการ License
     """
@@ -54,33 +170,26 @@ class LicenseViewSet(viewsets.ModelViewSet):
     queryset = License.objects.all()
     serializer_class = LicenseSerializer
     permission_classes = [HasStaticAPIKey]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         """กรอง License ตาม query parameters"""
-        queryset = super().get_queryset()
+        queryset = filter_licenses(super().get_queryset(), self.request.query_params)
 
-        # กรองตาม software_id
-        software_id = self.request.query_params.get("software_id")
-        if software_id:
-            queryset = queryset.filter(software_id=software_id)
-
-        # กรองตาม email
-        email = self.request.query_params.get("email")
-        if email:
-            queryset = queryset.filter(customer_email=email)
-
-        # กรองเฉพาะที่ยังใช้งานได้
-        active_only = self.request.query_params.get("active_only")
-        if active_only == "true":
-            queryset = queryset.filter(is_active=True, expires_at__gt=timezone.now())
+        # คำนวณ is_expired/days_remaining ใน SQL สำหรับการอ่าน
+        # (หลังแก้ไขให้ serializer คำนวณจาก instance ที่อัพเดทแล้ว)
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.with_status()
 
         return queryset
 
     @action(detail=False, methods=["post"], permission_classes=[HasStaticAPIKey])
+    @idempotent("activate")
     def activate(self, request):
         """
         API สำหรับ Activate License
         POST /api/licenses/activate/
+        Header (ไม่บังคับ): Idempotency-Key: <uuid> ส่งซ้ำจะได้ผลลัพธ์เดิม
         Body: {
             "software_id": 1,
             "customer_email": "user@example.com",
@@ -102,65 +211,27 @@ class LicenseViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            with transaction.atomic():
-                # ตรวจสอบว่ามี License สำหรับเครื่องนี้อยู่แล้วหรือไม่
-                existing_license = License.objects.filter(
-                    machine_id=serializer.validated_data["machine_id"],
-                    mac_address=serializer.validated_data["mac_address"],
-                    software_id=serializer.validated_data["software_id"],
-                ).first()
-
-                if existing_license:
-                    # ถ้ามี License อยู่แล้ว ให้อัพเดทข้อมูล
-                    existing_license.customer_email = serializer.validated_data[
-                        "customer_email"
-                    ]
-                    existing_license.duration_days = serializer.validated_data[
-                        "duration_days"
-                    ]
-                    existing_license.activated_at = timezone.now()
-                    existing_license.expires_at = timezone.now() + timezone.timedelta(
-                        days=serializer.validated_data["duration_days"]
-                    )
-                    existing_license.is_active = True
-                    existing_license.save()
-                    license = existing_license
-                    action_type = "renew"
-                else:
-                    # สร้าง License ใหม่
-                    license = serializer.save()
-                    action_type = "activate"
-
-                # บันทึก Log
-                ActivationLog.objects.create(
-                    license=license,
-                    action=action_type,
-                    ip_address=get_client_ip(request),
-                    user_agent=request.META.get("HTTP_USER_AGENT", ""),
-                    success=True,
-                )
+            # สร้างหรืออัพเดท License ของเครื่องนี้ด้วยคำสั่ง upsert เดียว
+            license, created = License.objects.upsert_activation(
+                **serializer.validated_data
+            )
+            action_type = "activate" if created else "renew"
 
-                return Response(
-                    {
-                        "success": True,
-                        "message": "Activate สำเร็จ",
-                        "data": {
-                            "license_key": license.license_key,
-                            "software_name": license.software.name,
-                            "customer_email": license.customer_email,
-                            "activated_at": license.activated_at,
-                            "expires_at": license.expires_at,
-                            "duration_days": license.duration_days,
-                            "days_remaining": license.days_remaining(),
-                        },
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
+            # บันทึก Log
+            log_activation(
+                license=license,
+                action=action_type,
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+                success=True,
+            )
+
+            return Response(activate_result(license), status=status.HTTP_201_CREATED)
 
         except Exception as e:
             # บันทึก Log แบบ error
             if "license" in locals():
-                ActivationLog.objects.create(
+                log_activation(
                     license=license,
                     action="activate",
                     ip_address=get_client_ip(request),
@@ -202,19 +273,14 @@ class LicenseViewSet(viewsets.ModelViewSet):
         software_name = serializer.validated_data["software_name"]
 
         try:
-            # ค้นหา License
-            license = License.objects.select_related("software").get(
-                machine_id=machine_id,
-                mac_address=mac_address,
-                software__name=software_name,
-                is_active=True,
-            )
+            # ค้นหา License (ผ่าน cache)
+            license = get_license_for_validate(machine_id, mac_address, software_name)
 
             # ตรวจสอบว่าหมดอายุหรือไม่
             is_valid = not license.is_expired()
 
             # บันทึก Log
-            ActivationLog.objects.create(
+            log_activation(
                 license=license,
                 action="validate",
                 ip_address=get_client_ip(request),
@@ -222,49 +288,144 @@ class LicenseViewSet(viewsets.ModelViewSet):
                 success=is_valid,
             )
 
-            if is_valid:
-                return Response(
-                    {
-                        "success": True,
-                        "valid": True,
-                        "message": "License ใช้งานได้",
-                        "data": {
-                            "software_name": license.software.name,
-                            "customer_email": license.customer_email,
-                            "expires_at": license.expires_at,
-                            "days_remaining": license.days_remaining(),
-                        },
-                    }
-                )
-            else:
-                return Response(
-                    {
-                        "success": True,
-                        "valid": False,
-                        "message": "License หมดอายุแล้ว",
-                        "data": {"expires_at": license.expires_at},
-                    }
-                )
+            return Response(validate_result(license))
 
         except License.DoesNotExist:
+            return Response(validate_result(None))
+        except Exception as e:
+            return Response(
+                {"success": False, "valid": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+    @action(detail=False, methods=["post"], permission_classes=[HasStaticAPIKey])
+    def validate_batch(self, request):
+        """
+        API สำหรับ Validate หลาย License ในครั้งเดียว
+        POST /api/licenses/validate_batch/
+        Body: {
+            "licenses": [
+                {
+                    "machine_id": "MACHINE-123-456",
+                    "mac_address": "00:1B:63:84:45:E6",
+                    "software_name": "Software A"
+                },
+                ...
+            ]
+        }
+        ผลลัพธ์ใน "results" เรียงตามลำดับเดียวกับ "licenses"
+        """
+        serializer = ValidateBatchLicenseSerializer(data=request.data)
+
+        if not serializer.is_valid():
             return Response(
                 {
-                    "success": True,
-                    "valid": False,
-                    "message": "ไม่พบ License หรือ License ไม่ถูกต้อง",
-                }
+                    "success": False,
+                    "message": "ข้อมูลไม่ถูกต้อง",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        items = [
+            (item["machine_id"], item["mac_address"], item["software_name"])
+            for item in serializer.validated_data["licenses"]
+        ]
+
+        try:
+            # ค้นหา License ทั้งหมดด้วย fingerprint ใน query เดียว
+            fingerprints = {}
+            for item in set(items):
+                software = get_software_by_name(item[2])
+                if software is not None:
+                    fingerprints[item] = license_fingerprint(item[0], item[1], software.id)
+            licenses_by_fingerprint = License.objects.in_bulk(
+                fingerprints.values(), field_name="fingerprint"
             )
+            licenses = {}
+            for item, fingerprint in fingerprints.items():
+                license = licenses_by_fingerprint.get(fingerprint)
+                if license is not None and license.is_active:
+                    licenses[item] = license
+
+            results = []
+            logs = []
+            ip_address = get_client_ip(request)
+            user_agent = request.META.get("HTTP_USER_AGENT", "")
+            for item in items:
+                license = licenses.get(item)
+                results.append(validate_result(license))
+                if license is not None:
+                    logs.append(
+                        {
+                            "license": license,
+                            "action": "validate",
+                            "ip_address": ip_address,
+                            "user_agent": user_agent,
+                            "success": not license.is_expired(),
+                        }
+                    )
+
+            # บันทึก Log ทั้งหมดในครั้งเดียว
+            log_activations(logs)
+
+            return Response({"success": True, "results": results})
+
         except Exception as e:
             return Response(
-                {"success": False, "valid": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
+                {"success": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(detail=False, methods=["get"], permission_classes=[HasStaticAPIKey])
+    def stats(self, request):
+        """
+        API สำหรับดูสถิติ License แยกตามซอฟต์แวร์
+        GET /api/licenses/stats/?expiring_days=30
+        Response: {"totals": {"total", "active", "expired", "inactive", "expiring"}, "software": [...]}
+        """
+        try:
+            expiring_days = int(request.query_params.get("expiring_days", 30))
+        except ValueError:
+            expiring_days = 0
+        if not 1 <= expiring_days <= 365:
+            return Response(
+                {
+                    "success": False,
+                    "message": "ข้อมูลไม่ถูกต้อง",
+                    "errors": {"expiring_days": ["ต้องเป็นจำนวนเต็มระหว่าง 1 ถึง 365"]},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({"success": True, "data": get_license_stats(expiring_days)})
+
+    @action(detail=False, methods=["get"], permission_classes=[HasStaticAPIKey])
+    def export(self, request):
+        """
+        API สำหรับ export License ทั้งหมด (กรองได้เหมือน GET /api/licenses/)
+        GET /api/licenses/export/?file_format=ndjson|csv&gzip=true
+        """
+        return export_response(
+            request, license_export(self.filter_queryset(self.get_queryset()))
+        )
+
+    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
+    def public_keys(self, request):
+        """
+        API สำหรับดึง Public Key ที่ใช้ตรวจสอบ offline license token
+        GET /api/licenses/public_keys/
+        Response: JWKS ({"keys": [{"kty": "OKP", "crv": "Ed25519", "kid": ..., "x": ...}]})
+        """
+        return Response(public_jwks())
+
     @action(detail=False, methods=["post"], permission_classes=[HasStaticAPIKey])
+    @idempotent("renew")
     def renew(self, request):
         """
         API สำหรับต่ออายุ License
         POST /api/licenses/renew/
+        Header (ไม่บังคับ): Idempotency-Key: <uuid> ส่งซ้ำจะได้ผลลัพธ์เดิม
         Body: {
             "machine_id": "MACHINE-123-456",
             "mac_address": "00:1B:63:84:45:E6",
@@ -285,30 +446,85 @@ class LicenseViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            with transaction.atomic():
-                license = serializer.save()
+            # ต่ออายุด้วย UPDATE คำสั่งเดียว (ไม่ต้องใช้ transaction)
+            license = serializer.save()
 
-                # บันทึก Log
-                ActivationLog.objects.create(
-                    license=license,
-                    action="renew",
-                    ip_address=get_client_ip(request),
-                    user_agent=request.META.get("HTTP_USER_AGENT", ""),
-                    success=True,
-                )
+            # บันทึก Log
+            log_activation(
+                license=license,
+                action="renew",
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+                success=True,
+            )
 
-                return Response(
-                    {
-                        "success": True,
-                        "message": "ต่ออายุ License สำเร็จ",
-                        "data": {
-                            "software_name": license.software.name,
-                            "expires_at": license.expires_at,
-                            "days_remaining": license.days_remaining(),
-                        },
-                    }
-                )
+            return Response(renew_result(license))
+
+        except serializers.ValidationError as e:
+            # ไม่พบ License ที่ระบุ
+            return Response(
+                {
+                    "success": False,
+                    "message": "ข้อมูลไม่ถูกต้อง",
+                    "errors": e.detail,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response(
+                {"success": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[HasStaticAPIKey],
+        parser_classes=[MultiPartParser],
+    )
+    def import_licenses(self, request):
+        """
+        API สำหรับนำเข้า License จำนวนมากจากไฟล์
+        POST /api/licenses/import/ (multipart/form-data)
+        Form: {
+            "file": <ไฟล์ .csv หรือ .jsonl>,
+            "format": "csv" | "jsonl" (ไม่บังคับ เดาจากนามสกุลไฟล์),
+            "on_conflict": "skip" | "update" (ค่าเริ่มต้น skip)
+        }
+        """
+        upload = request.FILES.get("file")
+        fmt = request.data.get("format") or detect_format(upload.name if upload else "")
+        on_conflict = request.data.get("on_conflict") or ON_CONFLICT_SKIP
+
+        errors = {}
+        if upload is None:
+            errors["file"] = ["กรุณาแนบไฟล์"]
+        if fmt not in FORMATS:
+            errors["format"] = [f"รองรับเฉพาะ {', '.join(FORMATS)}"]
+        if on_conflict not in (ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE):
+            errors["on_conflict"] = [f"รองรับเฉพาะ {ON_CONFLICT_SKIP}, {ON_CONFLICT_UPDATE}"]
+        if errors:
+            return Response(
+                {"success": False, "message": "ข้อมูลไม่ถูกต้อง", "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            # อ่านไฟล์ที่อัพโหลดแบบ stream ไม่โหลดทั้งไฟล์เข้าหน่วยความจำ
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            result = import_licenses(iter_rows(stream, fmt), on_conflict=on_conflict)
+            return Response({"success": True, "data": result.as_dict()})
 
+        except UnicodeDecodeError:
+            return Response(
+                {
+                    "success": False,
+                    "message": "ข้อมูลไม่ถูกต้อง",
+                    "errors": {"file": ["ไฟล์ต้องเข้ารหัสแบบ UTF-8"]},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Exception as e:
             return Response(
                 {"success": False, "message": f"เกิดข้อผิดพลาด: {str(e)}"},
@@ -316,31 +532,53 @@ class LicenseViewSet(viewsets.ModelViewSet):
             )
 
 
-class ActivationLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivationLogViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet สำหรับดู Log การ Activate
-    GET /api/logs/ - ดูรายการ Log ทั้งหมด
+    GET /api/logs/ - ดูรายการ Log ทั้งหมด (cursor pagination ใหม่ไปเก่า)
+    GET /api/logs/hourly/ - validate ที่สำเร็จรวมรายชั่วโมงต่อ License (ValidateRollup)
     """
 
     queryset = ActivationLog.objects.all()
     serializer_class = ActivationLogSerializer
     permission_classes = [HasStaticAPIKey]
+    pagination_class = CreatedAtCursorPagination
+    sparse_fieldset_actions = ("list", "retrieve", "hourly")
 
     def get_queryset(self):
         """กรอง Log ตาม query parameters"""
+        # license_info ใช้ License ของแต่ละ Log (JOIN ใน query เดียว)
         queryset = super().get_queryset()
+        if self.action != "export":
+            queryset = queryset.select_related("license")
+        if self.action == "hourly":
+            return filter_validate_rollups(queryset, self.request.query_params)
+        return filter_activation_logs(queryset, self.request.query_params)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        queryset=ValidateRollup.objects.all(),
+        serializer_class=ValidateRollupSerializer,
+        pagination_class=HourCursorPagination,
+    )
+    def hourly(self, request):
+        """
+        API สำหรับดู validate ที่สำเร็จรายชั่วโมง (เมื่อเปิด LOG_VALIDATE_ROLLUP
+        validate ที่สำเร็จจะไม่อยู่ใน GET /api/logs/)
+        GET /api/logs/hourly/?license_id=1&fields=hour,count
+        """
+        return self.list(request)
 
-        # กรองตาม license_id
-        license_id = self.request.query_params.get("license_id")
-        if license_id:
-            queryset = queryset.filter(license_id=license_id)
-
-        # กรองตาม action
-        action = self.request.query_params.get("action")
-        if action:
-            queryset = queryset.filter(action=action)
-
-        return queryset
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        API สำหรับ export Log ทั้งหมด (กรองได้เหมือน GET /api/logs/)
+        GET /api/logs/export/?file_format=ndjson|csv&gzip=true
+        """
+        return export_response(
+            request, activation_log_export(self.filter_queryset(self.get_queryset()))
+        )
 
 
 @csrf_protect